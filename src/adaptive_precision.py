@@ -0,0 +1,273 @@
+# src/adaptive_precision.py
+
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .risk_metrics import tail_metrics
+from .updated_simulation_model import (_check_variance_reduction, _concatenate_paths, _mean_and_standard_error,
+                                       _run_shards, _split_into_shards, _variance_reduction_groups)
+
+# A batch never more than doubles the paths simulated so far, so a noisy
+# early standard error cannot commit the whole budget at once
+MAX_GROWTH = 2.0
+# Head room on the projected number of paths, since the projection uses
+# the current standard error
+OVERSHOOT = 1.1
+
+# =============================================================================
+# Estimators
+# =============================================================================
+def _parse_target(target):
+    """Splits 'var_0.95' into ('var', 0.95); other targets are means with no level."""
+    if target.startswith('var_'):
+        level = float(target[4:])
+        if not 0 < level < 1:
+            raise ValueError(f"VaR level must be between 0 and 1, got {target}")
+        return 'var', level
+    return 'mean', None
+
+def value_at_risk_estimate(losses, level, groups, weights=None):
+    """
+    VaR of ``losses`` at ``level`` and its standard error.
+
+    The error is that of the estimated exceedance probability, divided by
+    the loss density at the VaR, which is estimated from the spacing of
+    the quantiles on either side (Siddiqui's estimator).
+    """
+    n = losses.size
+    bandwidth = min(0.5 * (1.0 - level), 0.5 * level, 1.96 * np.sqrt(level * (1.0 - level) / n))
+    levels = (level - bandwidth, level, level + bandwidth)
+    value_at_risk, _ = tail_metrics(losses, levels, weights)
+    exceeds = (losses > value_at_risk[level]).astype(float)
+    if weights is not None:
+        exceeds *= weights
+    _, probability_error = _mean_and_standard_error(exceeds, groups)
+    spacing = value_at_risk[levels[2]] - value_at_risk[levels[0]]
+    return value_at_risk[level], probability_error * spacing / (2.0 * bandwidth)
+
+def _check_precision(estimate, standard_error, tolerance, relative):
+    """The absolute standard error wanted for an estimate, and whether it is reached."""
+    wanted = tolerance * abs(estimate) if relative else tolerance
+    return wanted, standard_error <= wanted
+
+def _next_batch_size(num_done, needed, batch_size, remaining, even):
+    """Paths for the next batch: enough to reach ``needed`` in total, within the growth limit and budget."""
+    size = int(min(max(np.ceil(needed * OVERSHOOT) - num_done, batch_size), MAX_GROWTH * num_done, remaining))
+    if even:
+        size -= size % 2
+    return size
+
+# =============================================================================
+# Supply Chain Simulation
+# =============================================================================
+def _simulate_batch(simulator, num_paths, simulation_period_days, chunk_size, options, workers):
+    """One batch of per-path arrays, on a process pool with ``workers`` > 1 as in run_simulation."""
+    if workers is None or workers <= 1:
+        return simulator._simulate_path_chunks(num_paths, simulation_period_days, chunk_size, *options)
+    shard_sizes = _split_into_shards(num_paths, workers, even=options[1] == 'antithetic')
+    tasks = [
+        ('_simulate_path_chunks', seed, (size, simulation_period_days, chunk_size, *options))
+        for seed, size in zip(simulator.seed_sequence.spawn(len(shard_sizes)), shard_sizes)
+    ]
+    shards = _run_shards(simulator, tasks, workers)
+    for shard, offset in zip(shards, np.cumsum([0] + shard_sizes[:-1])):
+        shard['group'] = shard['group'] + offset
+    return _concatenate_paths(shards)
+
+def run_simulation_to_precision(simulator, tolerance, targets=('supply_chain_risk_index',), relative=False,
+                                batch_size=10_000, max_paths=10_000_000, max_seconds=None,
+                                simulation_period_days=365, chunk_size=100_000, workers=None,
+                                frequency_tilt=None, variance_reduction=None, control_variates=False,
+                                qmc_replicates=8):
+    """
+    Runs SupplyChainSimulator paths in batches until the standard error of
+    every target is at most ``tolerance`` (a fraction of the estimate with
+    ``relative``), or ``max_paths`` or ``max_seconds`` run out.
+
+    Targets are run_simulation averages ('supply_chain_risk_index',
+    'avg_total_cost_per_period', ...) or a total-cost VaR as 'var_0.95'.
+    After the first batch each batch is sized from the current standard
+    errors to reach the tolerance. Returns the run_simulation result for
+    all paths together with ``precision`` (estimate, standard error and
+    whether it was reached, per target), ``num_paths``, ``num_batches``
+    and ``stopped_by`` ('tolerance', 'max_paths' or 'max_seconds').
+    """
+    parsed = {target: _parse_target(target) for target in targets}
+    _check_variance_reduction(variance_reduction, batch_size)
+    if frequency_tilt and control_variates:
+        raise ValueError("Control variates cannot be combined with frequency_tilt.")
+    options = (frequency_tilt, variance_reduction, qmc_replicates, control_variates)
+    even = variance_reduction == 'antithetic'
+    start_time = time.perf_counter()
+    simulator.instrumentation.reset()
+
+    paths, num_paths, num_batches, size = None, 0, 0, min(batch_size, max_paths)
+    while True:
+        batch = _simulate_batch(simulator, size, simulation_period_days, chunk_size, options, workers)
+        batch['group'] = batch['group'] + num_paths
+        paths = batch if paths is None else _concatenate_paths([paths, batch])
+        num_paths += size
+        num_batches += 1
+
+        results = simulator._summarize_paths(paths, frequency_tilt)
+        weights = results.get('importance_weights')
+
+        precision, needed = {}, num_paths
+        for target, (kind, level) in parsed.items():
+            if kind == 'var':
+                estimate, standard_error = value_at_risk_estimate(paths['total_cost'], level, paths['group'], weights)
+            else:
+                estimate, standard_error = results[target], results['standard_errors'][target]
+            wanted, reached = _check_precision(estimate, standard_error, tolerance, relative)
+            precision[target] = {
+                'estimate': estimate, 'standard_error': standard_error, 'tolerance': wanted, 'reached': reached,
+            }
+            if not reached:
+                needed = max(needed, num_paths * (standard_error / wanted) ** 2 if wanted > 0 else np.inf)
+
+        if all(entry['reached'] for entry in precision.values()):
+            stopped_by = 'tolerance'
+        elif num_paths >= max_paths:
+            stopped_by = 'max_paths'
+        elif max_seconds is not None and time.perf_counter() - start_time >= max_seconds:
+            stopped_by = 'max_seconds'
+        else:
+            size = _next_batch_size(num_paths, needed, batch_size, max_paths - num_paths, even)
+            if size > 0:
+                continue
+            stopped_by = 'max_paths'
+        break
+
+    results.update({
+        'precision': precision,
+        'num_paths': num_paths,
+        'num_batches': num_batches,
+        'stopped_by': stopped_by,
+        'elapsed_seconds': time.perf_counter() - start_time,
+    })
+    if simulator.instrumentation.enabled:
+        results['instrumentation'] = simulator.instrumentation.report()
+    return results
+
+# =============================================================================
+# Policy Experiments
+# =============================================================================
+def _point_estimate(target, level, costs, groups):
+    if target == 'var':
+        return value_at_risk_estimate(costs, level, groups)
+    return _mean_and_standard_error(costs, groups)
+
+def run_experiment_to_precision(simulator, policy_name, parameter_grid, tolerance, target='avg_total_cost',
+                                relative=False, confidence=0.95, batch_size=1_000, max_replications=1_000_000,
+                                max_seconds=None, sim_period_days=365, points_per_batch=64,
+                                variance_reduction=None, qmc_replicates=8):
+    """
+    Runs an InventorySimulator policy grid in batches until the standard
+    error of ``target`` ('avg_total_cost' or a cost VaR as 'var_0.95') is
+    at most ``tolerance`` at every grid point still in contention, or a
+    budget runs out (``max_replications`` per point, ``max_seconds`` overall).
+
+    Each batch is drawn once and replayed across the grid points still in
+    contention (common random numbers, as in run_sweep). After each batch
+    a point is dropped as dominated when its cost is above the best
+    point's with ``confidence``: from the paired cost differences for the
+    mean, or from non-overlapping confidence intervals for a VaR. Dropped
+    points keep their last estimates, so the remaining batches go to the
+    close contenders.
+
+    Returns a DataFrame with one row per grid point: the run_experiment
+    columns, the target estimate and standard error, the replications
+    used and a ``status`` of 'converged', 'dominated' or 'budget'.
+    """
+    kind, level = _parse_target(target)
+    _check_variance_reduction(variance_reduction, batch_size)
+    z = stats.norm.ppf(0.5 + 0.5 * confidence)
+    even = variance_reduction == 'antithetic'
+    start_time = time.perf_counter()
+    simulator.instrumentation.reset()
+
+    num_points = len(parameter_grid)
+    costs = [np.zeros(0) for _ in range(num_points)]
+    groups = np.zeros(0, dtype=np.int64)
+    estimates = [None] * num_points
+    status = [None] * num_points
+    active = list(range(num_points))
+    num_done, size = 0, min(batch_size, max_replications)
+    while True:
+        streams = simulator.draw_common_streams(size, sim_period_days, variance_reduction, qmc_replicates)
+        for start in range(0, len(active), points_per_batch):
+            batch = active[start:start + points_per_batch]
+            row_params = {
+                key: np.repeat([parameter_grid[i][key] for i in batch], size) for key in parameter_grid[batch[0]]
+            }
+            batch_costs = simulator._simulate_replications(
+                policy_name, row_params, len(batch) * size, sim_period_days, streams=streams
+            )[0].reshape(len(batch), size)
+            for i, point_costs in zip(batch, batch_costs):
+                costs[i] = np.concatenate([costs[i], point_costs])
+        groups = np.concatenate([groups, _variance_reduction_groups(size, variance_reduction, qmc_replicates) + num_done])
+        num_done += size
+
+        needed = num_done
+        for i in active:
+            estimate, standard_error = _point_estimate(kind, level, costs[i], groups)
+            wanted, reached = _check_precision(estimate, standard_error, tolerance, relative)
+            estimates[i] = (estimate, standard_error, reached)
+            if not reached:
+                needed = max(needed, num_done * (standard_error / wanted) ** 2 if wanted > 0 else np.inf)
+
+        best = min(active, key=lambda i: estimates[i][0])
+        for i in active:
+            if i == best:
+                continue
+            if kind == 'mean':
+                difference, difference_error = _mean_and_standard_error(costs[i] - costs[best], groups)
+                dominated = difference - z * difference_error > 0
+            else:
+                dominated = estimates[i][0] - z * estimates[i][1] > estimates[best][0] + z * estimates[best][1]
+            if dominated:
+                status[i] = 'dominated'
+        active = [i for i in active if status[i] is None]
+
+        if all(estimates[i][2] for i in active):
+            stopped_by = 'tolerance'
+        elif num_done >= max_replications:
+            stopped_by = 'max_replications'
+        elif max_seconds is not None and time.perf_counter() - start_time >= max_seconds:
+            stopped_by = 'max_seconds'
+        else:
+            size = _next_batch_size(num_done, needed, batch_size, max_replications - num_done, even)
+            if size > 0:
+                continue
+            stopped_by = 'max_replications'
+        break
+
+    results = []
+    for i, params in enumerate(parameter_grid):
+        avg_cost, std_error = _mean_and_standard_error(costs[i], groups[:costs[i].size])
+        estimate, standard_error, reached = estimates[i]
+        results.append({
+            'policy': policy_name,
+            'parameters': params,
+            'avg_total_cost': avg_cost,
+            'std_dev_cost': np.std(costs[i]),
+            'std_error_cost': std_error,
+            'target': target,
+            'estimate': estimate,
+            'standard_error': standard_error,
+            'num_replications': costs[i].size,
+            'status': status[i] or ('converged' if reached else 'budget'),
+        })
+
+    results = pd.DataFrame(results)
+    results.attrs.update({
+        'stopped_by': stopped_by,
+        'total_replications': int(sum(point_costs.size for point_costs in costs)),
+        'elapsed_seconds': time.perf_counter() - start_time,
+    })
+    if simulator.instrumentation.enabled:
+        results.attrs['instrumentation'] = simulator.instrumentation.report()
+    return results
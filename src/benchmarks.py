@@ -0,0 +1,241 @@
+# src/benchmarks.py
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from scipy import stats
+
+from .updated_simulation_model import DIST_MAP, InventorySimulator, SupplyChainSimulator
+
+DEFAULT_PARAMS_PATH = os.path.join(os.path.dirname(__file__), '..', 'Output', 'fitted_parameters.json')
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(__file__), '..', 'Output', 'benchmark_history.json')
+DEFAULT_THRESHOLD = 0.10
+
+SIMULATION_PATH_COUNTS = (1_000, 10_000, 100_000)
+SIMULATION_HORIZONS = (90, 365, 730)
+COPULA_ROW_COUNTS = (10_000, 100_000, 1_000_000, 10_000_000)
+MARGINAL_SAMPLE_COUNT = 1_000_000
+
+# Representative parameters for benchmarking each marginal family
+FAMILY_PARAMETERS = {
+    'expon': [0, 5.0],
+    'weibull_min': [1.2059353025722461, 0.07980278079924516, 57.39386470749668],
+    'lognorm': [0.9062002166315953, 0, 122.38936468826795],
+    'pareto': [2.5, 0, 10.0],
+    'norm': [20.0, 60.0],
+}
+
+# Parameter grids from the README experiment sheet (B-001, B-002, B-003)
+README_POLICY_GRIDS = {
+    'sS_B001': ('sS', [{'s': s, 'S': S} for s, S in itertools.product([10, 20, 30], [50, 75, 100])]),
+    'sS_B002': ('sS', [{'s': s, 'S': S} for s, S in itertools.product([50, 70, 90], [100, 150, 200])]),
+    'myopic_B003': ('myopic', [{'target_days': days} for days in [10, 20, 30]]),
+}
+
+# =============================================================================
+# Benchmark Cases
+# =============================================================================
+class Benchmark:
+    """
+    One timed operation. ``setup`` builds its inputs once; ``run`` takes
+    them and does ``items`` units of work (paths, rows, samples, ...), so
+    throughput is comparable across runs with different timings.
+    """
+    def __init__(self, name, setup, run, items, unit):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.items = items
+        self.unit = unit
+
+def _simulator_with(params, seed=0):
+    """Builds a SupplyChainSimulator from a parameter dict via a temporary JSON file."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'params.json')
+        with open(path, 'w') as f:
+            json.dump(params, f)
+        return SupplyChainSimulator(path, seed=seed)
+
+def _student_t_params(params):
+    """Swaps the copula in ``params`` for a Student-t copula on the same variables."""
+    params = json.loads(json.dumps(params))
+    params['copula']['type'] = 'student_t'
+    params['copula']['parameters']['degrees_of_freedom'] = 5.4
+    return params
+
+def build_benchmarks(params_path=DEFAULT_PARAMS_PATH, quick=False):
+    """
+    The benchmark suite for the simulator hot paths. ``quick`` drops the
+    largest sizes so a run finishes in well under a minute.
+    """
+    with open(params_path, 'r') as f:
+        params = json.load(f)
+    path_counts = SIMULATION_PATH_COUNTS[:-1] if quick else SIMULATION_PATH_COUNTS
+    row_counts = COPULA_ROW_COUNTS[:-1] if quick else COPULA_ROW_COUNTS
+    num_replications = 200 if quick else 1000
+
+    benchmarks = []
+    for num_paths, horizon in itertools.product(path_counts, SIMULATION_HORIZONS):
+        benchmarks.append(Benchmark(
+            f"run_simulation/paths={num_paths}/days={horizon}",
+            lambda: _simulator_with(params),
+            lambda sim, n=num_paths, days=horizon: sim.run_simulation(n, days),
+            num_paths, 'paths'
+        ))
+
+    for copula_type, method in [('gaussian', '_generate_dependent_samples_gaussian'),
+                                ('student_t', '_generate_dependent_samples_student_t')]:
+        copula_params = params if copula_type == 'gaussian' else _student_t_params(params)
+        for num_rows in row_counts:
+            benchmarks.append(Benchmark(
+                f"copula_sampling/{copula_type}/rows={num_rows}",
+                lambda p=copula_params: _simulator_with(p),
+                lambda sim, n=num_rows, m=method: getattr(sim, m)(n),
+                num_rows, 'rows'
+            ))
+
+    for family, family_params in FAMILY_PARAMETERS.items():
+        family_model = dict(params, order_profit_per_order={'distribution': family, 'parameters': family_params})
+        benchmarks.append(Benchmark(
+            f"marginal_samples/{family}",
+            lambda p=family_model: _simulator_with(p),
+            lambda sim: sim._generate_marginal_samples('order_profit_per_order', MARGINAL_SAMPLE_COUNT),
+            MARGINAL_SAMPLE_COUNT, 'samples'
+        ))
+
+    lead_time = params['shipping_delay_days']
+    lead_time_dist = DIST_MAP[lead_time['distribution']](*lead_time['parameters'])
+    for grid_name, (policy, grid) in README_POLICY_GRIDS.items():
+        benchmarks.append(Benchmark(
+            f"run_experiment/{grid_name}",
+            lambda: InventorySimulator(stats.norm(loc=5, scale=2), lead_time_dist, seed=0),
+            lambda sim, policy=policy, grid=grid: sim.run_experiment(policy, grid, num_replications, 365),
+            num_replications * len(grid), 'replications'
+        ))
+    return benchmarks
+
+# =============================================================================
+# Running and History
+# =============================================================================
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(benchmarks, repeats=3, name_filter=None):
+    """
+    Times each benchmark ``repeats`` times after one warm-up call and returns
+    a history record. The best time gives the throughput; the median is kept
+    to show how noisy the machine was.
+    """
+    results = {}
+    for benchmark in benchmarks:
+        if name_filter and name_filter not in benchmark.name:
+            continue
+        inputs = benchmark.setup()
+        benchmark.run(inputs)
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            benchmark.run(inputs)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        results[benchmark.name] = {
+            'items': benchmark.items,
+            'unit': benchmark.unit,
+            'best_seconds': best,
+            'median_seconds': float(np.median(timings)),
+            'throughput': benchmark.items / best,
+        }
+        print(f"{benchmark.name:<50} {best:10.4f} s {benchmark.items / best:14.1f} {benchmark.unit}/s")
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs)",
+        'repeats': repeats,
+        'results': results,
+    }
+
+def load_history(history_path):
+    if not os.path.exists(history_path):
+        return []
+    with open(history_path, 'r') as f:
+        return json.load(f)
+
+def append_history(history_path, record):
+    """Appends a run record to the JSON history file."""
+    history = load_history(history_path)
+    history.append(record)
+    with open(history_path, 'w') as f:
+        json.dump(history, f, indent=2)
+
+def compare_runs(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares throughput per benchmark between two history records. Returns
+    one row per benchmark present in both, with ``regression`` set where
+    throughput fell by more than ``threshold`` (a fraction).
+    """
+    rows = []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        change = result['throughput'] / baseline['results'][name]['throughput'] - 1.0
+        rows.append({
+            'benchmark': name,
+            'baseline_throughput': baseline['results'][name]['throughput'],
+            'current_throughput': result['throughput'],
+            'change': change,
+            'regression': change < -threshold,
+        })
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks for the simulator hot paths.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="run the suite and append the results to the history")
+    run_parser.add_argument('--params', default=DEFAULT_PARAMS_PATH)
+    run_parser.add_argument('--history', default=DEFAULT_HISTORY_PATH)
+    run_parser.add_argument('--repeats', type=int, default=3)
+    run_parser.add_argument('--filter', default=None, help="only run benchmarks whose name contains this")
+    run_parser.add_argument('--quick', action='store_true', help="skip the largest sizes")
+
+    compare_parser = subparsers.add_parser('compare', help="flag throughput regressions between two history runs")
+    compare_parser.add_argument('--history', default=DEFAULT_HISTORY_PATH)
+    compare_parser.add_argument('--baseline', type=int, default=-2, help="history index of the baseline run")
+    compare_parser.add_argument('--current', type=int, default=-1, help="history index of the run to check")
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        record = run_benchmarks(build_benchmarks(args.params, args.quick), args.repeats, args.filter)
+        append_history(args.history, record)
+        sys.exit(0)
+
+    history = load_history(args.history)
+    if len(history) < 2:
+        sys.exit(f"Need at least two runs in {args.history} to compare.")
+    baseline, current = history[args.baseline], history[args.current]
+    print(f"Baseline {baseline['timestamp']} ({baseline['git_commit']}) -> current {current['timestamp']} ({current['git_commit']})")
+    rows = compare_runs(baseline, current, args.threshold)
+    for row in rows:
+        flag = 'REGRESSION' if row['regression'] else ''
+        print(f"{row['benchmark']:<50} {row['change']:+8.1%} {flag}")
+    sys.exit(1 if any(row['regression'] for row in rows) else 0)
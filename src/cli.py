@@ -0,0 +1,300 @@
+# src/cli.py
+#
+# Command-line entry point for batch runs:
+#
+#     scri run run.json --seed 7 --output runs/job-7
+#     scri sweep sweep.json --set num_simulations=5000
+#
+# Only the standard library is imported at start-up; numpy, scipy, pandas
+# and pyarrow are imported by the command that needs them, so config errors
+# and --help return at once and a run never loads pandas.
+
+import argparse
+import json
+import os
+import sys
+import time
+
+OUTPUT_FORMATS = ('parquet', 'npy', 'none')
+
+# Config keys and their defaults; None marks keys without a default
+RUN_DEFAULTS = {
+    'params': None,
+    'compiled_model': None,
+    'num_simulations': None,
+    'simulation_period_days': 365,
+    'seed': None,
+    'chunk_size': 100_000,
+    'workers': None,
+    'frequency_tilt': None,
+    'variance_reduction': None,
+    'control_variates': False,
+    'qmc_replicates': 8,
+    'ppf_table_tol': None,
+    'output': None,
+    'format': 'parquet',
+}
+SWEEP_DEFAULTS = {
+    'params': None,
+    'demand': None,
+    'lead_time': None,
+    'holding_cost': 1.0,
+    'shortage_cost': 10.0,
+    'order_cost': 50.0,
+    'scenarios': None,
+    'num_simulations': None,
+    'sim_period_days': 365,
+    'seed': None,
+    'baseline': 0,
+    'points_per_batch': 64,
+    'variance_reduction': None,
+    'qmc_replicates': 8,
+    'output': None,
+    'format': 'parquet',
+}
+# Config values that are paths, resolved against the config file's directory
+PATH_KEYS = ('params', 'compiled_model', 'output')
+
+# =============================================================================
+# Config Files
+# =============================================================================
+def _parse_override(text):
+    """Splits 'key=value' and parses the value as JSON, falling back to the raw string."""
+    key, separator, value = text.partition('=')
+    if not separator or not key:
+        raise ValueError(f"Overrides must look like key=value, got: {text}")
+    try:
+        return key, json.loads(value)
+    except json.JSONDecodeError:
+        return key, value
+
+def load_config(filepath, defaults, overrides=()):
+    """
+    Reads a JSON config file, applies ``key=value`` overrides and fills in
+    the defaults. Unknown keys are rejected so that a typo does not silently
+    fall back to a default. Relative paths are taken from the config file's
+    directory (the output path of an override from the working directory).
+    """
+    try:
+        with open(filepath, 'r') as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Config file not found at: {filepath}")
+    except json.JSONDecodeError:
+        raise ValueError(f"Error decoding JSON from: {filepath}")
+    if not isinstance(config, dict):
+        raise ValueError(f"Config must be a JSON object: {filepath}")
+
+    base_dir = os.path.dirname(os.path.abspath(filepath))
+    for key in PATH_KEYS:
+        if isinstance(config.get(key), str):
+            config[key] = os.path.join(base_dir, config[key])
+    for text in overrides:
+        key, value = _parse_override(text)
+        config[key] = os.path.abspath(value) if key in PATH_KEYS and isinstance(value, str) else value
+
+    unknown = sorted(set(config) - set(defaults))
+    if unknown:
+        raise ValueError(f"Unknown config keys: {', '.join(unknown)}")
+    config = {**defaults, **config}
+    if config['num_simulations'] is None:
+        raise ValueError("Config must set 'num_simulations'.")
+    if config['format'] not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {config['format']} (expected one of {', '.join(OUTPUT_FORMATS)})")
+    return config
+
+def _load_params(params):
+    """Fitted parameters given inline or as a path to a JSON file."""
+    if isinstance(params, dict):
+        return params
+    try:
+        with open(params, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Parameter file not found at: {params}")
+    except json.JSONDecodeError:
+        raise ValueError(f"Error decoding JSON from: {params}")
+
+# =============================================================================
+# Output
+# =============================================================================
+def _to_json(value):
+    """Converts numpy scalars and arrays inside a result to plain JSON values."""
+    if isinstance(value, dict):
+        return {str(key): _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return value
+
+def write_columns(output_dir, name, columns, output_format):
+    """
+    Writes equal-length arrays as ``<name>.parquet`` (one column each,
+    zstd-compressed) or as ``<name>.<column>.npy`` files, which readers can
+    open memory-mapped with ``np.load(path, mmap_mode='r')``. Returns the
+    paths written.
+    """
+    import numpy as np
+    if output_format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        # Arrays are wrapped from their buffers: pa.array() would import
+        # pandas just to check whether it was given a Series
+        arrays = [
+            pa.Array.from_buffers(pa.from_numpy_dtype(values.dtype), len(values),
+                                  [None, pa.py_buffer(np.ascontiguousarray(values))])
+            for values in columns.values()
+        ]
+        path = os.path.join(output_dir, f"{name}.parquet")
+        pq.write_table(pa.Table.from_arrays(arrays, names=list(columns)), path, compression='zstd')
+        return [path]
+
+    paths = []
+    for column, values in columns.items():
+        path = os.path.join(output_dir, f"{name}.{column}.npy")
+        np.save(path, values)
+        paths.append(path)
+    return paths
+
+def _write_outputs(config, summary, columns, name):
+    """Writes summary.json and the per-path columns to the configured output directory."""
+    if config['output'] is None:
+        return
+    os.makedirs(config['output'], exist_ok=True)
+    if config['format'] != 'none':
+        summary['files'] = write_columns(config['output'], name, columns, config['format'])
+    with open(os.path.join(config['output'], 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+
+# =============================================================================
+# Commands
+# =============================================================================
+def run_command(config):
+    """
+    Runs SupplyChainSimulator.run_simulation as configured. Per-path total
+    cost and average delay are written as float32, disruption counts as
+    int32 (and importance weights as float32 with a frequency tilt).
+    """
+    import numpy as np
+    from .updated_simulation_model import SupplyChainSimulator
+
+    start_time = time.perf_counter()
+    if config['compiled_model'] is not None:
+        simulator = SupplyChainSimulator.from_compiled(config['compiled_model'], seed=config['seed'])
+    elif config['params'] is not None:
+        simulator = SupplyChainSimulator.from_params(
+            _load_params(config['params']), config['ppf_table_tol'], seed=config['seed']
+        )
+    else:
+        raise ValueError("Config must set 'params' or 'compiled_model'.")
+
+    results = simulator.run_simulation(
+        config['num_simulations'], config['simulation_period_days'], config['chunk_size'], config['workers'],
+        frequency_tilt=config['frequency_tilt'], variance_reduction=config['variance_reduction'],
+        control_variates=config['control_variates'], qmc_replicates=config['qmc_replicates']
+    )
+    columns = {
+        'total_cost': results['simulated_total_costs'].astype(np.float32),
+        'average_delay': results['simulated_average_delays'].astype(np.float32),
+        'num_disruptions': results['simulated_num_disruptions'].astype(np.int32),
+    }
+    if 'importance_weights' in results:
+        columns['importance_weight'] = results['importance_weights'].astype(np.float32)
+
+    summary = _to_json({
+        'command': 'run',
+        'config': config,
+        'results': {name: value for name, value in results.items() if not isinstance(value, np.ndarray)},
+        'elapsed_seconds': time.perf_counter() - start_time,
+    })
+    _write_outputs(config, summary, columns, 'paths')
+    return summary
+
+def sweep_command(config):
+    """
+    Runs InventorySimulator.run_sweep as configured. ``demand`` and
+    ``lead_time`` are given as in the fitted-parameter JSON; without
+    ``lead_time`` the fitted shipping delay of ``params`` is used. The cost
+    of every replication of every combination is written as float32, one
+    column per combination in the order of the summary table.
+    """
+    import numpy as np
+    from .updated_simulation_model import DIST_MAP, InventorySimulator, _variance_reduction_groups
+
+    start_time = time.perf_counter()
+    if config['scenarios'] is None or config['demand'] is None:
+        raise ValueError("Sweep config must set 'scenarios' and 'demand'.")
+    lead_time = config['lead_time']
+    if lead_time is None:
+        if config['params'] is None:
+            raise ValueError("Sweep config must set 'lead_time' or 'params'.")
+        lead_time = _load_params(config['params']).get('shipping_delay_days')
+        if lead_time is None:
+            raise ValueError("Parameters for 'shipping_delay_days' not found in JSON.")
+    for name, dist in (('demand', config['demand']), ('lead_time', lead_time)):
+        if dist['distribution'] not in DIST_MAP:
+            raise ValueError(f"Unsupported distribution for '{name}': {dist['distribution']}")
+
+    simulator = InventorySimulator(
+        DIST_MAP[config['demand']['distribution']](*config['demand']['parameters']),
+        DIST_MAP[lead_time['distribution']](*lead_time['parameters']),
+        config['holding_cost'], config['shortage_cost'], config['order_cost'], seed=config['seed']
+    )
+    streams = simulator.draw_common_streams(
+        config['num_simulations'], config['sim_period_days'], config['variance_reduction'], config['qmc_replicates']
+    )
+    combinations = [(policy, params) for policy, grid in config['scenarios'].items() for params in grid]
+    all_costs = simulator._sweep_costs(combinations, streams, config['sim_period_days'], config['points_per_batch'])
+    groups = _variance_reduction_groups(all_costs.shape[1], config['variance_reduction'], config['qmc_replicates'])
+    table = simulator._summarize_sweep(combinations, all_costs, groups, config['baseline'])
+
+    parameter_names = {key for _, params in combinations for key in params}
+    columns = {f"{i}_{policy}": costs.astype(np.float32) for i, ((policy, _), costs) in enumerate(zip(combinations, all_costs))}
+    summary = _to_json({
+        'command': 'sweep',
+        'config': config,
+        'results': table.drop(columns=sorted(parameter_names)).to_dict(orient='records'),
+        'elapsed_seconds': time.perf_counter() - start_time,
+    })
+    _write_outputs(config, summary, columns, 'costs')
+    return summary
+
+COMMANDS = {
+    'run': (run_command, RUN_DEFAULTS),
+    'sweep': (sweep_command, SWEEP_DEFAULTS),
+}
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='scri', description="Supply-chain risk simulation runs from config files.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in [('run', "simulate disruption paths (SupplyChainSimulator.run_simulation)"),
+                            ('sweep', "compare inventory policies on common random numbers (run_sweep)")]:
+        command_parser = subparsers.add_parser(name, help=help_text)
+        command_parser.add_argument('config', help="JSON config file")
+        command_parser.add_argument('--seed', type=int, default=None, help="override the config seed")
+        command_parser.add_argument('--output', default=None, help="override the output directory")
+        command_parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                                    help="override a config value (JSON-parsed); repeatable")
+        command_parser.add_argument('--quiet', action='store_true', help="do not print the summary")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    command, defaults = COMMANDS[args.command]
+    overrides = list(args.set)
+    if args.seed is not None:
+        overrides.append(f"seed={args.seed}")
+    if args.output is not None:
+        overrides.append(f"output={json.dumps(args.output)}")
+    try:
+        summary = command(load_config(args.config, defaults, overrides))
+    except (FileNotFoundError, ValueError) as error:
+        sys.exit(f"scri {args.command}: {error}")
+    if not args.quiet:
+        print(json.dumps(summary['results']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,225 @@
+# src/copula_fitting.py
+
+import numpy as np
+import pandas as pd
+from scipy import linalg, optimize, special, stats
+
+from .updated_simulation_model import PPFTable
+
+# Bounds for the profile search over the Student-t degrees of freedom
+DF_BOUNDS = (2.0, 200.0)
+# Absolute accuracy of the interpolated t quantiles used during the search
+T_SCORE_TOL = 1e-5
+
+# =============================================================================
+# Pseudo-Observations and Rank Correlation
+# =============================================================================
+def pseudo_observations(data):
+    """
+    Maps each column of ``data`` (rows are observations) to its empirical CDF
+    values ``rank / (n + 1)``, with tied values sharing their average rank.
+
+    One argsort per column; tie groups are found on the sorted values.
+    """
+    data = np.asarray(data, dtype=float)
+    n = data.shape[0]
+    u = np.empty_like(data)
+    for j in range(data.shape[1]):
+        column = np.ascontiguousarray(data[:, j])
+        order = np.argsort(column)
+        sorted_values = column[order]
+        # Start and end position of the tie group each sorted value belongs to
+        starts = np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1]])
+        group_sizes = np.diff(np.r_[starts, n])
+        average_ranks = starts + (group_sizes + 1) / 2.0
+        u[order, j] = np.repeat(average_ranks, group_sizes) / (n + 1)
+    return u
+
+def kendall_tau_matrix(u, max_rows=200_000, rng=None):
+    """
+    Pairwise Kendall's tau, on a random subset of at most ``max_rows`` rows
+    (tau only seeds the correlation, so the subset keeps it cheap).
+    """
+    if u.shape[0] > max_rows:
+        rng = np.random.default_rng(rng)
+        u = u[rng.choice(u.shape[0], max_rows, replace=False)]
+    d = u.shape[1]
+    tau = np.eye(d)
+    for i in range(d):
+        for j in range(i + 1, d):
+            tau[i, j] = tau[j, i] = stats.kendalltau(u[:, i], u[:, j])[0]
+    return tau
+
+def _nearest_correlation(matrix, min_eigenvalue=1e-6):
+    """Clips eigenvalues to make a symmetric matrix a valid correlation matrix."""
+    eigenvalues, eigenvectors = np.linalg.eigh(0.5 * (matrix + matrix.T))
+    matrix = eigenvectors @ np.diag(np.maximum(eigenvalues, min_eigenvalue)) @ eigenvectors.T
+    scale = np.sqrt(np.diag(matrix))
+    return matrix / np.outer(scale, scale)
+
+def correlation_from_tau(tau):
+    """Elliptical-copula correlation from Kendall's tau, rho = sin(pi * tau / 2)."""
+    return _nearest_correlation(np.sin(0.5 * np.pi * tau))
+
+# =============================================================================
+# Log-Likelihoods
+# =============================================================================
+class _CachedCholesky:
+    """Cholesky factor and log-determinant of a correlation matrix, recomputed only when it changes."""
+    def __init__(self, corr_matrix):
+        self.update(corr_matrix)
+
+    def update(self, corr_matrix):
+        self.corr_matrix = corr_matrix
+        self.factor = np.linalg.cholesky(corr_matrix)
+        self.log_det = 2.0 * np.sum(np.log(np.diag(self.factor)))
+
+    def quadratic_form(self, scores):
+        """x' R^-1 x for every row of ``scores``."""
+        whitened = linalg.solve_triangular(self.factor, scores.T, lower=True, check_finite=False)
+        return np.einsum('ij,ij->j', whitened, whitened)
+
+def gaussian_log_likelihood(normal_scores, cholesky):
+    """Gaussian copula log-likelihood of normal scores ``Phi^-1(u)``."""
+    n = normal_scores.shape[0]
+    return -0.5 * n * cholesky.log_det - 0.5 * np.sum(cholesky.quadratic_form(normal_scores) - np.sum(normal_scores ** 2, axis=1))
+
+def student_t_scores(normal_scores, df):
+    """t quantiles of the pseudo-observations, ``t_df^-1(Phi(z))``, from an interpolated score table."""
+    return PPFTable(stats.t(df), stats.norm(), T_SCORE_TOL)(normal_scores)
+
+def student_t_log_likelihood(t_scores, df, cholesky):
+    """Student-t copula log-likelihood of t scores ``t_df^-1(u)``."""
+    n, d = t_scores.shape
+    constant = special.gammaln(0.5 * (df + d)) + (d - 1) * special.gammaln(0.5 * df) - d * special.gammaln(0.5 * (df + 1))
+    joint = -0.5 * (df + d) * np.sum(np.log1p(cholesky.quadratic_form(t_scores) / df))
+    marginal = 0.5 * (df + 1) * np.sum(np.log1p(t_scores ** 2 / df))
+    return n * constant - 0.5 * n * cholesky.log_det + joint + marginal
+
+# =============================================================================
+# Fitting
+# =============================================================================
+def _profile_degrees_of_freedom(normal_scores, cholesky, bounds=DF_BOUNDS, xatol=1e-3):
+    """Maximizes the t copula likelihood over df with the correlation held fixed."""
+    result = optimize.minimize_scalar(
+        lambda log_df: -student_t_log_likelihood(student_t_scores(normal_scores, np.exp(log_df)), np.exp(log_df), cholesky),
+        bounds=np.log(bounds), method='bounded', options={'xatol': xatol}
+    )
+    return float(np.exp(result.x)), -result.fun
+
+def _refine_t_correlation(t_scores, df, cholesky, num_iterations):
+    """
+    Fixed-point (EM) updates of the t copula correlation at fixed df: each
+    row is weighted by (df + d) / (df + x'R^-1x) and the weighted scatter
+    matrix is rescaled to a correlation matrix.
+    """
+    n, d = t_scores.shape
+    for _ in range(num_iterations):
+        weights = (df + d) / (df + cholesky.quadratic_form(t_scores))
+        scatter = (t_scores * weights[:, None]).T @ t_scores / n
+        scale = np.sqrt(np.diag(scatter))
+        cholesky.update(scatter / np.outer(scale, scale))
+
+def tail_dependence(u, corr_matrix, variables, df=None, quantile=0.95):
+    """
+    Theoretical vs empirical tail dependence for each pair of variables.
+
+    The theoretical coefficient is 2 t_{df+1}(-sqrt((df+1)(1-rho)/(1+rho)))
+    for the t copula and zero for the Gaussian. The empirical upper (lower)
+    coefficient is P(U > q, V > q) / (1 - q) (resp. P(U < 1-q, V < 1-q) / (1 - q)).
+    """
+    rows = []
+    for i in range(len(variables)):
+        for j in range(i + 1, len(variables)):
+            rho = corr_matrix[i, j]
+            theoretical = 0.0 if df is None else 2 * stats.t.cdf(-np.sqrt((df + 1) * (1 - rho) / (1 + rho)), df + 1)
+            rows.append({
+                'Variable 1': variables[i],
+                'Variable 2': variables[j],
+                'rho': rho,
+                'lambda_theoretical': theoretical,
+                'lambda_upper_empirical': np.mean((u[:, i] > quantile) & (u[:, j] > quantile)) / (1 - quantile),
+                'lambda_lower_empirical': np.mean((u[:, i] < 1 - quantile) & (u[:, j] < 1 - quantile)) / (1 - quantile),
+            })
+    return pd.DataFrame(rows)
+
+def fit_copula(data, variables, copula_type='student_t', num_refinements=2, search_rows=500_000,
+               tail_quantile=0.95, seed=None):
+    """
+    Fits a Gaussian or Student-t copula by maximum likelihood on the
+    pseudo-observations of ``data`` (a DataFrame, or an array whose columns
+    follow ``variables``).
+
+    The Gaussian correlation is that of the normal scores. The t copula
+    starts from the correlation implied by Kendall's tau, profiles the
+    likelihood over df, then alternates EM correlation updates with a
+    fresh df profile ``num_refinements`` times. That search runs on a random
+    subset of ``search_rows`` rows; the full data then gets one round of EM
+    updates and a df profile within 10% of the subset estimate. Returns the
+    parameters with the log-likelihood, AIC, BIC and a tail-dependence table.
+    """
+    if isinstance(data, pd.DataFrame):
+        data = data[list(variables)].to_numpy(dtype=float)
+    data = np.asarray(data, dtype=float)
+    data = data[np.all(np.isfinite(data), axis=1)]
+    if data.shape[1] != len(variables) or data.shape[1] < 2:
+        raise ValueError("A copula needs at least two variables, one column each.")
+
+    u = pseudo_observations(data)
+    normal_scores = special.ndtri(u)
+    n, d = u.shape
+
+    if copula_type == 'gaussian':
+        cholesky = _CachedCholesky(_nearest_correlation(np.corrcoef(normal_scores, rowvar=False)))
+        df = None
+        log_likelihood = gaussian_log_likelihood(normal_scores, cholesky)
+        parameters = {}
+    elif copula_type == 'student_t':
+        rng = np.random.default_rng(seed)
+        cholesky = _CachedCholesky(correlation_from_tau(kendall_tau_matrix(u, rng=rng)))
+        search_scores = normal_scores
+        if n > search_rows:
+            search_scores = normal_scores[rng.choice(n, search_rows, replace=False)]
+        df, log_likelihood = _profile_degrees_of_freedom(search_scores, cholesky)
+        for _ in range(num_refinements):
+            _refine_t_correlation(student_t_scores(search_scores, df), df, cholesky, num_iterations=3)
+            df, log_likelihood = _profile_degrees_of_freedom(search_scores, cholesky)
+        if n > search_rows:
+            _refine_t_correlation(student_t_scores(normal_scores, df), df, cholesky, num_iterations=2)
+            polish_bounds = (max(df / 1.1, DF_BOUNDS[0]), min(df * 1.1, DF_BOUNDS[1]))
+            df, log_likelihood = _profile_degrees_of_freedom(normal_scores, cholesky, polish_bounds, xatol=1e-2)
+        parameters = {'degrees_of_freedom': df}
+    else:
+        raise ValueError(f"Unsupported copula type: {copula_type}")
+
+    corr_matrix = cholesky.corr_matrix
+    num_params = d * (d - 1) // 2 + (df is not None)
+    parameters['correlation_matrix'] = corr_matrix.tolist()
+    return {
+        'type': copula_type,
+        'variables': list(variables),
+        'parameters': parameters,
+        'num_observations': n,
+        'log_likelihood': log_likelihood,
+        'aic': 2 * num_params - 2 * log_likelihood,
+        'bic': num_params * np.log(n) - 2 * log_likelihood,
+        'tail_dependence': tail_dependence(u, corr_matrix, list(variables), df, tail_quantile),
+    }
+
+def copula_section(fit):
+    """The ``copula`` entry of a fitted-parameter JSON for a ``fit_copula`` result."""
+    return {key: fit[key] for key in ('type', 'variables', 'parameters')}
+
+def compare_copulas(data, variables, tail_quantile=0.95, seed=None):
+    """
+    Fits both copula types and returns the fits with a comparison table
+    (log-likelihood, AIC, BIC), best AIC first.
+    """
+    fits = {copula_type: fit_copula(data, variables, copula_type, tail_quantile=tail_quantile, seed=seed)
+            for copula_type in ('gaussian', 'student_t')}
+    summary = pd.DataFrame([
+        {'Copula': copula_type, 'Log-likelihood': fit['log_likelihood'], 'AIC': fit['aic'], 'BIC': fit['bic'],
+         'Degrees of freedom': fit['parameters'].get('degrees_of_freedom', np.inf)}
+        for copula_type, fit in fits.items()
+    ]).sort_values(by='AIC').reset_index(drop=True)
+    return fits, summary
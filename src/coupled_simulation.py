@@ -0,0 +1,258 @@
+# src/coupled_simulation.py
+
+import heapq
+import itertools
+
+import numpy as np
+
+from .updated_simulation_model import _mean_and_standard_error
+
+# Event kinds, in the order they are handled when they fall on the same day:
+# receipts arrive at the start of the day, before a disruption can hold them up
+RECEIPT, DISRUPTION_END, DISRUPTION_START = 0, 1, 2
+
+
+class CoupledSimulator:
+    """
+    Discrete-event simulation joining the disruption process of a
+    SupplyChainSimulator to the inventory system of an InventorySimulator.
+
+    Disruptions arrive with the fitted inter-arrival times and draw their
+    profit and shipping delay from the copula. While a disruption is active
+    (for its shipping delay, rounded up to whole days):
+
+    * with ``lead_time_inflation``, orders placed take that many extra days
+      to arrive, and with ``delay_in_transit`` orders already in transit
+      when it starts are pushed back by the same amount;
+    * daily demand is scaled by ``1 + demand_surge``.
+
+    The loss of a disruption (its negative profit) is added to the
+    replication's cost, as in SupplyChainSimulator.run_simulation.
+    """
+    def __init__(self, supply_chain_sim, inventory_sim, lead_time_inflation=True, delay_in_transit=True,
+                 demand_surge=0.0):
+        self.supply_chain_sim = supply_chain_sim
+        self.inventory_sim = inventory_sim
+        self.lead_time_inflation = lead_time_inflation
+        self.delay_in_transit = delay_in_transit
+        self.demand_surge = demand_surge
+
+    def _disruption_schedule(self, num_replications, sim_period_days):
+        """
+        Draws the disruption times of every replication and one copula draw
+        of (profit, shipping delay) per disruption. Returns a list with one
+        (times, profits, delays) tuple per replication.
+        """
+        sim = self.supply_chain_sim
+        buffer_size = sim._inter_arrival_buffer_size(sim_period_days)
+
+        def draw_times(num_rows, elapsed):
+            gaps = sim._generate_marginal_samples('inter_arrival_time', num_rows * buffer_size)
+            return elapsed[:, None] + np.cumsum(gaps.reshape(num_rows, buffer_size), axis=1)
+
+        times = draw_times(num_replications, np.zeros(num_replications))
+        rows = [list(row[row < sim_period_days]) for row in times]
+
+        # Replications whose buffer ended inside the period need more arrivals
+        elapsed = times[:, -1]
+        open_rows = np.flatnonzero(elapsed < sim_period_days)
+        while open_rows.size:
+            times = draw_times(open_rows.size, elapsed[open_rows])
+            for row, extra in zip(open_rows, times):
+                rows[row].extend(extra[extra < sim_period_days])
+            elapsed[open_rows] = times[:, -1]
+            open_rows = open_rows[times[:, -1] < sim_period_days]
+
+        counts = np.array([len(row) for row in rows])
+        if counts.sum():
+            profits, delays = sim._generate_event_samples(int(counts.sum()))
+        else:
+            profits, delays = np.zeros(0), np.zeros(0)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        return [
+            (np.array(rows[i]), profits[offsets[i]:offsets[i + 1]], delays[offsets[i]:offsets[i + 1]])
+            for i in range(num_replications)
+        ]
+
+    def _simulate_replication(self, policy, policy_params, raw_demand, lead_times, disruptions,
+                              initial_inventory):
+        """
+        Runs one replication as a discrete-event simulation.
+
+        The heap holds order receipts and disruption starts and ends. Between
+        events inventory only falls with demand, so the next reorder day is
+        found from the cumulative demand and the days in between are costed
+        in one vectorized step instead of being ticked one by one. Event days
+        follow the same order as InventorySimulator: receipts, holding and
+        shortage cost, demand, then the policy decision.
+        """
+        inv = self.inventory_sim
+        horizon = len(raw_demand)
+        demand = np.maximum(0, np.trunc(raw_demand))
+        cumulative = np.concatenate([[0.0], np.cumsum(demand)])
+        surged = np.zeros(horizon, dtype=bool)
+
+        queue, sequence = [], itertools.count()
+        times, profits, delays = disruptions
+        for t, delay in zip(times, delays):
+            start, length = int(t), int(np.ceil(delay))
+            if length:
+                heapq.heappush(queue, (start, DISRUPTION_START, next(sequence), length))
+                heapq.heappush(queue, (start + length, DISRUPTION_END, next(sequence), length))
+
+        # Outstanding orders: id -> (arrival day, quantity); stale heap entries are skipped
+        in_transit = {}
+        active_delays = []
+
+        def schedule_receipt(order_id, arrival, quantity):
+            # Orders due on or after the last day never arrive, as in InventorySimulator
+            if arrival < horizon:
+                in_transit[order_id] = (arrival, quantity)
+                heapq.heappush(queue, (arrival, RECEIPT, next(sequence), order_id))
+            else:
+                in_transit.pop(order_id, None)
+
+        level, pipeline_total = float(initial_inventory), 0.0
+        holding = shortage = ordering = 0.0
+        orders_placed, day = 0, 0
+
+        def next_review(start_day):
+            """
+            First day from ``start_day`` whose end-of-day position triggers an
+            order, scanning windows that double in length.
+            """
+            position = level + pipeline_total
+            window = 8
+            while start_day < horizon:
+                stop = min(start_day + window, horizon)
+                positions = position - (cumulative[start_day + 1:stop + 1] - cumulative[day])
+                triggered = np.flatnonzero(inv._order_quantities(policy, policy_params, positions) > 0)
+                if triggered.size:
+                    return start_day + int(triggered[0])
+                start_day, window = stop, window * 2
+            return horizon
+
+        review_day = next_review(0)
+        while day < horizon:
+            event_day = min(queue[0][0] if queue else horizon, review_day)
+
+            # Idle days: no receipts, disruptions or orders, so cost them in bulk
+            if event_day > day:
+                stop = min(event_day, horizon)
+                levels = level - (cumulative[day:stop] - cumulative[day])
+                holding += np.sum(np.maximum(levels, 0)) * inv.holding_cost
+                shortage += np.sum(np.maximum(-levels, 0)) * inv.shortage_cost
+                level -= cumulative[stop] - cumulative[day]
+                day = stop
+                if day >= horizon:
+                    break
+
+            # Receipts move stock from the pipeline to the shelf without changing the
+            # position, so only a demand surge can trigger an order before review_day
+            surged_today = False
+            while queue and queue[0][0] == day:
+                _, kind, _, payload = heapq.heappop(queue)
+                if kind == RECEIPT:
+                    if payload not in in_transit or in_transit[payload][0] != day:
+                        continue
+                    _, quantity = in_transit.pop(payload)
+                    level += quantity
+                    pipeline_total -= quantity
+                elif kind == DISRUPTION_END:
+                    active_delays.remove(payload)
+                else:
+                    active_delays.append(payload)
+                    if self.delay_in_transit:
+                        for order_id, (arrival, quantity) in list(in_transit.items()):
+                            schedule_receipt(order_id, arrival + payload, quantity)
+                    if self.demand_surge:
+                        stop = min(day + payload, horizon)
+                        fresh = day + np.flatnonzero(~surged[day:stop])
+                        surged[fresh] = True
+                        demand[fresh] = np.maximum(0, np.trunc(raw_demand[fresh] * (1 + self.demand_surge)))
+                        cumulative[day + 1:] = cumulative[day] + np.cumsum(demand[day:])
+                        surged_today = True
+
+            # The event day itself is ticked like a day of InventorySimulator
+            holding += max(level, 0) * inv.holding_cost
+            shortage += max(-level, 0) * inv.shortage_cost
+            level -= demand[day]
+            quantity = 0.0
+            if day == review_day or surged_today:
+                quantity = float(inv._order_quantities(policy, policy_params, np.array([level + pipeline_total]))[0])
+            if quantity > 0:
+                ordering += inv.order_cost
+                pipeline_total += quantity
+                lead_time = lead_times[day]
+                if self.lead_time_inflation and active_delays:
+                    lead_time += max(active_delays)
+                schedule_receipt(orders_placed, day + lead_time, quantity)
+                orders_placed += 1
+            day += 1
+            review_day = next_review(day)
+
+        losses = np.where(profits < 0, -profits, 0)
+        return {
+            'inventory_cost': holding + shortage + ordering,
+            'holding_cost': holding,
+            'shortage_cost': shortage,
+            'ordering_cost': ordering,
+            'orders_placed': orders_placed,
+            'num_disruptions': len(times),
+            'disruption_cost': float(np.sum(losses)),
+            'average_delay': float(np.mean(delays)) if len(delays) else 0.0,
+        }
+
+    def run(self, policy, policy_params, num_replications, sim_period_days=365, initial_inventory=100,
+            streams=None):
+        """
+        Simulates ``num_replications`` coupled replications of a policy.
+
+        ``streams`` (from InventorySimulator.draw_common_streams) replays the
+        demand and lead-time draws, e.g. to compare policies on common random
+        numbers. Returns averages with standard errors and the
+        per-replication arrays, including a supply chain risk index computed
+        as in SupplyChainSimulator.run_simulation but on the joint cost.
+        """
+        if streams is None:
+            streams = self.inventory_sim.draw_common_streams(num_replications, sim_period_days)
+        if streams['demand'].shape[1] < sim_period_days:
+            raise ValueError("Common random number streams are shorter than the simulation period.")
+        disruptions = self._disruption_schedule(num_replications, sim_period_days)
+
+        replications = []
+        for i in range(num_replications):
+            row = i % streams['demand'].shape[0]
+            lead_times = np.maximum(1, np.trunc(streams['lead_time'][row, :sim_period_days]))
+            lead_times = np.minimum(lead_times, sim_period_days).astype(np.int64)
+            replications.append(self._simulate_replication(
+                policy, policy_params, streams['demand'][row, :sim_period_days], lead_times,
+                disruptions[i], initial_inventory
+            ))
+
+        arrays = {key: np.array([replication[key] for replication in replications]) for key in replications[0]}
+        total_costs = arrays['inventory_cost'] + arrays['disruption_cost']
+        scri_contributions = (total_costs / 1000) + (arrays['average_delay'] * 10) + (arrays['num_disruptions'] * 5)
+        groups = np.arange(num_replications)
+
+        estimates, standard_errors = {}, {}
+        for name, values in [('avg_total_cost', total_costs),
+                             ('avg_inventory_cost', arrays['inventory_cost']),
+                             ('avg_disruption_cost', arrays['disruption_cost']),
+                             ('avg_num_disruptions', arrays['num_disruptions']),
+                             ('supply_chain_risk_index', scri_contributions)]:
+            estimates[name], standard_errors[name] = _mean_and_standard_error(values, groups)
+
+        return {
+            **estimates,
+            'simulated_total_costs': total_costs,
+            'simulated_inventory_costs': arrays['inventory_cost'],
+            'simulated_holding_costs': arrays['holding_cost'],
+            'simulated_shortage_costs': arrays['shortage_cost'],
+            'simulated_ordering_costs': arrays['ordering_cost'],
+            'simulated_disruption_costs': arrays['disruption_cost'],
+            'simulated_num_disruptions': arrays['num_disruptions'],
+            'simulated_average_delays': arrays['average_delay'],
+            'simulated_orders_placed': arrays['orders_placed'],
+            'standard_errors': standard_errors,
+        }
@@ -0,0 +1,304 @@
+# src/data_pipeline.py
+
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+ORDER_DATE = 'order date (DateOrders)'
+SHIPPING_DATE = 'shipping date (DateOrders)'
+CUSTOMER_ID = 'Order Customer Id'
+PARTITION_COLUMN = 'order_month'
+STATE_FILE = '_pipeline_state.json'
+# Customer Zipcode value counts of every cached month, before the mode fill
+ZIPCODE_COUNTS_FILE = '_zipcode_counts.parquet'
+
+# Same renames as notebook/data-cleaning.ipynb
+COLUMN_RENAMES = {
+    'Benefit per order': 'benefit_per_order',
+    'Sales per customer': 'sales_per_customer',
+    'Order Item Profit Ratio': 'order_item_profit_ratio',
+    'Order Profit Per Order': 'order_profit_per_order',
+    'Sales': 'sales_total',
+    'Order Item Total': 'order_item_total_price',
+    'Order Item Discount': 'order_item_discount',
+    'Order Item Discount Rate': 'order_item_discount_rate',
+    'Order Item Quantity': 'order_item_quantity',
+    'Order Item Product Price': 'order_item_product_price'
+}
+
+# Columns whose type pyarrow could infer differently from one block to the next
+COLUMN_TYPES = {
+    ORDER_DATE: pa.string(),
+    SHIPPING_DATE: pa.string(),
+    'Customer Lname': pa.string(),
+    'Customer Zipcode': pa.float64(),
+    'Order Zipcode': pa.float64(),
+    'Product Description': pa.string(),
+}
+
+
+def clean_chunk(df):
+    """
+    Row-level cleaning of one chunk of the raw DataCo CSV.
+
+    Applies the notebook steps that need no other rows: missing-value fills
+    (except the Customer Zipcode mode), date parsing, the delivery duration
+    and shipping delay features and the column renames. Adds the
+    ``order_month`` partition key.
+    """
+    df = df.copy()
+    df['Customer Lname'] = df['Customer Lname'].fillna('Unknown')
+    df['Order Zipcode'] = df['Order Zipcode'].fillna(0)
+    df = df.drop(columns=['Product Description'], errors='ignore')
+
+    df[ORDER_DATE] = pd.to_datetime(df[ORDER_DATE], format='%m/%d/%Y %H:%M', errors='coerce')
+    df[SHIPPING_DATE] = pd.to_datetime(df[SHIPPING_DATE], format='%m/%d/%Y %H:%M', errors='coerce')
+    df = df.dropna(subset=[ORDER_DATE, SHIPPING_DATE])
+
+    df['delivery_duration_actual'] = (df[SHIPPING_DATE] - df[ORDER_DATE]).dt.days
+    df['delivery_duration_scheduled'] = df['Days for shipment (scheduled)']
+    df['shipping_delay_days'] = df['delivery_duration_actual'] - df['delivery_duration_scheduled']
+
+    df = df.rename(columns=COLUMN_RENAMES)
+    df[PARTITION_COLUMN] = df[ORDER_DATE].dt.strftime('%Y-%m')
+    return df
+
+
+def _iter_csv_chunks(csv_path, block_size, columns=None):
+    """Streams the CSV (or only ``columns`` of it) as pandas chunks of roughly ``block_size`` bytes."""
+    reader = pv.open_csv(
+        csv_path,
+        read_options=pv.ReadOptions(encoding='latin-1', block_size=block_size),
+        convert_options=pv.ConvertOptions(column_types=COLUMN_TYPES, include_columns=columns),
+    )
+    for batch in reader:
+        yield batch.to_pandas()
+
+
+def _partition_dir(root, month):
+    return os.path.join(root, f"{PARTITION_COLUMN}={month}")
+
+
+def cached_months(cache_dir):
+    """Months already present in the Parquet cache, in chronological order."""
+    if not os.path.isdir(cache_dir):
+        return []
+    prefix = f"{PARTITION_COLUMN}="
+    return sorted(name[len(prefix):] for name in os.listdir(cache_dir) if name.startswith(prefix))
+
+
+def _raw_months(chunk):
+    """Order month of each raw row, read straight from its 'm/d/Y H:M' date string."""
+    parts = chunk[ORDER_DATE].str.extract(r'^(\d{1,2})/\d{1,2}/(\d{4})')
+    return parts[1] + '-' + parts[0].str.zfill(2)
+
+
+def _scan_months(csv_path, block_size):
+    """
+    Raw row count and latest order date of every month in the CSV, from
+    the order date column alone. Compared with the counts recorded at the
+    last build, they show which cached months have gained or lost orders.
+    """
+    rows, last_orders = pd.Series(dtype=np.int64), pd.Series(dtype='datetime64[ns]')
+    for chunk in _iter_csv_chunks(csv_path, block_size, columns=[ORDER_DATE]):
+        months = _raw_months(chunk)
+        dates = pd.to_datetime(chunk[ORDER_DATE], format='%m/%d/%Y %H:%M', errors='coerce')
+        rows = rows.add(months.value_counts(), fill_value=0)
+        last_orders = pd.concat([last_orders, dates.groupby(months).max()]).groupby(level=0).max()
+    return {
+        month: {'rows': int(rows[month]), 'last_order': str(last_orders.get(month))}
+        for month in rows.index
+    }
+
+
+def _load_state(cache_dir):
+    path = os.path.join(cache_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _stage_csv(csv_path, staging_dir, keep_month, block_size):
+    """
+    Streams the CSV once and writes the cleaned rows of the months accepted
+    by ``keep_month`` into per-month staging files. Rows of other months are
+    dropped before cleaning, so an incremental run only cleans new orders.
+
+    Returns the Customer Zipcode value counts of each staged month, for the
+    mode fill that the notebook applies over the whole data set.
+    """
+    zipcode_counts = {}
+    for chunk_index, chunk in enumerate(_iter_csv_chunks(csv_path, block_size)):
+        months = _raw_months(chunk)
+        chunk = chunk[months.isin([month for month in months.dropna().unique() if keep_month(month)])]
+        if chunk.empty:
+            continue
+        chunk = clean_chunk(chunk)
+
+        for month, rows in chunk.groupby(PARTITION_COLUMN):
+            if not keep_month(month):
+                continue
+            zipcode_counts[month] = zipcode_counts.get(month, pd.Series(dtype=np.int64)).add(
+                rows['Customer Zipcode'].value_counts(), fill_value=0
+            )
+            os.makedirs(_partition_dir(staging_dir, month), exist_ok=True)
+            rows.drop(columns=[PARTITION_COLUMN]).to_parquet(
+                os.path.join(_partition_dir(staging_dir, month), f"part-{chunk_index:05d}.parquet"), index=False
+            )
+    return zipcode_counts
+
+
+def _load_zipcode_counts(cache_dir):
+    """Per-month Customer Zipcode value counts stored with the cache."""
+    path = os.path.join(cache_dir, ZIPCODE_COUNTS_FILE)
+    if not os.path.exists(path):
+        return {}
+    table = pd.read_parquet(path)
+    return {month: rows.set_index('zipcode')['count'] for month, rows in table.groupby('month')}
+
+
+def _save_zipcode_counts(cache_dir, zipcode_counts):
+    frames = [pd.DataFrame({'month': month, 'zipcode': counts.index, 'count': counts.to_numpy()})
+              for month, counts in sorted(zipcode_counts.items())]
+    table = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['month', 'zipcode', 'count'])
+    table.to_parquet(os.path.join(cache_dir, ZIPCODE_COUNTS_FILE), index=False)
+
+
+def _zipcode_mode(zipcode_counts, months):
+    """Most common Customer Zipcode over the given months (the smallest one on ties)."""
+    counts = pd.Series(dtype=np.int64)
+    for month in months:
+        counts = counts.add(zipcode_counts[month], fill_value=0)
+    return counts.sort_index().idxmax() if len(counts) else 0
+
+
+def _merge_last_dates(last_dates, rows):
+    """Updates each customer's latest order date with a new batch of orders."""
+    month_last = rows.groupby(CUSTOMER_ID)[ORDER_DATE].max()
+    return pd.concat([last_dates, month_last]).groupby(level=0).max()
+
+
+def _last_order_dates(cache_dir, months):
+    """Each customer's latest order date over the given cached months."""
+    last_dates = pd.Series(dtype='datetime64[ns]')
+    for month in months:
+        table = pq.read_table(_partition_dir(cache_dir, month), columns=[CUSTOMER_ID, ORDER_DATE])
+        last_dates = _merge_last_dates(last_dates, table.to_pandas())
+    return last_dates
+
+
+def _derive_month(rows, last_dates, zipcode_mode):
+    """
+    Finishes one month of staged rows: fills the Customer Zipcode mode and
+    computes the per-customer inter-arrival time, continuing from each
+    customer's last order in earlier months.
+    """
+    rows = rows.copy()
+    rows['Customer Zipcode'] = rows['Customer Zipcode'].fillna(zipcode_mode)
+    rows = rows.sort_values(by=[CUSTOMER_ID, ORDER_DATE], kind='mergesort')
+
+    previous = rows.groupby(CUSTOMER_ID)[ORDER_DATE].shift()
+    first_in_month = previous.isna()
+    previous[first_in_month] = last_dates.reindex(rows.loc[first_in_month, CUSTOMER_ID]).to_numpy()
+    inter_arrival = (rows[ORDER_DATE] - previous).dt.days
+    rows['inter_arrival_time'] = inter_arrival.fillna(0).clip(lower=0)
+    return rows
+
+
+def build_cache(csv_path, cache_dir, block_size=64 << 20, rebuild=False):
+    """
+    Cleans the DataCo CSV into a Parquet cache partitioned by order month.
+
+    The CSV is streamed in chunks of about ``block_size`` bytes. The raw row
+    count and latest order date of every cached month are recorded in the
+    state file, so rerunning on a grown order history only cleans and
+    derives the new months, the cached months whose orders changed and the
+    latest cached month, which is always restaged since new orders usually
+    land in it. Cached months after the earliest restaged one are rebuilt
+    too, since their inter-arrival times depend on it. The zipcode value
+    counts of every cached month are stored with the cache, so the mode
+    fill matches a full rebuild; if the new orders change the mode, the
+    cached months are refilled as well.
+    Memory stays bounded by one month of orders plus each customer's last
+    order date. Returns the months written.
+    """
+    if rebuild and os.path.isdir(cache_dir):
+        shutil.rmtree(cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    staging_dir = os.path.join(cache_dir, '_staging')
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+    existing = set(cached_months(cache_dir))
+    zipcode_counts = _load_zipcode_counts(cache_dir)
+    recorded = _load_state(cache_dir).get('month_stats', {})
+    if not existing <= set(zipcode_counts) or not existing <= set(recorded):
+        # Cached before the zipcode counts and month stats were stored: start over
+        for month in existing:
+            shutil.rmtree(_partition_dir(cache_dir, month))
+        existing, zipcode_counts = set(), {}
+    cached_mode = _zipcode_mode(zipcode_counts, existing)
+
+    month_stats = _scan_months(csv_path, block_size)
+    restaged = {month for month in existing if recorded[month] != month_stats.get(month)}
+    restaged |= {max(existing)} if existing else set()
+    for month in restaged:
+        shutil.rmtree(_partition_dir(cache_dir, month))
+        zipcode_counts.pop(month)
+    existing -= restaged
+
+    zipcode_counts.update(_stage_csv(csv_path, staging_dir, lambda month: month not in existing, block_size))
+    new_months = cached_months(staging_dir)
+    if not new_months and not restaged:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        return []
+
+    # Cached months after the earliest staged (or vanished) month need their
+    # inter-arrival times redone, and all of them need refilling if the mode changed
+    first_changed = min([*new_months, *restaged])
+    zipcode_mode = _zipcode_mode(zipcode_counts, existing | set(new_months))
+    stale = sorted(month for month in existing if month > first_changed or zipcode_mode != cached_mode)
+    if stale:
+        for month in stale:
+            shutil.rmtree(_partition_dir(cache_dir, month))
+        zipcode_counts.update(_stage_csv(csv_path, staging_dir, lambda month: month in stale, block_size))
+        new_months = cached_months(staging_dir)
+
+    last_dates = _last_order_dates(cache_dir, [month for month in cached_months(cache_dir) if month < first_changed])
+
+    for month in new_months:
+        rows = _derive_month(pd.read_parquet(_partition_dir(staging_dir, month)), last_dates, zipcode_mode)
+        os.makedirs(_partition_dir(cache_dir, month), exist_ok=True)
+        rows.to_parquet(os.path.join(_partition_dir(cache_dir, month), 'part-0.parquet'), index=False)
+        last_dates = _merge_last_dates(last_dates, rows)
+
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    _save_zipcode_counts(cache_dir, zipcode_counts)
+    with open(os.path.join(cache_dir, STATE_FILE), 'w') as f:
+        json.dump({'source': os.path.abspath(csv_path), 'customer_zipcode_mode': float(zipcode_mode),
+                   'months': cached_months(cache_dir),
+                   'month_stats': {month: month_stats[month] for month in cached_months(cache_dir)}}, f)
+    return new_months
+
+
+def load_cache(cache_dir, columns=None, months=None):
+    """
+    Reads the cleaned data back from the Parquet cache, optionally only some
+    columns and months.
+    """
+    months = months if months is not None else cached_months(cache_dir)
+    frames = [pd.read_parquet(_partition_dir(cache_dir, month), columns=columns) for month in months]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+
+if __name__ == '__main__':
+    # Usage: python src/data_pipeline.py <DataCoSupplyChainDataset.csv> <cache_dir>
+    written = build_cache(sys.argv[1], sys.argv[2])
+    print(f"Wrote {len(written)} month partitions to {sys.argv[2]}")
@@ -0,0 +1,259 @@
+# src/distribution_fitting.py
+
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import optimize, special, stats
+
+from .updated_simulation_model import DIST_MAP, REQUIRED_MARGINALS, validate_parameters
+
+CANDIDATE_DISTRIBUTIONS = ('expon', 'weibull_min', 'lognorm', 'pareto')
+
+# Locations are written as x_min - std * exp(t); bounding t keeps every fit's
+# support just below the data instead of drifting off to loc=-4294967295.
+LOC_OFFSET_BOUNDS = (np.log(1e-6), np.log(1e3))
+WEIBULL_LOG_SHAPE_BOUNDS = (np.log(0.05), np.log(50.0))
+
+# Above this many points the KS p-value uses the asymptotic Kolmogorov distribution
+KS_EXACT_MAX_SIZE = 10_000
+
+# =============================================================================
+# Data Preparation
+# =============================================================================
+def prepare_variables(df, variables=REQUIRED_MARGINALS):
+    """
+    Pulls the variables to fit out of the cleaned data as sorted float arrays.
+
+    Zero inter-arrival times mark a customer's first order rather than an
+    actual interval, so they are left out as in the fitting notebook.
+    """
+    datasets = {}
+    for var_name in variables:
+        values = pd.to_numeric(df[var_name], errors='coerce').to_numpy(dtype=float)
+        values = values[np.isfinite(values)]
+        if var_name == 'inter_arrival_time':
+            values = values[values > 0]
+        if values.size < 2 or np.ptp(values) == 0:
+            raise ValueError(f"Not enough distinct values to fit '{var_name}'.")
+        datasets[var_name] = np.sort(values)
+    return datasets
+
+def stratified_subsample(sorted_data, size, num_strata=20, rng=None):
+    """
+    Draws about ``size`` points from sorted data, the same share from each of
+    ``num_strata`` equal-count quantile bins, always keeping the minimum and
+    maximum so the tails and support are represented.
+    """
+    if size >= sorted_data.size:
+        return sorted_data
+    rng = np.random.default_rng(rng)
+    edges = np.linspace(0, sorted_data.size, num_strata + 1).astype(int)
+    per_stratum = max(1, size // num_strata)
+    picks = [rng.integers(lo, hi, per_stratum) for lo, hi in zip(edges[:-1], edges[1:]) if hi > lo]
+    picks.append([0, sorted_data.size - 1])
+    return sorted_data[np.sort(np.concatenate(picks))]
+
+# =============================================================================
+# Profile Likelihoods
+# =============================================================================
+# Each family is fit over a small vector theta; the remaining parameters
+# have closed-form maximum-likelihood values given theta. ``_unpack`` turns
+# theta into scipy's (shapes..., loc, scale) and the log-likelihood.
+def _shifted(data, t):
+    x_min, spread = data[0], np.std(data)
+    loc = x_min - spread * np.exp(t)
+    return loc, data - loc
+
+def _unpack(dist_name, theta, data):
+    """Scipy parameters and log-likelihood for ``theta`` on sorted ``data``."""
+    n = data.size
+    if dist_name == 'expon':
+        loc = data[0]
+        scale = max(np.mean(data) - loc, np.finfo(float).tiny)
+        return (loc, scale), -n * np.log(scale) - n
+
+    loc, shifted = _shifted(data, theta[0])
+    log_shifted = np.log(shifted)
+    if dist_name == 'lognorm':
+        mu, s = np.mean(log_shifted), np.std(log_shifted)
+        loglik = -np.sum(log_shifted) - n * np.log(s) - 0.5 * n * np.log(2 * np.pi) - 0.5 * n
+        return (s, loc, np.exp(mu)), loglik
+    if dist_name == 'pareto':
+        log_scale = log_shifted[0]
+        b = n / max(np.sum(log_shifted - log_scale), np.finfo(float).tiny)
+        loglik = n * np.log(b) + n * b * log_scale - (b + 1) * np.sum(log_shifted)
+        # The support starts at loc + scale; rounding can put that just above
+        # the smallest point, whose density would then be zero
+        scale = np.exp(log_scale)
+        while loc + scale > data[0]:
+            scale = np.nextafter(scale, 0)
+        return (b, loc, scale), loglik
+    if dist_name == 'weibull_min':
+        c = np.exp(theta[1])
+        # scale^c = mean(y^c), computed in log space to avoid overflow
+        log_scale = (special.logsumexp(c * log_shifted) - np.log(n)) / c
+        loglik = n * np.log(c) - n * c * log_scale + (c - 1) * np.sum(log_shifted) - n
+        return (c, loc, np.exp(log_scale)), loglik
+    raise ValueError(f"Unsupported distribution: {dist_name}")
+
+def _moment_start(dist_name, data):
+    """Method-of-moments starting point for ``theta``."""
+    mean, std = np.mean(data), np.std(data)
+    if dist_name == 'expon':
+        return np.array([])
+    if dist_name == 'lognorm':
+        # Three-parameter lognormal moments: skewness gives sigma, then loc
+        skew = max(stats.skew(data), 1e-3)
+        root = np.cbrt(np.sqrt(skew ** 2 + 4) / 2 + skew / 2)
+        w = root ** 2 + root ** -2 - 1
+        scale = std / np.sqrt(w * (w - 1))
+        loc = mean - scale * np.sqrt(w)
+        offset = max(data[0] - loc, 1e-6 * std)
+        return np.array([np.log(offset / std)])
+    if dist_name == 'pareto':
+        return np.array([0.0])
+    if dist_name == 'weibull_min':
+        # Shape from the coefficient of variation just above the minimum
+        t = np.log(0.01)
+        shifted_mean = mean - (data[0] - std * np.exp(t))
+        c = np.clip((std / shifted_mean) ** -1.086, 0.05, 50.0)
+        return np.array([t, np.log(c)])
+    raise ValueError(f"Unsupported distribution: {dist_name}")
+
+def _theta_bounds(dist_name):
+    if dist_name == 'weibull_min':
+        return [LOC_OFFSET_BOUNDS, WEIBULL_LOG_SHAPE_BOUNDS]
+    return [LOC_OFFSET_BOUNDS]
+
+def _maximize(dist_name, data, theta0):
+    """Maximizes the profile log-likelihood from ``theta0``."""
+    if theta0.size == 0:
+        return theta0
+    bounds = _theta_bounds(dist_name)
+    theta0 = np.clip(theta0, [lo for lo, _ in bounds], [hi for _, hi in bounds])
+    result = optimize.minimize(
+        lambda theta: -_unpack(dist_name, theta, data)[1] / data.size,
+        theta0, method='L-BFGS-B', bounds=bounds
+    )
+    return result.x
+
+# =============================================================================
+# Goodness of Fit
+# =============================================================================
+def goodness_of_fit(dist_name, params, sorted_data):
+    """
+    Log-likelihood, AIC, BIC and the Kolmogorov-Smirnov statistic and p-value
+    of a fitted distribution, from one vectorized logpdf and cdf pass over the
+    sorted data.
+    """
+    frozen = DIST_MAP[dist_name](*params)
+    n = sorted_data.size
+    loglik = np.sum(frozen.logpdf(sorted_data))
+    cdf = frozen.cdf(sorted_data)
+    ranks = np.arange(1, n + 1)
+    ks_stat = max(np.max(ranks / n - cdf), np.max(cdf - (ranks - 1) / n))
+    k = len(params)
+    return {
+        'Log-likelihood': loglik,
+        'AIC': 2 * k - 2 * loglik,
+        'BIC': k * np.log(n) - 2 * loglik,
+        'KS statistic': ks_stat,
+        'KS p-value': stats.kstwo.sf(ks_stat, n) if n <= KS_EXACT_MAX_SIZE else stats.kstwobign.sf(ks_stat * np.sqrt(n)),
+    }
+
+def fit_distribution(dist_name, sorted_data, subsample_size=None, rng=None):
+    """
+    Fits one candidate family to sorted data.
+
+    MLE starts from method-of-moments estimates. With ``subsample_size`` it
+    runs on a stratified subsample first and then polishes the result on the
+    full data, which only takes a few iterations from that start.
+    """
+    theta = _moment_start(dist_name, sorted_data)
+    if subsample_size is not None and subsample_size < sorted_data.size:
+        theta = _maximize(dist_name, stratified_subsample(sorted_data, subsample_size, rng=rng), theta)
+    theta = _maximize(dist_name, sorted_data, theta)
+    params, _ = _unpack(dist_name, theta, sorted_data)
+    params = tuple(float(value) for value in params)
+    return {'Distribution': dist_name, 'Parameters': params, **goodness_of_fit(dist_name, params, sorted_data)}
+
+# =============================================================================
+# Parallel Fitting
+# =============================================================================
+_worker_datasets = None
+
+def _init_fit_worker(datasets):
+    """Pool initializer: ships the prepared data to each worker process once."""
+    global _worker_datasets
+    _worker_datasets = datasets
+
+def _run_fit(task):
+    var_name, dist_name, subsample_size, seed = task
+    result = fit_distribution(dist_name, _worker_datasets[var_name], subsample_size, seed)
+    return {'Variable': var_name, **result}
+
+def fit_all(datasets, distributions=CANDIDATE_DISTRIBUTIONS, workers=None, subsample_size=None, seed=None):
+    """
+    Fits every candidate family to every variable.
+
+    ``datasets`` maps variable names to arrays (see ``prepare_variables``).
+    With ``workers`` the (variable, family) fits run concurrently on a
+    process pool. Returns one row per fit, best AIC first within each
+    variable.
+    """
+    datasets = {var_name: np.sort(np.asarray(values, dtype=float)) for var_name, values in datasets.items()}
+    seeds = np.random.SeedSequence(seed).spawn(len(datasets) * len(distributions))
+    tasks = [
+        (var_name, dist_name, subsample_size, seeds[i * len(distributions) + j])
+        for i, var_name in enumerate(datasets) for j, dist_name in enumerate(distributions)
+    ]
+    if workers:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_fit_worker, initargs=(datasets,)) as executor:
+            rows = list(executor.map(_run_fit, tasks))
+    else:
+        _init_fit_worker(datasets)
+        rows = [_run_fit(task) for task in tasks]
+    return pd.DataFrame(rows).sort_values(by=['Variable', 'AIC'], kind='mergesort').reset_index(drop=True)
+
+# =============================================================================
+# Fitted Parameter JSON
+# =============================================================================
+def build_fitted_parameters(fit_results, criterion='AIC', copula=None):
+    """
+    Picks the best family per variable by ``criterion`` and returns the dict
+    ``SupplyChainSimulator`` loads, with an optional copula section.
+    """
+    best = fit_results.loc[fit_results.groupby('Variable')[criterion].idxmin()]
+    params = {
+        row['Variable']: {'distribution': row['Distribution'], 'parameters': list(row['Parameters'])}
+        for _, row in best.iterrows()
+    }
+    if copula is not None:
+        params['copula'] = copula
+    validate_parameters(params)
+    return params
+
+def write_fitted_parameters(fit_results, output_path, criterion='AIC', copula=None):
+    """Writes the best fits as a fitted-parameter JSON file and returns the dict."""
+    params = build_fitted_parameters(fit_results, criterion, copula)
+    with open(output_path, 'w') as f:
+        json.dump(params, f, indent=2)
+    return params
+
+
+if __name__ == '__main__':
+    # Usage: python -m src.distribution_fitting <parquet_cache_dir> <output.json> [params_with_copula.json]
+    from .data_pipeline import load_cache
+
+    data = load_cache(sys.argv[1], columns=list(REQUIRED_MARGINALS))
+    results = fit_all(prepare_variables(data), workers=4, subsample_size=200_000, seed=0)
+    print(results.to_string(index=False))
+
+    copula = None
+    if len(sys.argv) > 3:
+        with open(sys.argv[3], 'r') as f:
+            copula = json.load(f).get('copula')
+    write_fitted_parameters(results, sys.argv[2], copula=copula)
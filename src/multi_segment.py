@@ -0,0 +1,290 @@
+# src/multi_segment.py
+
+import json
+
+import numpy as np
+import pandas as pd
+from scipy import special
+
+from .updated_simulation_model import (CLOSED_FORM_PPFS, DIST_MAP, REQUIRED_MARGINALS, closed_form_ppf,
+                                       validate_parameters)
+
+# The copula variables drawn for every disruption event
+EVENT_VARIABLES = ('order_profit_per_order', 'shipping_delay_days')
+# Same cap as the single-portfolio inter-arrival buffer
+MAX_BUFFER_SIZE = 4096
+SEGMENT_METRICS = ('avg_total_cost_per_period', 'avg_num_disruptions_per_period',
+                   'avg_average_delay_per_disruption', 'supply_chain_risk_index')
+
+# =============================================================================
+# Segment Tables
+# =============================================================================
+def load_segment_table(filepath):
+    """
+    Loads a JSON object mapping segment names (e.g. a customer segment,
+    department, category or region) to fitted-parameter dicts in the
+    format SupplyChainSimulator reads.
+    """
+    try:
+        with open(filepath, 'r') as f:
+            table = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Segment table not found at: {filepath}")
+    except json.JSONDecodeError:
+        raise ValueError(f"Error decoding JSON from: {filepath}")
+    if not isinstance(table, dict) or not table:
+        raise ValueError("A segment table must be a non-empty JSON object of segment parameters.")
+    return table
+
+def _event_copula(params):
+    """
+    The (profit, delay) pair of a segment's copula: its correlation, the
+    degrees of freedom (infinite for a Gaussian copula) and whether profit
+    goes through the copula. Any other copula variable only changes draws
+    that events discard, so the pair's own copula gives the same events.
+    """
+    copula_info = params.get('copula')
+    if not copula_info:
+        return 0.0, np.inf, False
+    variables = copula_info['variables']
+    for var_name in EVENT_VARIABLES:
+        if var_name not in variables:
+            raise ValueError(f"Copula must include '{var_name}' to drive the disruption events.")
+    corr_matrix = copula_info['parameters']['correlation_matrix']
+    rho = corr_matrix[variables.index(EVENT_VARIABLES[0])][variables.index(EVENT_VARIABLES[1])]
+    df = copula_info['parameters']['degrees_of_freedom'] if copula_info['type'] == 'student_t' else np.inf
+    return rho, df, True
+
+class StackedMarginal:
+    """
+    One marginal variable across segments: the family, shape, loc and
+    scale of every segment as arrays, so a single call transforms draws
+    belonging to many segments.
+    """
+    def __init__(self, marginals):
+        for marginal in marginals:
+            if marginal['distribution'] not in CLOSED_FORM_PPFS:
+                raise ValueError(f"Unsupported distribution for multi-segment runs: {marginal['distribution']}")
+        self.families = sorted({marginal['distribution'] for marginal in marginals})
+        self.family = np.array([self.families.index(marginal['distribution']) for marginal in marginals])
+        self.shape = np.full(len(marginals), np.nan)
+        self.loc = np.zeros(len(marginals))
+        self.scale = np.ones(len(marginals))
+        for i, marginal in enumerate(marginals):
+            num_shapes = DIST_MAP[marginal['distribution']].numargs
+            params = marginal['parameters']
+            if num_shapes:
+                self.shape[i] = params[0]
+            if len(params) > num_shapes:
+                self.loc[i] = params[num_shapes]
+            if len(params) > num_shapes + 1:
+                self.scale[i] = params[num_shapes + 1]
+
+    def _family_args(self, index):
+        rows = np.flatnonzero(self.family == index)
+        shapes = (self.shape[rows],) if DIST_MAP[self.families[index]].numargs else ()
+        return rows, (*shapes, self.loc[rows], self.scale[rows])
+
+    def typical_values(self):
+        """Mean of every segment's marginal, or its median where the mean is not finite."""
+        values = np.empty(len(self.family))
+        for index, dist_name in enumerate(self.families):
+            rows, args = self._family_args(index)
+            mean = DIST_MAP[dist_name].mean(*args)
+            values[rows] = np.where(np.isfinite(mean) & (mean > 0), mean, DIST_MAP[dist_name].median(*args))
+        return values
+
+    def ppf(self, u, segments):
+        """Inverse CDF of each row of ``u`` under the marginal of its segment in ``segments``."""
+        samples = np.empty_like(u)
+        expand = (slice(None),) + (None,) * (u.ndim - 1)
+        for index, dist_name in enumerate(self.families):
+            rows = np.flatnonzero(self.family[segments] == index)
+            owners = segments[rows]
+            samples[rows] = closed_form_ppf(
+                dist_name, u[rows], (self.shape[owners][expand],), self.loc[owners][expand], self.scale[owners][expand]
+            )
+        return samples
+
+# =============================================================================
+# Multi-Segment Simulator
+# =============================================================================
+class MultiSegmentSimulator:
+    """
+    Simulates the disruption process of many segments in one batched run.
+
+    Each segment has its own fitted-parameter dict. Marginal parameters are
+    stacked into per-segment arrays and the (profit, delay) copula of every
+    segment is reduced to its correlation and degrees of freedom, so paths
+    and events of all segments are drawn and transformed together instead
+    of through one SupplyChainSimulator per segment. Paths follow the same
+    model as SupplyChainSimulator.run_simulation.
+    """
+    def __init__(self, segment_params, seed=None):
+        self.segments = list(segment_params)
+        for name, params in segment_params.items():
+            try:
+                validate_parameters(params)
+            except ValueError as error:
+                raise ValueError(f"Segment '{name}': {error}")
+        self.params = segment_params
+        self.marginals = {
+            var_name: StackedMarginal([params[var_name] for params in segment_params.values()])
+            for var_name in REQUIRED_MARGINALS
+        }
+        event_copulas = []
+        for name, params in segment_params.items():
+            try:
+                event_copulas.append(_event_copula(params))
+            except ValueError as error:
+                raise ValueError(f"Segment '{name}': {error}")
+        self.rho, self.df, self.profit_clipped = (np.array(values) for values in zip(*event_copulas))
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.seed_sequence)
+
+    @classmethod
+    def from_file(cls, filepath, seed=None):
+        """Builds the simulator from a segment table file (see load_segment_table)."""
+        return cls(load_segment_table(filepath), seed=seed)
+
+    def _buffer_sizes(self, simulation_period_days):
+        """
+        Inter-arrival buffer per segment, sized as in SupplyChainSimulator
+        and rounded up to a power of two so that segments share buffers.
+        """
+        mean_gaps = self.marginals['inter_arrival_time'].typical_values()
+        if np.any(~np.isfinite(mean_gaps) | (mean_gaps <= 0)):
+            raise ValueError("'inter_arrival_time' distribution must have a positive typical gap.")
+        expected_events = simulation_period_days / mean_gaps
+        sizes = np.minimum(np.ceil(expected_events + 4 * np.sqrt(expected_events) + 4), MAX_BUFFER_SIZE).astype(int)
+        return np.array([1 << (int(size) - 1).bit_length() for size in sizes])
+
+    def _simulate_disruption_counts(self, segments, simulation_period_days, buffer_sizes):
+        """
+        Number of disruptions inside the period for paths of the given
+        segments. Paths are grouped by buffer size; those whose buffer ends
+        inside the period are topped up.
+        """
+        counts = np.zeros(len(segments), dtype=np.int64)
+        path_buffers = buffer_sizes[segments]
+        for buffer_size in np.unique(path_buffers):
+            rows = np.flatnonzero(path_buffers == buffer_size)
+            elapsed = np.zeros(rows.size)
+            open_rows = np.arange(rows.size)
+            while open_rows.size:
+                gaps = self.marginals['inter_arrival_time'].ppf(
+                    self.rng.random((open_rows.size, buffer_size)), segments[rows[open_rows]]
+                )
+                gaps[gaps < 0] = 0
+                times = elapsed[open_rows, None] + np.cumsum(gaps, axis=1)
+                counts[rows[open_rows]] += np.sum(times < simulation_period_days, axis=1)
+                elapsed[open_rows] = times[:, -1]
+                open_rows = open_rows[times[:, -1] < simulation_period_days]
+        return counts
+
+    def _generate_event_samples(self, segments):
+        """
+        Profit and shipping delay of one event per entry of ``segments``:
+        bivariate normal (or t, with a per-event chi-square mixing draw)
+        scores with each segment's correlation, mapped through its marginals.
+        Segments without a copula get a correlation of zero.
+        """
+        scores = self.rng.standard_normal((len(segments), 2))
+        rho = self.rho[segments]
+        scores[:, 1] = rho * scores[:, 0] + np.sqrt(1.0 - rho ** 2) * scores[:, 1]
+        uniforms = special.ndtr(scores)
+
+        df = self.df[segments]
+        t_rows = np.flatnonzero(np.isfinite(df))
+        if t_rows.size:
+            mixing = np.sqrt(self.rng.chisquare(df[t_rows]) / df[t_rows])
+            uniforms[t_rows] = special.stdtr(df[t_rows, None], scores[t_rows] / mixing[:, None])
+
+        profit = self.marginals['order_profit_per_order'].ppf(uniforms[:, 0], segments)
+        delay = self.marginals['shipping_delay_days'].ppf(uniforms[:, 1], segments)
+        delay[delay < 0] = 0
+        profit[self.profit_clipped[segments] & (profit < 0)] = 0
+        return profit, delay
+
+    def _simulate_paths(self, segments, simulation_period_days, buffer_sizes):
+        """Per-path disruption counts, total costs and average delays for paths of the given segments."""
+        num_paths = len(segments)
+        counts = self._simulate_disruption_counts(segments, simulation_period_days, buffer_sizes)
+        path_index = np.repeat(np.arange(num_paths), counts)
+        profit, delay = self._generate_event_samples(segments[path_index])
+
+        total_costs = np.bincount(path_index, weights=np.where(profit < 0, -profit, 0), minlength=num_paths)
+        delay_sums = np.bincount(path_index, weights=delay, minlength=num_paths)
+        average_delays = np.zeros(num_paths)
+        has_events = counts > 0
+        average_delays[has_events] = delay_sums[has_events] / counts[has_events]
+        return counts, total_costs, average_delays, delay_sums
+
+    def run_simulation(self, num_simulations, simulation_period_days=365, chunk_size=100_000,
+                       segment_weights=None, return_paths=False):
+        """
+        Simulates ``num_simulations`` paths for every segment.
+
+        Paths of all segments are processed together in chunks of
+        ``chunk_size``. Returns ``segments``, a DataFrame with each
+        segment's run_simulation averages and the standard error of its
+        supply chain risk index, and ``aggregate``: the mean SCRI across
+        segments weighted by ``segment_weights`` (equal by default) and the
+        portfolio totals per period, where replication j of every segment
+        makes up replication j of the portfolio. ``return_paths`` adds the
+        (segments, paths) arrays.
+        """
+        num_segments = len(self.segments)
+        buffer_sizes = self._buffer_sizes(simulation_period_days)
+        sums = np.zeros((len(SEGMENT_METRICS), num_segments))
+        sums_of_squares = np.zeros((len(SEGMENT_METRICS), num_segments))
+        portfolio_costs = np.zeros(num_simulations)
+        portfolio_counts = np.zeros(num_simulations)
+        portfolio_delays = np.zeros(num_simulations)
+        if return_paths:
+            paths = {name: np.empty(num_segments * num_simulations) for name in
+                     ('simulated_total_costs', 'simulated_num_disruptions', 'simulated_average_delays')}
+
+        for start in range(0, num_segments * num_simulations, chunk_size):
+            flat = np.arange(start, min(start + chunk_size, num_segments * num_simulations))
+            segments, replications = flat // num_simulations, flat % num_simulations
+            counts, total_costs, average_delays, delay_sums = self._simulate_paths(
+                segments, simulation_period_days, buffer_sizes
+            )
+            scri_contributions = (total_costs / 1000) + (average_delays * 10) + (counts * 5)
+            for i, values in enumerate((total_costs, counts, average_delays, scri_contributions)):
+                sums[i] += np.bincount(segments, weights=values, minlength=num_segments)
+                sums_of_squares[i] += np.bincount(segments, weights=values ** 2, minlength=num_segments)
+            portfolio_costs += np.bincount(replications, weights=total_costs, minlength=num_simulations)
+            portfolio_counts += np.bincount(replications, weights=counts, minlength=num_simulations)
+            portfolio_delays += np.bincount(replications, weights=delay_sums, minlength=num_simulations)
+            if return_paths:
+                paths['simulated_total_costs'][flat] = total_costs
+                paths['simulated_num_disruptions'][flat] = counts
+                paths['simulated_average_delays'][flat] = average_delays
+
+        means = sums / num_simulations
+        variances = np.maximum(sums_of_squares - num_simulations * means ** 2, 0) / max(num_simulations - 1, 1)
+        standard_errors = np.sqrt(variances / num_simulations)
+        segment_results = pd.DataFrame({'segment': self.segments, **dict(zip(SEGMENT_METRICS, means))})
+        segment_results['std_error_scri'] = standard_errors[-1]
+
+        weights = np.ones(num_segments) if segment_weights is None else np.asarray(segment_weights, dtype=float)
+        weights = weights / weights.sum()
+        portfolio_average_delays = np.divide(portfolio_delays, portfolio_counts,
+                                             out=np.zeros(num_simulations), where=portfolio_counts > 0)
+        portfolio_scri = (portfolio_costs / 1000) + (portfolio_average_delays * 10) + (portfolio_counts * 5)
+        aggregate = {
+            'supply_chain_risk_index': float(weights @ means[-1]),
+            'std_error_scri': float(np.sqrt(np.sum((weights * standard_errors[-1]) ** 2))),
+        }
+        for name, values in [('portfolio_total_cost_per_period', portfolio_costs),
+                             ('portfolio_num_disruptions_per_period', portfolio_counts),
+                             ('portfolio_supply_chain_risk_index', portfolio_scri)]:
+            aggregate[name] = float(np.mean(values))
+            aggregate[f"std_error_{name}"] = float(np.std(values, ddof=1) / np.sqrt(num_simulations))
+
+        results = {'segments': segment_results, 'aggregate': aggregate}
+        if return_paths:
+            results.update({name: array.reshape(num_segments, num_simulations) for name, array in paths.items()})
+        return results
@@ -0,0 +1,260 @@
+# src/policy_optimization.py
+
+import itertools
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from scipy.stats import qmc
+
+from .updated_simulation_model import _mean_and_standard_error
+
+# Integer search spaces of the built-in policies: parameter -> (low, high), inclusive
+DEFAULT_SPACES = {
+    'sS': {'s': (0, 100), 'S': (10, 250)},
+    'myopic': {'target_days': (1, 60)},
+}
+
+# =============================================================================
+# Search Space
+# =============================================================================
+def _feasible(policy, params):
+    return policy != 'sS' or params['S'] > params['s']
+
+def _space_grid(policy, space):
+    """Every feasible point of an integer space, as an (n, d) array."""
+    axes = [np.arange(lo, hi + 1) for lo, hi in space.values()]
+    grid = np.array(list(itertools.product(*axes)), dtype=float)
+    names = list(space)
+    keep = [_feasible(policy, dict(zip(names, point))) for point in grid]
+    return grid[keep]
+
+def _initial_design(policy, space, num_points, rng):
+    """Distinct feasible integer points from a scrambled Sobol sequence over the space."""
+    lows = np.array([lo for lo, _ in space.values()])
+    highs = np.array([hi for _, hi in space.values()])
+    points = []
+    sampler = qmc.Sobol(len(space), scramble=True, seed=rng)
+    num_bits = int(np.ceil(np.log2(max(num_points, 2))))
+    for _ in range(8):
+        for u in sampler.random_base2(num_bits):
+            point = tuple(int(v) for v in np.minimum(lows + np.floor(u * (highs - lows + 1)), highs))
+            if point not in points and _feasible(policy, dict(zip(space, point))):
+                points.append(point)
+        if len(points) >= num_points:
+            break
+    return points[:num_points]
+
+def _quadratic_features(points):
+    """Constant, linear and all second-order terms of the points, for the response surface."""
+    points = np.atleast_2d(points)
+    columns = [np.ones(len(points))] + [points[:, j] for j in range(points.shape[1])]
+    columns += [points[:, j] * points[:, k] for j in range(points.shape[1]) for k in range(j, points.shape[1])]
+    return np.column_stack(columns)
+
+def _surrogate_proposals(grid, evaluated, means, weights, num_proposals):
+    """
+    Fits a weighted quadratic response surface to the estimated costs and
+    returns the unevaluated grid points with the lowest predicted cost.
+    """
+    points = np.array(evaluated, dtype=float)
+    scale = np.maximum(np.ptp(grid, axis=0), 1.0)
+    features = _quadratic_features(points / scale)
+    if len(points) <= features.shape[1]:
+        return []
+    root_weights = np.sqrt(weights)[:, None]
+    coefficients = np.linalg.lstsq(features * root_weights, means * root_weights[:, 0], rcond=None)[0]
+    predicted = _quadratic_features(grid / scale) @ coefficients
+    seen = set(evaluated)
+    proposals = []
+    for index in np.argsort(predicted):
+        point = tuple(int(v) for v in grid[index])
+        if point not in seen:
+            proposals.append(point)
+            if len(proposals) == num_proposals:
+                break
+    return proposals
+
+def _neighbours(policy, space, point, radius):
+    """Feasible points at ``radius`` from ``point`` along each axis and diagonal."""
+    lows = [lo for lo, _ in space.values()]
+    highs = [hi for _, hi in space.values()]
+    points = []
+    for steps in itertools.product((-radius, 0, radius), repeat=len(point)):
+        candidate = tuple(int(np.clip(v + step, lo, hi)) for v, step, lo, hi in zip(point, steps, lows, highs))
+        if candidate != point and candidate not in points and _feasible(policy, dict(zip(space, candidate))):
+            points.append(candidate)
+    return points
+
+# =============================================================================
+# Optimizer
+# =============================================================================
+class PolicyOptimizer:
+    """
+    Simulation-optimization over the integer parameters of an inventory
+    policy, on top of an InventorySimulator.
+
+    Every candidate is simulated on the same demand and lead-time streams
+    (common random numbers), replication i always on stream row i, so a
+    candidate's costs can be extended to more rows without resimulating
+    the ones it already has and cost differences between candidates are
+    paired.
+
+    The search is successive halving: the candidates of a round run on the
+    first ``n`` rows, the best ``1 / eta`` of them go on to ``eta * n`` rows.
+    Between rounds a quadratic response surface fitted to the estimates and
+    the neighbours of the incumbent propose new candidates, which catch up
+    on the rows run so far. At the full budget a local search moves to
+    better neighbours of the incumbent with a shrinking radius, and the
+    remaining candidates are screened against the best by their paired
+    differences.
+    """
+    def __init__(self, simulator, policy='sS', space=None, sim_period_days=365, confidence=0.95,
+                 points_per_batch=64, seed=None):
+        if policy not in DEFAULT_SPACES:
+            raise ValueError(f"Unsupported policy: {policy}")
+        self.simulator = simulator
+        self.policy = policy
+        self.space = dict(space or DEFAULT_SPACES[policy])
+        self.sim_period_days = sim_period_days
+        self.z = stats.norm.ppf(0.5 + 0.5 * confidence)
+        self.points_per_batch = points_per_batch
+        self.rng = np.random.default_rng(seed)
+        self.streams = None
+        self.costs = {}
+        self.history = {}
+
+    def _params(self, point):
+        return dict(zip(self.space, point))
+
+    def _evaluate(self, points, num_replications):
+        """Extends the costs of every point to the first ``num_replications`` stream rows."""
+        by_start = {}
+        for point in points:
+            done = self.costs.get(point, np.zeros(0)).size
+            if done < num_replications:
+                by_start.setdefault(done, []).append(point)
+        for start, group in by_start.items():
+            streams = {key: value[start:num_replications] for key, value in self.streams.items()
+                       if key in ('demand', 'lead_time')}
+            costs = self.simulator._sweep_costs(
+                [(self.policy, self._params(point)) for point in group], streams,
+                self.sim_period_days, self.points_per_batch
+            )
+            for point, point_costs in zip(group, costs):
+                self.costs[point] = np.concatenate([self.costs.get(point, np.zeros(0)), point_costs])
+
+    def _estimate(self, point):
+        costs = self.costs[point]
+        return _mean_and_standard_error(costs, np.arange(costs.size))
+
+    def _compare(self, point, best):
+        """Paired cost difference against ``best`` on their common rows, with its standard error."""
+        num_rows = min(self.costs[point].size, self.costs[best].size)
+        difference = self.costs[point][:num_rows] - self.costs[best][:num_rows]
+        return _mean_and_standard_error(difference, np.arange(num_rows))
+
+    def optimize(self, max_replications=1_000, initial_replications=50, num_initial=24, eta=3,
+                 num_proposals=4):
+        """
+        Searches the space and returns the best parameters with the cost
+        estimate, its confidence interval and the screening table.
+
+        The result has ``best_parameters``, ``avg_total_cost``,
+        ``std_error_cost``, ``confidence_interval``; ``contenders`` (the
+        final candidates with their paired difference to the best and
+        whether it is significant); ``history`` (every candidate tried);
+        and the replications used against ``dense_grid_replications``, the
+        cost of running the whole space at ``max_replications``.
+        """
+        simulator = self.simulator
+        self.streams = simulator.draw_common_streams(max_replications, self.sim_period_days)
+        self.costs, self.history = {}, {}
+        grid = _space_grid(self.policy, self.space)
+
+        candidates = _initial_design(self.policy, self.space, num_initial, self.rng)
+        num_replications, round_number = min(initial_replications, max_replications), 0
+        radius = max(1, int(np.ptp(grid, axis=0).max() / (4 * eta)))
+        while True:
+            self._evaluate(candidates, num_replications)
+            estimates = {point: self._estimate(point) for point in candidates}
+            for point in candidates:
+                self.history[point] = {'round': round_number, 'replications': num_replications,
+                                       'estimate': estimates[point]}
+            if num_replications >= max_replications:
+                break
+
+            ranked = sorted(candidates, key=lambda point: estimates[point][0])
+            survivors = ranked[:max(2, int(np.ceil(len(ranked) / eta)))]
+
+            # New candidates from the response surface and around the incumbent
+            evaluated = list(self.history)
+            proposals = _surrogate_proposals(
+                grid, evaluated, np.array([self.history[p]['estimate'][0] for p in evaluated]),
+                np.array([self.history[p]['replications'] for p in evaluated], dtype=float), num_proposals
+            )
+            radius = max(1, radius // eta)
+            proposals += [point for point in _neighbours(self.policy, self.space, ranked[0], radius)
+                          if point not in self.history][:num_proposals]
+            candidates = list(dict.fromkeys(survivors + proposals))
+            num_replications = min(num_replications * eta, max_replications)
+            round_number += 1
+
+        # Local search at the full budget: move to a better neighbour until
+        # none is better at any radius down to one step
+        best = min(candidates, key=lambda point: estimates[point][0])
+        while True:
+            neighbours = [point for point in _neighbours(self.policy, self.space, best, radius)
+                          if point not in self.history]
+            if neighbours:
+                self._evaluate(neighbours, num_replications)
+                for point in neighbours:
+                    estimates[point] = self._estimate(point)
+                    self.history[point] = {'round': round_number, 'replications': num_replications,
+                                           'estimate': estimates[point]}
+                candidates += neighbours
+            incumbent = min(candidates, key=lambda point: estimates[point][0])
+            if incumbent != best:
+                best = incumbent
+            elif radius > 1:
+                radius = max(1, radius // 2)
+            else:
+                break
+            round_number += 1
+
+        # Screening: flag the candidates significantly worse than the best
+        contenders = []
+        for point in sorted(candidates, key=lambda point: estimates[point][0]):
+            difference, difference_error = self._compare(point, best) if point != best else (0.0, 0.0)
+            contenders.append({
+                **self._params(point),
+                'avg_total_cost': estimates[point][0],
+                'std_error_cost': estimates[point][1],
+                'diff_vs_best': difference,
+                'diff_std_error': difference_error,
+                'significantly_worse': difference - self.z * difference_error > 0,
+            })
+
+        history = pd.DataFrame([
+            {**self._params(point), 'round': entry['round'], 'replications': entry['replications'],
+             'avg_total_cost': entry['estimate'][0], 'std_error_cost': entry['estimate'][1]}
+            for point, entry in self.history.items()
+        ])
+        avg_cost, std_error = estimates[best]
+        return {
+            'policy': self.policy,
+            'best_parameters': self._params(best),
+            'avg_total_cost': avg_cost,
+            'std_error_cost': std_error,
+            'confidence_interval': (avg_cost - self.z * std_error, avg_cost + self.z * std_error),
+            'contenders': pd.DataFrame(contenders),
+            'history': history,
+            'replications_used': int(sum(costs.size for costs in self.costs.values())),
+            'dense_grid_replications': len(grid) * max_replications,
+        }
+
+def optimize_policy(simulator, policy='sS', space=None, max_replications=1_000, sim_period_days=365,
+                    confidence=0.95, seed=None, **search_options):
+    """Runs a PolicyOptimizer search; see PolicyOptimizer.optimize for the result."""
+    optimizer = PolicyOptimizer(simulator, policy, space, sim_period_days, confidence, seed=seed)
+    return optimizer.optimize(max_replications, **search_options)
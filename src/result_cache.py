@@ -0,0 +1,315 @@
+# src/result_cache.py
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .updated_simulation_model import (_check_variance_reduction, _concatenate_paths, _run_shards,
+                                       _variance_reduction_groups)
+
+# In the user's cache directory, outside the repository
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'scri', 'result_cache'
+)
+DEFAULT_MAX_BYTES = 2 << 30
+# Paths (or replications) per cached block; requests are assembled from whole blocks
+DEFAULT_BLOCK_SIZE = 10_000
+# Part of every key, so a change to the cache layout invalidates old entries
+CACHE_FORMAT_VERSION = 1
+# Modules whose code shapes cached results: the simulators, the estimators
+# and tail metrics, and this module's own assembly of blocks into summaries
+CACHED_MODULES = ('updated_simulation_model', 'risk_metrics', 'adaptive_precision', 'multi_segment', 'result_cache')
+
+REPLICATION_ARRAYS = ('total_cost', 'holding_cost', 'shortage_cost', 'ordering_cost', 'demand_total')
+
+_code_version = None
+
+# =============================================================================
+# Keys
+# =============================================================================
+def code_version():
+    """Hash of the CACHED_MODULES sources, so cached results expire when the model code changes."""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        for name in CACHED_MODULES:
+            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{name}.py"), 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        _code_version = digest.hexdigest()[:16]
+    return _code_version
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Cannot hash a value of type {type(value).__name__}")
+
+def hash_key(*parts):
+    """Content hash of JSON-serializable parts (dicts are hashed with sorted keys)."""
+    text = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=_json_default)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def _seed_identity(seed_sequence):
+    return {'entropy': seed_sequence.entropy, 'spawn_key': list(seed_sequence.spawn_key)}
+
+def _describe_distribution(dist):
+    """Name and parameters of a frozen scipy distribution."""
+    return {'distribution': dist.dist.name, 'args': list(dist.args), 'kwds': dist.kwds}
+
+def _block_sizes(num_items, block_size):
+    return [min(block_size, num_items - start) for start in range(0, num_items, block_size)]
+
+# =============================================================================
+# Result Cache
+# =============================================================================
+class ResultCache:
+    """
+    Content-addressed on-disk cache of simulation results.
+
+    Entries are keyed by a hash of the parameter model, the simulator
+    configuration, the seed and the code version, and hold a JSON summary
+    or a ``.npz`` block of per-path arrays. Reads refresh an entry's
+    modification time and writes evict the least recently used entries
+    once the cache grows past ``max_bytes``.
+
+    Runs are split into blocks of ``block_size`` paths, block k always
+    drawn from child seed k of the simulator's seed, so a request for more
+    paths than are cached reuses the stored blocks and simulates only the
+    missing ones. Results therefore depend on the block size but not on
+    the number of workers.
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+
+    def _path(self, key, suffix):
+        return os.path.join(self.cache_dir, 'objects', key[:2], key + suffix)
+
+    def _read(self, key, suffix):
+        """Opens an entry for reading and marks it as recently used, or returns None."""
+        path = self._path(key, suffix)
+        try:
+            os.utime(path)
+            return open(path, 'rb')
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key, suffix, write):
+        """Writes an entry atomically through ``write(file)``."""
+        path = self._path(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def get_summary(self, key):
+        f = self._read(key, '.json')
+        if f is None:
+            return None
+        with f:
+            return json.load(f)
+
+    def put_summary(self, key, summary):
+        text = json.dumps(summary, default=_json_default).encode('utf-8')
+        self._write(key, '.json', lambda f: f.write(text))
+
+    def get_arrays(self, key):
+        f = self._read(key, '.npz')
+        if f is None:
+            return None
+        with f, np.load(f) as data:
+            return {name: data[name] for name in data.files}
+
+    def put_arrays(self, key, arrays):
+        self._write(key, '.npz', lambda f: np.savez(f, **arrays))
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(os.path.join(self.cache_dir, 'objects')):
+            for name in files:
+                if not name.endswith('.tmp'):
+                    stat = os.stat(os.path.join(root, name))
+                    entries.append((stat.st_mtime, stat.st_size, os.path.join(root, name)))
+        return entries
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, keep=()):
+        """
+        Deletes the least recently used entries until the cache fits in
+        ``max_bytes``, sparing the entries of the keys in ``keep``.
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        keep = set(keep)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if os.path.basename(path).split('.')[0] in keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in self._entries():
+            os.remove(path)
+
+    def run_simulation(self, simulator, num_simulations, simulation_period_days=365, block_size=DEFAULT_BLOCK_SIZE,
+                       chunk_size=100_000, workers=None, return_paths=False, store_paths=True,
+                       frequency_tilt=None, variance_reduction=None, control_variates=False, qmc_replicates=8):
+        """
+        Cached SupplyChainSimulator.run_simulation.
+
+        Returns the same averages and standard errors, plus the per-path
+        arrays with ``return_paths``. With ``store_paths`` the per-path blocks
+        are kept so larger requests can top them up; without it only the
+        summary of this exact request is cached. ``cache`` in the result
+        reports whether the summary was a hit and how many blocks were
+        reused or simulated.
+        """
+        _check_variance_reduction(variance_reduction, num_simulations)
+        if variance_reduction == 'antithetic' and block_size % 2:
+            raise ValueError("Antithetic sampling needs an even block size.")
+        if frequency_tilt and control_variates:
+            raise ValueError("Control variates cannot be combined with frequency_tilt.")
+        options = (frequency_tilt, variance_reduction, qmc_replicates, control_variates)
+        config = {
+            'ppf_tables': {name: [table.lo, table.hi, len(table.values)] for name, table in simulator.ppf_tables.items()},
+            'simulation_period_days': simulation_period_days,
+            'chunk_size': chunk_size,
+            'options': options,
+        }
+        base_key = hash_key('simulation', CACHE_FORMAT_VERSION, code_version(), simulator.params, config,
+                            _seed_identity(simulator.seed_sequence))
+        request_key = hash_key(base_key, num_simulations, block_size)
+        simulator.instrumentation.reset()
+
+        if not return_paths:
+            summary = self.get_summary(request_key)
+            if summary is not None:
+                return {**summary, 'cache': {'key': request_key, 'hit': True, 'blocks_reused': 0, 'blocks_computed': 0}}
+
+        seed_sequence = simulator.seed_sequence
+        sizes = _block_sizes(num_simulations, block_size)
+        block_keys = [hash_key(base_key, k, size) for k, size in enumerate(sizes)]
+        blocks = [self.get_arrays(key) if store_paths else None for key in block_keys]
+        missing = [k for k, block in enumerate(blocks) if block is None]
+        tasks = [
+            ('_simulate_path_chunks', np.random.SeedSequence(seed_sequence.entropy, spawn_key=seed_sequence.spawn_key + (k,)),
+             (sizes[k], simulation_period_days, chunk_size, *options))
+            for k in missing
+        ]
+        with simulator.instrumentation.stage('simulation'):
+            for k, paths in zip(missing, _run_shards(simulator, tasks, workers)):
+                blocks[k] = paths
+                if store_paths:
+                    self.put_arrays(block_keys[k], paths)
+
+        for block, offset in zip(blocks, np.cumsum([0] + sizes[:-1])):
+            block['group'] = block['group'] + offset
+        results = simulator._summarize_paths(_concatenate_paths(blocks), frequency_tilt)
+        summary = {name: value for name, value in results.items() if not isinstance(value, np.ndarray)}
+        self.put_summary(request_key, summary)
+        self.evict(keep=block_keys + [request_key])
+
+        if not return_paths:
+            results = summary
+        results['cache'] = {
+            'key': request_key, 'hit': False,
+            'blocks_reused': len(sizes) - len(missing), 'blocks_computed': len(missing),
+        }
+        if simulator.instrumentation.enabled:
+            results['instrumentation'] = simulator.instrumentation.report()
+        return results
+
+    def run_experiment(self, simulator, policy_name, parameter_grid, num_simulations, sim_period_days=365,
+                       block_size=DEFAULT_BLOCK_SIZE, workers=None, store_paths=True, variance_reduction=None,
+                       control_variates=False, qmc_replicates=8):
+        """
+        Cached InventorySimulator.run_experiment.
+
+        Every grid point is cached on its own, so grids that share points
+        share results, and its replications are blocked and topped up as in
+        ``run_simulation``. ``attrs['cache']`` counts the grid points served
+        from cache and the blocks reused or simulated.
+        """
+        _check_variance_reduction(variance_reduction, num_simulations)
+        if variance_reduction == 'antithetic' and block_size % 2:
+            raise ValueError("Antithetic sampling needs an even block size.")
+        options = (100, 30, variance_reduction, qmc_replicates, True)
+        config = {
+            'demand': _describe_distribution(simulator.demand_dist),
+            'lead_time': _describe_distribution(simulator.lead_time_dist),
+            'costs': [simulator.holding_cost, simulator.shortage_cost, simulator.order_cost],
+            'sim_period_days': sim_period_days,
+            'options': options,
+        }
+        base_key = hash_key('experiment', CACHE_FORMAT_VERSION, code_version(), config,
+                            _seed_identity(simulator.seed_sequence))
+        simulator.instrumentation.reset()
+
+        seed_sequence = simulator.seed_sequence
+        sizes = _block_sizes(num_simulations, block_size)
+        groups = np.concatenate([
+            _variance_reduction_groups(size, variance_reduction, qmc_replicates) + offset
+            for size, offset in zip(sizes, np.cumsum([0] + sizes[:-1]))
+        ])
+        rows, points, tasks, keys = [None] * len(parameter_grid), {}, [], []
+        for i, params in enumerate(parameter_grid):
+            point_key = hash_key(base_key, policy_name, params)
+            summary_key = hash_key(point_key, num_simulations, block_size, control_variates)
+            keys.append(summary_key)
+            rows[i] = self.get_summary(summary_key)
+            if rows[i] is not None:
+                continue
+            block_keys = [hash_key(point_key, k, size) for k, size in enumerate(sizes)]
+            blocks = [self.get_arrays(key) if store_paths else None for key in block_keys]
+            points[i] = (summary_key, block_keys, blocks)
+            keys.extend(block_keys)
+            # Block seeds hang off the point's key, so they do not depend on its position in the grid
+            point_id = int(point_key[:8], 16)
+            for k, block in enumerate(blocks):
+                if block is None:
+                    seed = np.random.SeedSequence(seed_sequence.entropy, spawn_key=seed_sequence.spawn_key + (point_id, k))
+                    tasks.append((i, k, ('_simulate_replications', seed,
+                                         (policy_name, params, sizes[k], sim_period_days, *options))))
+
+        outputs = _run_shards(simulator, [task for _, _, task in tasks], workers)
+        for (i, k, _), output in zip(tasks, outputs):
+            _, block_keys, blocks = points[i]
+            blocks[k] = dict(zip(REPLICATION_ARRAYS, output))
+            if store_paths:
+                self.put_arrays(block_keys[k], blocks[k])
+
+        for i, (summary_key, _, blocks) in points.items():
+            point_shards = [tuple(block[name] for name in REPLICATION_ARRAYS) for block in blocks]
+            rows[i] = simulator._summarize_point(
+                policy_name, parameter_grid[i], point_shards, groups, sim_period_days, control_variates
+            )
+            self.put_summary(summary_key, rows[i])
+        self.evict(keep=keys)
+
+        results = pd.DataFrame(rows)
+        results.attrs['cache'] = {
+            'points_cached': len(parameter_grid) - len(points),
+            'blocks_reused': sum(len(blocks) for _, _, blocks in points.values()) - len(tasks),
+            'blocks_computed': len(tasks),
+        }
+        if simulator.instrumentation.enabled:
+            results.attrs['instrumentation'] = simulator.instrumentation.report()
+        return results
@@ -0,0 +1,117 @@
+# src/risk_metrics.py
+
+import numpy as np
+
+DEFAULT_LEVELS = (0.95, 0.99, 0.999)
+
+
+def _sorted_tail(losses, weights=None):
+    """
+    Sorts losses in descending order and returns them with the cumulative
+    probability mass above each one.
+
+    Each path carries mass ``weight / n`` (``1 / n`` without weights), which
+    gives the usual unbiased importance-sampling estimator of tail
+    probabilities.
+    """
+    losses = np.asarray(losses, dtype=float)
+    order = np.argsort(losses)[::-1]
+    sorted_losses = losses[order]
+    if weights is None:
+        mass = np.full(losses.size, 1.0 / losses.size)
+    else:
+        mass = np.asarray(weights, dtype=float)[order] / losses.size
+    return sorted_losses, mass, np.cumsum(mass)
+
+
+def tail_metrics(losses, levels=DEFAULT_LEVELS, weights=None):
+    """
+    Value-at-Risk and Conditional Value-at-Risk of ``losses`` at several
+    confidence levels, computed from a single sort.
+
+    Returns two dicts keyed by level: VaR and CVaR (the expected loss in the
+    worst ``1 - level`` share of outcomes).
+    """
+    sorted_losses, mass, tail_mass = _sorted_tail(losses, weights)
+    value_at_risk, conditional_value_at_risk = {}, {}
+    for level in levels:
+        target = 1.0 - level
+        index = min(np.searchsorted(tail_mass, target), sorted_losses.size - 1)
+        value_at_risk[level] = sorted_losses[index]
+        # Whole paths above the VaR plus the share of the VaR path needed to reach the target mass
+        taken = np.clip(target - (tail_mass - mass), 0, mass)
+        conditional_value_at_risk[level] = np.sum(taken * sorted_losses) / target
+    return value_at_risk, conditional_value_at_risk
+
+
+def exceedance_curve(losses, thresholds=None, weights=None, num_points=100):
+    """
+    Probability that the loss exceeds each threshold.
+
+    Thresholds default to ``num_points`` evenly spaced values between zero
+    and the largest simulated loss.
+    """
+    sorted_losses, _, tail_mass = _sorted_tail(losses, weights)
+    if thresholds is None:
+        thresholds = np.linspace(0.0, max(sorted_losses[0], 0.0), num_points)
+    thresholds = np.asarray(thresholds, dtype=float)
+    # Number of losses strictly above each threshold (losses are sorted descending)
+    num_above = np.searchsorted(-sorted_losses, -thresholds, side='left')
+    probabilities = np.where(num_above > 0, tail_mass[np.maximum(num_above - 1, 0)], 0.0)
+    return thresholds, probabilities
+
+
+def joint_tail_exceedance(costs, delays, levels=DEFAULT_LEVELS, weights=None):
+    """
+    Joint cost-delay tail exceedance at each level.
+
+    For every level, counts the paths whose cost and delay both exceed their
+    own VaR at that level. Also returns the estimated joint probability and
+    its ratio to ``1 - level``, an empirical upper tail dependence coefficient.
+    """
+    costs = np.asarray(costs, dtype=float)
+    delays = np.asarray(delays, dtype=float)
+    cost_var, _ = tail_metrics(costs, levels, weights)
+    delay_var, _ = tail_metrics(delays, levels, weights)
+
+    cost_thresholds = np.array([cost_var[level] for level in levels])
+    delay_thresholds = np.array([delay_var[level] for level in levels])
+    both = (costs[None, :] > cost_thresholds[:, None]) & (delays[None, :] > delay_thresholds[:, None])
+    path_mass = np.ones(costs.size) if weights is None else np.asarray(weights, dtype=float)
+
+    results = {}
+    for i, level in enumerate(levels):
+        probability = np.sum(path_mass[both[i]]) / costs.size
+        results[level] = {
+            'count': int(np.sum(both[i])),
+            'probability': probability,
+            'tail_dependence': probability / (1.0 - level),
+        }
+    return results
+
+
+def compute_risk_metrics(simulation_results, levels=DEFAULT_LEVELS, thresholds=None):
+    """
+    Tail-risk metrics for the output of ``SupplyChainSimulator.run_simulation``.
+
+    Importance weights in the results (``importance_weights``) are applied to
+    every estimator.
+    """
+    costs = simulation_results['simulated_total_costs']
+    weights = simulation_results.get('importance_weights')
+    value_at_risk, conditional_value_at_risk = tail_metrics(costs, levels, weights)
+    curve_thresholds, curve_probabilities = exceedance_curve(costs, thresholds, weights)
+
+    metrics = {
+        'total_cost_var': value_at_risk,
+        'total_cost_cvar': conditional_value_at_risk,
+        'total_cost_exceedance': {
+            'thresholds': curve_thresholds,
+            'probabilities': curve_probabilities,
+        },
+    }
+    if 'simulated_average_delays' in simulation_results:
+        metrics['joint_cost_delay_exceedance'] = joint_tail_exceedance(
+            costs, simulation_results['simulated_average_delays'], levels, weights
+        )
+    return metrics
@@ -3,7 +3,6 @@
 import json
 import numpy as np
 from scipy import stats
-from scipy.stats import invgamma # Required for student_t if implemented
 import pandas as pd
 
 class SupplyChainSimulator:
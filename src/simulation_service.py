@@ -0,0 +1,347 @@
+# src/simulation_service.py
+
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from .result_cache import hash_key
+from .updated_simulation_model import (DIST_MAP, InventorySimulator, SupplyChainSimulator, _concatenate_paths,
+                                       _variance_reduction_groups)
+
+DEFAULT_BATCH_SIZE = 10_000
+# Simulators kept per process, so repeated jobs on one model skip the setup
+MAX_CACHED_MODELS = 8
+
+QUEUED, RUNNING, DONE, CANCELLED, FAILED = 'queued', 'running', 'done', 'cancelled', 'failed'
+
+_worker_models = OrderedDict()
+
+# =============================================================================
+# Requests
+# =============================================================================
+def simulation_request(params, num_simulations, simulation_period_days=365, seed=0, chunk_size=100_000,
+                       frequency_tilt=None, variance_reduction=None, control_variates=False, qmc_replicates=8):
+    """
+    A SupplyChainSimulator.run_simulation job for a fitted-parameter dict.
+    Requests are plain dicts, so identical ones hash to the same job.
+    """
+    return {
+        'kind': 'simulation',
+        'params': params,
+        'num_simulations': num_simulations,
+        'simulation_period_days': simulation_period_days,
+        'seed': seed,
+        'chunk_size': chunk_size,
+        'options': [frequency_tilt, variance_reduction, qmc_replicates, control_variates],
+    }
+
+def sweep_request(demand, lead_time, scenarios, num_simulations, sim_period_days=365, seed=0, holding_cost=1.0,
+                  shortage_cost=10.0, order_cost=50.0, baseline=0, variance_reduction=None, qmc_replicates=8):
+    """
+    An InventorySimulator.run_sweep job. ``demand`` and ``lead_time`` are
+    given as in the fitted-parameter JSON, e.g.
+    ``{'distribution': 'norm', 'parameters': [5, 2]}``.
+    """
+    return {
+        'kind': 'sweep',
+        'demand': demand,
+        'lead_time': lead_time,
+        'costs': [holding_cost, shortage_cost, order_cost],
+        'scenarios': scenarios,
+        'num_simulations': num_simulations,
+        'sim_period_days': sim_period_days,
+        'seed': seed,
+        'baseline': baseline,
+        'options': [variance_reduction, qmc_replicates],
+    }
+
+def _build_model(request):
+    if request['kind'] == 'simulation':
+        return SupplyChainSimulator.from_params(request['params'])
+    if request['kind'] == 'sweep':
+        demand, lead_time = request['demand'], request['lead_time']
+        return InventorySimulator(
+            DIST_MAP[demand['distribution']](*demand['parameters']),
+            DIST_MAP[lead_time['distribution']](*lead_time['parameters']),
+            *request['costs']
+        )
+    raise ValueError(f"Unsupported job kind: {request['kind']}")
+
+def _model_for(request, model_key, models):
+    """The model of a request from an LRU dict of built models."""
+    if model_key in models:
+        models.move_to_end(model_key)
+    else:
+        models[model_key] = _build_model(request)
+        if len(models) > MAX_CACHED_MODELS:
+            models.popitem(last=False)
+    return models[model_key]
+
+def _combinations(request):
+    return [(policy, params) for policy, grid in request['scenarios'].items() for params in grid]
+
+def _run_batch(request, model_key, seed, num_items):
+    """
+    Simulates one batch of a job on its own seed stream: per-path arrays
+    for a simulation, a (combinations, replications) cost array for a sweep.
+    """
+    model = _model_for(request, model_key, _worker_models)
+    model.rng = np.random.default_rng(seed)
+    if request['kind'] == 'simulation':
+        return model._simulate_path_chunks(
+            num_items, request['simulation_period_days'], request['chunk_size'], *request['options']
+        )
+    streams = model.draw_common_streams(num_items, request['sim_period_days'], *request['options'])
+    return model._sweep_costs(_combinations(request), streams, request['sim_period_days'])
+
+# =============================================================================
+# Jobs
+# =============================================================================
+class Job:
+    """
+    A submitted request. ``updates()`` yields a partial result each time a
+    batch finishes, the last one with ``final`` set; ``await job.result()``
+    gives the final result. Partial results carry the run_simulation
+    averages (or the run_sweep table) of the batches finished so far.
+    """
+    def __init__(self, key, request, batch_sizes):
+        self.key = key
+        self.request = request
+        self.batch_sizes = batch_sizes
+        self.status = QUEUED
+        self.latest = None
+        self.error = None
+        self.subscribers = set()
+        # Callers that submitted or joined the job and have not let go of it
+        self.references = 0
+        self.task = None
+        self._version = 0
+        self._changed = asyncio.Event()
+        self._finished = asyncio.get_running_loop().create_future()
+
+    @property
+    def done(self):
+        return self.status in (DONE, CANCELLED, FAILED)
+
+    def _publish(self, partial):
+        self.latest = partial
+        self._version += 1
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _finish(self, status, error=None):
+        self.status, self.error = status, error
+        if status == DONE:
+            self._finished.set_result(self.latest)
+        elif status == FAILED:
+            self._finished.set_exception(error)
+        else:
+            self._finished.cancel()
+        self._changed.set()
+
+    async def updates(self):
+        """Partial results as batches finish; stops when the job ends, raising if it failed."""
+        seen = 0
+        while True:
+            if self._version > seen:
+                seen = self._version
+                yield self.latest
+                continue
+            if self.done:
+                if self.status == FAILED:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+    async def result(self):
+        """The final result; raises CancelledError if the job was cancelled."""
+        return await asyncio.shield(self._finished)
+
+    def cancel(self):
+        if self.task is not None and not self.done:
+            self.task.cancel()
+
+# =============================================================================
+# Service
+# =============================================================================
+class SimulationService:
+    """
+    Runs simulation and sweep jobs on a shared process pool for an
+    interactive front end such as the Streamlit risk dashboard.
+
+    Each job is split into batches of ``batch_size`` paths or replications,
+    batch k on child seed k of the job's seed, so results do not depend on
+    how batches were scheduled. At most ``workers`` batches are in the pool
+    at once and jobs take turns for the free slots, so a new job's first
+    partial result arrives after about one batch even while others run.
+
+    Submitting a request identical to one still in flight returns the
+    existing job. Every submission holds a reference to its job. A job
+    submitted on a ``channel`` (e.g. one dashboard session) supersedes the
+    channel's previous job, dropping the channel's reference to it; callers
+    without a channel drop theirs with ``release``. A job is cancelled
+    once no references are left.
+    """
+    def __init__(self, workers=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.executor = None
+        self.slots = None
+        self.jobs = {}
+        self.channels = {}
+        self.models = OrderedDict()
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def start(self):
+        if self.workers is None or self.workers <= 1:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        else:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.slots = asyncio.Semaphore(max(1, self.workers or 1))
+
+    async def close(self):
+        """Cancels the jobs still running and shuts the pool down."""
+        jobs = list(self.jobs.values())
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*(job.task for job in jobs), return_exceptions=True)
+        self.executor.shutdown(cancel_futures=True)
+
+    def submit(self, request, channel=None):
+        """Queues a request, or joins the identical job already in flight, and returns its Job."""
+        key = hash_key(request)
+        if channel is not None:
+            previous = self.channels.get(channel)
+            if previous is not None and previous.key != key:
+                self._unsubscribe(previous, channel)
+
+        job = self.jobs.get(key)
+        if job is None:
+            num_items = request['num_simulations']
+            even = request['options'][1 if request['kind'] == 'simulation' else 0] == 'antithetic'
+            batch_size = self.batch_size + (self.batch_size % 2 if even else 0)
+            batch_sizes = [min(batch_size, num_items - start) for start in range(0, num_items, batch_size)]
+            job = Job(key, request, batch_sizes)
+            job.task = asyncio.create_task(self._run(job))
+            job.task.add_done_callback(lambda _, job=job: self._job_ended(job))
+            self.jobs[key] = job
+        if channel is None:
+            job.references += 1
+        elif channel not in job.subscribers:
+            job.subscribers.add(channel)
+            job.references += 1
+            self.channels[channel] = job
+        return job
+
+    def cancel(self, job):
+        """Cancels a job outright, whoever else is waiting for it."""
+        job.cancel()
+
+    def release(self, job):
+        """Drops a reference taken by ``submit`` without a channel; the last one cancels the job."""
+        job.references -= 1
+        if job.references <= 0:
+            job.cancel()
+
+    def _unsubscribe(self, job, channel):
+        job.subscribers.discard(channel)
+        self.release(job)
+
+    def _launch_batch(self, job, k, model_key, seeds, results, tasks):
+        tasks.append(asyncio.create_task(self._run_batch(job, k, model_key, seeds, results, tasks)))
+
+    async def _run_batch(self, job, k, model_key, seeds, results, tasks):
+        """
+        Runs batch k in the pool once a slot is free. The job's next batch
+        only starts waiting once this one has its slot, so each job has at
+        most one batch in the slot queue and waiting jobs take turns.
+        """
+        try:
+            async with self.slots:
+                if k + 1 < len(seeds):
+                    self._launch_batch(job, k + 1, model_key, seeds, results, tasks)
+                loop = asyncio.get_running_loop()
+                batch = await loop.run_in_executor(
+                    self.executor, _run_batch, job.request, model_key, seeds[k], job.batch_sizes[k]
+                )
+            results.put_nowait((k, batch, None))
+        except Exception as error:
+            results.put_nowait((k, None, error))
+
+    async def _run(self, job):
+        request = job.request
+        model_key = hash_key({key: value for key, value in request.items()
+                              if key in ('kind', 'params', 'demand', 'lead_time', 'costs')})
+        seeds = np.random.SeedSequence(request['seed']).spawn(len(job.batch_sizes))
+        offsets = np.cumsum([0] + job.batch_sizes[:-1])
+        batches, results, tasks = [None] * len(seeds), asyncio.Queue(), []
+        try:
+            # Summaries are computed here, on a model built once per service
+            model = _model_for(request, model_key, self.models)
+            self._launch_batch(job, 0, model_key, seeds, results, tasks)
+            job.status = RUNNING
+            for num_completed in range(1, len(seeds) + 1):
+                k, batch, error = await results.get()
+                if error is not None:
+                    raise error
+                batches[k] = batch
+                completed = [k for k, batch in enumerate(batches) if batch is not None]
+                job._publish(self._summarize(
+                    request, model, [batches[k] for k in completed], [job.batch_sizes[k] for k in completed],
+                    [offsets[k] for k in completed], final=num_completed == len(seeds)
+                ))
+        except asyncio.CancelledError:
+            job._finish(CANCELLED)
+        except Exception as error:
+            job._finish(FAILED, error)
+        else:
+            job._finish(DONE)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _job_ended(self, job):
+        if not job.done:
+            # Cancelled before it started running
+            job._finish(CANCELLED)
+        if self.jobs.get(job.key) is job:
+            del self.jobs[job.key]
+        for channel in job.subscribers:
+            if self.channels.get(channel) is job:
+                del self.channels[channel]
+
+    def _summarize(self, request, model, batches, sizes, offsets, final):
+        """
+        The partial result of the finished batches. Per-path arrays are only
+        included in the final result.
+        """
+        partial = {
+            'final': final,
+            'completed': int(sum(sizes)),
+            'total': request['num_simulations'],
+        }
+        if request['kind'] == 'simulation':
+            paths = _concatenate_paths([{**batch, 'group': batch['group'] + offset}
+                                        for batch, offset in zip(batches, offsets)])
+            results = model._summarize_paths(paths, request['options'][0])
+            if not final:
+                results = {name: value for name, value in results.items() if not isinstance(value, np.ndarray)}
+            partial['results'] = results
+        else:
+            variance_reduction, qmc_replicates = request['options']
+            groups = np.concatenate([
+                _variance_reduction_groups(size, variance_reduction, qmc_replicates) + offset
+                for size, offset in zip(sizes, offsets)
+            ])
+            partial['results'] = model._summarize_sweep(
+                _combinations(request), np.concatenate(batches, axis=1), groups, request['baseline']
+            )
+        return partial
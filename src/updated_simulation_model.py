@@ -2,19 +2,602 @@
 
 import json
 import numpy as np
-from scipy import stats
-from scipy.stats import invgamma # Required for student_t if implemented
-import pandas as pd
+from scipy import stats, special
+from scipy.stats import qmc
 import sys
 import os
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor
+
+DIST_MAP = {
+    "expon": stats.expon,
+    "weibull_min": stats.weibull_min,
+    "lognorm": stats.lognorm,
+    "pareto": stats.pareto,
+    "norm": stats.norm
+}
+
+# =============================================================================
+# Marginal Samplers
+# =============================================================================
+CLOSED_FORM_PPFS = ('expon', 'weibull_min', 'pareto', 'lognorm', 'norm')
+
+def closed_form_ppf(dist_name, u, shapes, loc, scale):
+    """
+    Inverse CDF of a family in CLOSED_FORM_PPFS. The shape parameters, loc
+    and scale may be arrays broadcasting against ``u``.
+    """
+    if dist_name == 'expon':
+        return loc - scale * np.log1p(-u)
+    if dist_name == 'weibull_min':
+        return loc + scale * (-np.log1p(-u)) ** (1.0 / shapes[0])
+    if dist_name == 'pareto':
+        return loc + scale * (1.0 - u) ** (-1.0 / shapes[0])
+    if dist_name == 'lognorm':
+        return loc + scale * np.exp(shapes[0] * special.ndtri(u))
+    if dist_name == 'norm':
+        return loc + scale * special.ndtri(u)
+    raise ValueError(f"No closed-form inverse CDF for: {dist_name}")
+
+class MarginalSampler:
+    """
+    A fitted marginal distribution frozen once, with a closed-form inverse CDF
+    for the supported families.
+    """
+    def __init__(self, dist_name, params):
+        if dist_name not in DIST_MAP:
+            raise ValueError(f"Unsupported distribution: {dist_name}")
+        dist_func = DIST_MAP[dist_name]
+        self.dist_name = dist_name
+        self.frozen = dist_func(*params)
+
+        num_shapes = dist_func.numargs
+        self.shapes = tuple(params[:num_shapes])
+        self.loc = params[num_shapes] if len(params) > num_shapes else 0.0
+        self.scale = params[num_shapes + 1] if len(params) > num_shapes + 1 else 1.0
+
+    def ppf(self, u):
+        """Inverse CDF, in closed form where the family allows it."""
+        u = np.asarray(u, dtype=float)
+        if self.dist_name in CLOSED_FORM_PPFS:
+            return closed_form_ppf(self.dist_name, u, self.shapes, self.loc, self.scale)
+        return self.frozen.ppf(u)
+
+    def rvs(self, num_samples, rng):
+        """Draws samples by inverse transform of uniform variates."""
+        return self.ppf(rng.random(num_samples))
+
+    def rescaled(self, factor):
+        """Returns the same family with its scale multiplied by ``factor``."""
+        return MarginalSampler(self.dist_name, [*self.shapes, self.loc, self.scale * factor])
+
+    def mean(self):
+        return self.frozen.mean()
+
+    def clamped_mean(self):
+        """Mean of max(X, 0), i.e. after negative samples are clipped to zero."""
+        if self.frozen.support()[0] >= 0:
+            return self.mean()
+        return self.frozen.expect(lambda x: x, lb=0)
+
+    def median(self):
+        return self.frozen.median()
+
+
+class PPFTable:
+    """
+    Interpolated lookup table mapping a copula score (a normal or t variate)
+    straight to a marginal value, i.e. ``sampler.ppf(score_dist.cdf(x))``.
+
+    The grid is uniform in the score over its [tail, 1 - tail] quantiles and
+    is doubled until linear interpolation is within ``tol`` (in the units of
+    the variable) at every interval midpoint. Scores outside the grid use the
+    exact transform.
+    """
+    def __init__(self, sampler, score_dist, tol, tail=1e-6, max_intervals=2 ** 20):
+        self.sampler = sampler
+        self.score_dist = score_dist
+        self.lo, self.hi = score_dist.ppf(tail), score_dist.ppf(1.0 - tail)
+
+        num_intervals = 256
+        while True:
+            grid = np.linspace(self.lo, self.hi, num_intervals + 1)
+            values = self.exact(grid)
+            midpoints = 0.5 * (grid[:-1] + grid[1:])
+            error = np.abs(0.5 * (values[:-1] + values[1:]) - self.exact(midpoints))
+            if np.max(error) <= tol:
+                break
+            if num_intervals >= max_intervals:
+                raise ValueError(f"PPF table for '{sampler.dist_name}' cannot reach tolerance {tol}.")
+            num_intervals *= 2
+
+        self.values = values
+        self.step_inverse = num_intervals / (self.hi - self.lo)
+
+    @classmethod
+    def from_values(cls, sampler, score_dist, lo, hi, values):
+        """Rebuilds a table from precomputed grid values (e.g. a compiled model)."""
+        table = cls.__new__(cls)
+        table.sampler, table.score_dist = sampler, score_dist
+        table.lo, table.hi, table.values = lo, hi, values
+        table.step_inverse = (len(values) - 1) / (hi - lo)
+        return table
+
+    def exact(self, scores):
+        return self.sampler.ppf(self.score_dist.cdf(scores))
+
+    def __call__(self, scores):
+        scores = np.asarray(scores, dtype=float)
+        num_intervals = len(self.values) - 1
+        position = (scores - self.lo) * self.step_inverse
+        index = np.clip(position.astype(np.int64), 0, num_intervals - 1)
+        fraction = position - index
+        samples = self.values[index] + fraction * (self.values[index + 1] - self.values[index])
+
+        outside = (scores < self.lo) | (scores > self.hi)
+        if np.any(outside):
+            samples[outside] = self.exact(scores[outside])
+        return samples
+
+
+# =============================================================================
+# Parameter Validation and Compiled Models
+# =============================================================================
+REQUIRED_MARGINALS = ('inter_arrival_time', 'order_profit_per_order', 'shipping_delay_days')
+COMPILED_MODEL_VERSION = 1
+
+def validate_parameters(params):
+    """
+    Checks a fitted-parameter dict before any simulation runs and raises
+    ValueError describing the first problem found.
+    """
+    if not isinstance(params, dict):
+        raise ValueError("Fitted parameters must be a JSON object.")
+
+    for var_name in REQUIRED_MARGINALS:
+        if var_name not in params:
+            raise ValueError(f"Parameters for '{var_name}' not found in JSON.")
+
+    for var_name, var_params in params.items():
+        if var_name == 'copula':
+            continue
+        if not isinstance(var_params, dict) or 'distribution' not in var_params or 'parameters' not in var_params:
+            raise ValueError(f"'{var_name}' needs 'distribution' and 'parameters' entries.")
+        dist_name, dist_params = var_params['distribution'], var_params['parameters']
+        if dist_name not in DIST_MAP:
+            raise ValueError(f"Unsupported distribution for '{var_name}': {dist_name}")
+        num_shapes = DIST_MAP[dist_name].numargs
+        if not num_shapes <= len(dist_params) <= num_shapes + 2:
+            raise ValueError(f"'{var_name}' ({dist_name}) expects {num_shapes} to {num_shapes + 2} parameters.")
+        if not all(isinstance(value, (int, float)) and not isinstance(value, bool) and np.isfinite(value)
+                   for value in dist_params):
+            raise ValueError(f"Parameters for '{var_name}' must be finite numbers.")
+        if np.isnan(DIST_MAP[dist_name].support(*dist_params)[0]):
+            raise ValueError(f"Invalid {dist_name} parameters for '{var_name}': {dist_params}")
+
+    copula_info = params.get('copula')
+    if copula_info is None:
+        return
+    if copula_info.get('type') not in ['gaussian', 'student_t']:
+        raise ValueError(f"Unsupported copula type: {copula_info.get('type')}")
+    variables = copula_info.get('variables', [])
+    for var_name in variables:
+        if var_name not in params:
+            raise ValueError(f"Marginal parameters for '{var_name}' not found for copula.")
+    # Every disruption event reads profit and delay from the copula draws
+    for var_name in ('order_profit_per_order', 'shipping_delay_days'):
+        if var_name not in variables:
+            raise ValueError(f"Copula must include '{var_name}' to drive the disruption events.")
+
+    copula_params = copula_info.get('parameters', {})
+    corr_matrix = np.asarray(copula_params.get('correlation_matrix', []), dtype=float)
+    if corr_matrix.shape != (len(variables), len(variables)):
+        raise ValueError("Copula correlation matrix must be square with one row per copula variable.")
+    if not np.allclose(corr_matrix, corr_matrix.T) or not np.allclose(np.diag(corr_matrix), 1.0):
+        raise ValueError("Copula correlation matrix must be symmetric with a unit diagonal.")
+    try:
+        np.linalg.cholesky(corr_matrix)
+    except np.linalg.LinAlgError:
+        raise ValueError("Copula correlation matrix is not positive definite.")
+    if copula_info['type'] == 'student_t':
+        df = copula_params.get('degrees_of_freedom')
+        if not isinstance(df, (int, float)) or isinstance(df, bool) or not df > 0:
+            raise ValueError("Student-t copula needs positive 'degrees_of_freedom'.")
+
+
+# =============================================================================
+# Streaming Aggregation
+# =============================================================================
+class RunningMoments:
+    """
+    Mergeable running count, mean and sum of squared deviations (Welford),
+    updated a whole batch at a time with Chan's pairwise formula.
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _combine(self, count, mean, m2):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if values.size:
+            mean = values.mean()
+            self._combine(values.size, mean, np.sum((values - mean) ** 2))
+
+    def merge(self, other):
+        self._combine(other.count, other.mean, other.m2)
+
+    def variance(self, ddof=0):
+        return self.m2 / (self.count - ddof) if self.count > ddof else 0.0
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch for non-negative values with a relative
+    accuracy guarantee (DDSketch-style logarithmic buckets).
+
+    Values at or below ``min_value`` are counted in a single zero bucket.
+    """
+    def __init__(self, relative_accuracy=0.01, min_value=1e-9):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self.min_value = min_value
+        self.count = 0
+        self.zero_count = 0
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def _add_counts(self, counts, offset):
+        if not len(self.counts):
+            self.counts, self.offset = counts.astype(np.int64), offset
+            return
+        lo = min(self.offset, offset)
+        hi = max(self.offset + len(self.counts), offset + len(counts))
+        merged = np.zeros(hi - lo, dtype=np.int64)
+        merged[self.offset - lo:self.offset - lo + len(self.counts)] += self.counts
+        merged[offset - lo:offset - lo + len(counts)] += counts
+        self.counts, self.offset = merged, lo
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        positive = values[values > self.min_value]
+        self.count += values.size
+        self.zero_count += values.size - positive.size
+        if positive.size:
+            index = np.ceil(np.log(positive) / self._log_gamma).astype(np.int64)
+            lo = index.min()
+            self._add_counts(np.bincount(index - lo), lo)
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy.")
+        self.count += other.count
+        self.zero_count += other.zero_count
+        if len(other.counts):
+            self._add_counts(other.counts, other.offset)
+
+    def _buckets(self):
+        """Bucket representative values and counts, zero bucket first."""
+        index = np.arange(self.offset, self.offset + len(self.counts))
+        values = np.concatenate([[0.0], 2 * self.gamma ** index / (self.gamma + 1)])
+        return values, np.concatenate([[self.zero_count], self.counts])
+
+    def histogram(self):
+        """Bucket edges and counts, zero bucket first."""
+        index = np.arange(self.offset - 1, self.offset + len(self.counts))
+        edges = np.concatenate([[0.0], self.gamma ** index])
+        return edges, np.concatenate([[self.zero_count], self.counts])
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+        values, counts = self._buckets()
+        rank = q * (self.count - 1)
+        return values[np.searchsorted(np.cumsum(counts), rank, side='right')]
+
+    def tail_mean(self, q):
+        """Mean of the largest (1 - q) share of the values, i.e. CVaR at level q."""
+        if self.count == 0:
+            return np.nan
+        values, counts = self._buckets()
+        tail_count = (1 - q) * self.count
+        counts, values = counts[::-1], values[::-1]
+        taken = np.clip(tail_count - (np.cumsum(counts) - counts), 0, counts)
+        return np.sum(taken * values) / tail_count
+
+
+class PathAccumulator:
+    """
+    Online, mergeable summary of simulated paths: moments of every per-path
+    output, a quantile sketch of total cost and a disruption-count histogram.
+    """
+    def __init__(self, relative_accuracy=0.01):
+        self.total_cost = RunningMoments()
+        self.num_disruptions = RunningMoments()
+        self.average_delay = RunningMoments()
+        self.cost_sketch = QuantileSketch(relative_accuracy)
+        self.disruption_counts = np.zeros(0, dtype=np.int64)
+
+    def _add_disruption_counts(self, counts):
+        if len(counts) > len(self.disruption_counts):
+            counts, self.disruption_counts = self.disruption_counts, counts.copy()
+        self.disruption_counts[:len(counts)] += counts
+
+    def update(self, counts, total_costs, average_delays):
+        self.total_cost.update(total_costs)
+        self.num_disruptions.update(counts)
+        self.average_delay.update(average_delays)
+        self.cost_sketch.update(total_costs)
+        self._add_disruption_counts(np.bincount(counts).astype(np.int64))
+
+    def merge(self, other):
+        self.total_cost.merge(other.total_cost)
+        self.num_disruptions.merge(other.num_disruptions)
+        self.average_delay.merge(other.average_delay)
+        self.cost_sketch.merge(other.cost_sketch)
+        self._add_disruption_counts(other.disruption_counts)
+
+    def summary(self, var_levels=(0.95, 0.99)):
+        avg_total_cost = self.total_cost.mean
+        avg_num_disruptions = self.num_disruptions.mean
+        avg_average_delay = self.average_delay.mean
+        scri = (avg_total_cost / 1000) + (avg_average_delay * 10) + (avg_num_disruptions * 5)
+
+        return {
+            'num_paths': self.total_cost.count,
+            'avg_total_cost_per_period': avg_total_cost,
+            'std_total_cost_per_period': np.sqrt(self.total_cost.variance()),
+            'avg_num_disruptions_per_period': avg_num_disruptions,
+            'std_num_disruptions_per_period': np.sqrt(self.num_disruptions.variance()),
+            'avg_average_delay_per_disruption': avg_average_delay,
+            'std_average_delay_per_disruption': np.sqrt(self.average_delay.variance()),
+            'total_cost_var': {level: self.cost_sketch.quantile(level) for level in var_levels},
+            'total_cost_cvar': {level: self.cost_sketch.tail_mean(level) for level in var_levels},
+            'histograms': {
+                'num_disruptions': self.disruption_counts,
+                'total_cost': dict(zip(('edges', 'counts'), self.cost_sketch.histogram())),
+            },
+            'supply_chain_risk_index': scri
+        }
+
+
+# =============================================================================
+# Variance Reduction
+# =============================================================================
+VARIANCE_REDUCTION_METHODS = (None, 'antithetic', 'sobol', 'halton')
+
+def _check_variance_reduction(method, num_items):
+    if method not in VARIANCE_REDUCTION_METHODS:
+        raise ValueError(f"Unsupported variance reduction: {method}")
+    if method == 'antithetic' and num_items % 2:
+        raise ValueError("Antithetic sampling needs an even number of paths.")
+
+def _qmc_slices(num_items, qmc_replicates):
+    """Splits items into contiguous randomized-QMC replicates."""
+    bounds = np.linspace(0, num_items, min(qmc_replicates, num_items) + 1).astype(int)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def _variance_reduction_groups(num_items, method, qmc_replicates):
+    """
+    Labels the independent groups used for standard errors: single items,
+    antithetic pairs (item i with item i + n/2) or randomized QMC replicates.
+    Each group is labelled by the index of its first item.
+    """
+    if method == 'antithetic':
+        return np.tile(np.arange(num_items // 2), 2)
+    if method in ('sobol', 'halton'):
+        groups = np.empty(num_items, dtype=np.int64)
+        for start, stop in _qmc_slices(num_items, qmc_replicates):
+            groups[start:stop] = start
+        return groups
+    return np.arange(num_items)
+
+def _draw_uniforms(rng, num_rows, dim, method=None, qmc_replicates=8):
+    """
+    Draws a (num_rows, dim) block of uniforms: pseudo-random, antithetic
+    (second half mirrors the first) or scrambled Sobol/Halton points with one
+    independent scramble per QMC replicate.
+    """
+    if method == 'antithetic':
+        half = rng.random((num_rows // 2, dim))
+        return np.vstack([half, 1.0 - half])
+    if method in ('sobol', 'halton'):
+        blocks = []
+        for start, stop in _qmc_slices(num_rows, qmc_replicates):
+            if method == 'sobol':
+                num_bits = int(np.ceil(np.log2(max(stop - start, 1))))
+                blocks.append(qmc.Sobol(dim, scramble=True, seed=rng).random_base2(num_bits)[:stop - start])
+            else:
+                blocks.append(qmc.Halton(dim, scramble=True, seed=rng).random(stop - start))
+        return np.vstack(blocks) if blocks else np.empty((0, dim))
+    return rng.random((num_rows, dim))
+
+def _mean_and_standard_error(values, groups, controls=None):
+    """
+    Sample mean and its standard error across independent groups.
+
+    ``controls`` are per-item control variates already centred on their
+    known means; when given, the values are adjusted by the regression
+    (control-variate) estimator before averaging.
+    """
+    values = np.asarray(values, dtype=float)
+    if controls is not None and controls.shape[1]:
+        centred = controls - controls.mean(axis=0)
+        beta = np.linalg.lstsq(centred, values - values.mean(), rcond=None)[0]
+        values = values - controls @ beta
+
+    _, group_index = np.unique(groups, return_inverse=True)
+    group_means = np.bincount(group_index, weights=values) / np.bincount(group_index)
+    if len(group_means) < 2:
+        return np.mean(values), np.nan
+    return np.mean(values), np.std(group_means, ddof=1) / np.sqrt(len(group_means))
+
+
+# =============================================================================
+# Instrumentation
+# =============================================================================
+class Instrumentation:
+    """
+    Opt-in per-stage wall-clock timers, counters and, with ``track_memory``,
+    the peak traced allocation of each stage (via tracemalloc).
+
+    Stages nest, and a stage's time includes the stages inside it. Every
+    stage call is also kept as a span for ``export_trace``.
+
+    SupplyChainSimulator times ``simulation``, ``inter_arrival_sampling``,
+    ``event_sampling``, ``marginal_sampling``, ``copula_draws``,
+    ``ppf_transform``, ``path_reduction``, ``estimators`` and, when
+    streaming, ``accumulate``. InventorySimulator times
+    ``demand_lead_time_draws`` and ``inventory_day_loop``.
+    """
+    enabled = True
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self._started_tracemalloc = False
+        self.reset()
+
+    def reset(self):
+        """Clears all timers, counters and spans."""
+        self.stages = {}
+        self.counters = {}
+        self.spans = []
+        self._memory_frames = []
+
+    @contextmanager
+    def stage(self, name):
+        """Times the enclosed block under ``name``."""
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            current, peak = tracemalloc.get_traced_memory()
+            if self._memory_frames:
+                self._memory_frames[-1][1] = max(self._memory_frames[-1][1], peak)
+            tracemalloc.reset_peak()
+            self._memory_frames.append([current, 0])
+        start_time, start = time.time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            record = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'peak_bytes': 0})
+            record['calls'] += 1
+            record['seconds'] += elapsed
+            self.spans.append((name, start_time, elapsed, os.getpid()))
+            if self.track_memory:
+                start_bytes, child_peak = self._memory_frames.pop()
+                peak = max(tracemalloc.get_traced_memory()[1], child_peak)
+                record['peak_bytes'] = max(record['peak_bytes'], peak - start_bytes)
+                # Resetting the peak hid it from the enclosing stage, so hand it up
+                if self._memory_frames:
+                    self._memory_frames[-1][1] = max(self._memory_frames[-1][1], peak)
+
+    def count(self, name, value=1):
+        """Adds ``value`` to counter ``name``."""
+        self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def merge(self, other):
+        """Folds in the stages, counters and spans of another instance (e.g. from a worker process)."""
+        for name, record in other.stages.items():
+            mine = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'peak_bytes': 0})
+            mine['calls'] += record['calls']
+            mine['seconds'] += record['seconds']
+            mine['peak_bytes'] = max(mine['peak_bytes'], record['peak_bytes'])
+        for name, value in other.counters.items():
+            self.count(name, value)
+        self.spans.extend(other.spans)
+
+    def report(self):
+        """
+        Snapshot of the stages (calls, seconds, and peak bytes when tracking
+        memory) and counters. Stage times from worker processes are summed.
+        """
+        stages = {}
+        for name, record in self.stages.items():
+            stages[name] = {'calls': record['calls'], 'seconds': record['seconds']}
+            if self.track_memory:
+                stages[name]['peak_bytes'] = record['peak_bytes']
+        return {'stages': stages, 'counters': dict(self.counters)}
+
+    def export_trace(self, path):
+        """Writes the spans as a Chrome trace-event JSON file (chrome://tracing, Perfetto)."""
+        events = [
+            {'name': name, 'ph': 'X', 'ts': start * 1e6, 'dur': elapsed * 1e6, 'pid': pid, 'tid': 0}
+            for name, start, elapsed, pid in self.spans
+        ]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'counters': self.counters}, f)
+
+    def close(self):
+        """Stops tracemalloc if this instance started it."""
+        if self._started_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracemalloc = False
+
+
+class _NullInstrumentation:
+    """Stand-in while instrumentation is off: every hook is a no-op."""
+    enabled = False
+    track_memory = False
+    _null_stage = nullcontext()
+
+    def stage(self, name):
+        return self._null_stage
+
+    def count(self, name, value=1):
+        pass
+
+    def reset(self):
+        pass
+
+    def close(self):
+        pass
+
+NULL_INSTRUMENTATION = _NullInstrumentation()
+
 
 class SupplyChainSimulator:
-    def __init__(self, params_filepath):
+    instrumentation = NULL_INSTRUMENTATION
+
+    def __init__(self, params_filepath, ppf_table_tol=None, seed=None):
         """
         Initializes the simulator with distribution parameters loaded from a JSON file.
+
+        If ``ppf_table_tol`` is given, copula transforms use interpolated PPF
+        tables accurate to that absolute error instead of the exact transform.
+        ``seed`` makes runs reproducible; parallel shards use child streams
+        spawned from it.
         """
-        self.params = self._load_parameters(params_filepath)
-        self.rng = np.random.default_rng() # For reproducible random numbers
+        self._setup(self._load_parameters(params_filepath), ppf_table_tol, seed)
+
+    @classmethod
+    def from_params(cls, params, ppf_table_tol=None, seed=None):
+        """Builds a simulator from an already loaded parameter dict."""
+        simulator = cls.__new__(cls)
+        simulator._setup(params, ppf_table_tol, seed)
+        return simulator
+
+    def _setup(self, params, ppf_table_tol, seed):
+        self.params = params
+        validate_parameters(self.params)
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.seed_sequence) # For reproducible random numbers
+        self.samplers = self._build_samplers()
+        self.ppf_tables = self._build_ppf_tables(ppf_table_tol)
+        self._copula_cholesky = None
 
     def _load_parameters(self, filepath):
         """Loads distribution and copula parameters from a JSON file."""
@@ -26,38 +609,145 @@ class SupplyChainSimulator:
         except json.JSONDecodeError:
             raise ValueError(f"Error decoding JSON from: {filepath}")
 
+    def enable_instrumentation(self, track_memory=False):
+        """
+        Turns on per-stage timers and counters (and peak-allocation tracking
+        with ``track_memory``). Each run then resets them and returns their
+        report under ``instrumentation``. Returns the Instrumentation, whose
+        ``export_trace`` writes the spans of the last run.
+        """
+        self.instrumentation = Instrumentation(track_memory)
+        return self.instrumentation
+
+    def disable_instrumentation(self):
+        """Turns instrumentation back off."""
+        self.instrumentation.close()
+        self.instrumentation = NULL_INSTRUMENTATION
+
+    def save_compiled(self, model_dir):
+        """
+        Writes a compiled model directory: a ``manifest.json`` with the
+        validated parameters and a format version, plus ``.npy`` arrays for
+        the copula Cholesky factor and any PPF tables. Load it with
+        ``SupplyChainSimulator.from_compiled``.
+        """
+        os.makedirs(model_dir, exist_ok=True)
+        manifest = {'format_version': COMPILED_MODEL_VERSION, 'params': self.params, 'ppf_tables': {}}
+        if self.params.get('copula'):
+            np.save(os.path.join(model_dir, 'cholesky.npy'), self._get_copula_cholesky())
+        for var_name, table in self.ppf_tables.items():
+            np.save(os.path.join(model_dir, f"ppf_table_{var_name}.npy"), table.values)
+            manifest['ppf_tables'][var_name] = {'lo': float(table.lo), 'hi': float(table.hi)}
+        with open(os.path.join(model_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f)
+
+    @classmethod
+    def from_compiled(cls, model_dir, seed=None):
+        """
+        Builds a simulator from a directory written by ``save_compiled``,
+        memory-mapping its arrays instead of re-validating the JSON and
+        rebuilding the Cholesky factor and PPF tables.
+        """
+        try:
+            with open(os.path.join(model_dir, 'manifest.json'), 'r') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Compiled model not found at: {model_dir}")
+        if manifest.get('format_version') != COMPILED_MODEL_VERSION:
+            raise ValueError(
+                f"Compiled model format {manifest.get('format_version')} is not supported "
+                f"(expected {COMPILED_MODEL_VERSION}); recompile it from the JSON."
+            )
+
+        simulator = cls.__new__(cls)
+        simulator.params = manifest['params']
+        simulator.seed_sequence = np.random.SeedSequence(seed)
+        simulator.rng = np.random.default_rng(simulator.seed_sequence)
+        simulator.samplers = simulator._build_samplers()
+        simulator._copula_cholesky = None
+        simulator.ppf_tables = {}
+        if simulator.params.get('copula'):
+            simulator._copula_cholesky = np.load(os.path.join(model_dir, 'cholesky.npy'), mmap_mode='r')
+            score_dist = simulator._get_copula_score_dist()
+            for var_name, bounds in manifest['ppf_tables'].items():
+                values = np.load(os.path.join(model_dir, f"ppf_table_{var_name}.npy"), mmap_mode='r')
+                simulator.ppf_tables[var_name] = PPFTable.from_values(
+                    simulator.samplers[var_name], score_dist, bounds['lo'], bounds['hi'], values
+                )
+        return simulator
+
+    def _build_samplers(self):
+        """Freezes every marginal found in the parameters once."""
+        samplers = {}
+        for var_name, var_params in self.params.items():
+            if isinstance(var_params, dict) and 'distribution' in var_params:
+                samplers[var_name] = MarginalSampler(var_params['distribution'], var_params['parameters'])
+        return samplers
+
+    def _get_copula_score_dist(self):
+        """Returns the distribution of the copula scores before the CDF transform."""
+        copula_info = self.params['copula']
+        if copula_info['type'] == 'student_t':
+            return stats.t(copula_info['parameters']['degrees_of_freedom'])
+        return stats.norm()
+
+    def _build_ppf_tables(self, ppf_table_tol):
+        """Builds score-to-marginal lookup tables for the copula variables."""
+        copula_info = self.params.get('copula')
+        if ppf_table_tol is None or not copula_info or copula_info['type'] not in ['gaussian', 'student_t']:
+            return {}
+
+        score_dist = self._get_copula_score_dist()
+        return {
+            var_name: PPFTable(self.samplers[var_name], score_dist, ppf_table_tol)
+            for var_name in copula_info['variables'] if var_name in self.samplers
+        }
+
     def _get_dist_func(self, dist_name):
         """Returns the scipy.stats distribution function."""
-        dist_map = {
-            "expon": stats.expon,
-            "weibull_min": stats.weibull_min,
-            "lognorm": stats.lognorm,
-            "pareto": stats.pareto,
-            "norm": stats.norm
-        }
-        if dist_name not in dist_map:
+        if dist_name not in DIST_MAP:
             raise ValueError(f"Unsupported distribution: {dist_name}")
-        return dist_map[dist_name]
+        return DIST_MAP[dist_name]
 
     def _generate_marginal_samples(self, variable_name, num_samples):
         """
         Generates random samples for a given variable based on its fitted distribution.
         """
-        var_params = self.params.get(variable_name)
-        if not var_params:
+        sampler = self.samplers.get(variable_name)
+        if sampler is None:
             raise ValueError(f"Parameters for '{variable_name}' not found in JSON.")
 
-        dist_name = var_params['distribution']
-        params = var_params['parameters']
-        dist_func = self._get_dist_func(dist_name)
-
-        samples = dist_func.rvs(*params, size=num_samples, random_state=self.rng)
+        with self.instrumentation.stage('marginal_sampling'):
+            samples = sampler.rvs(num_samples, self.rng)
+        self.instrumentation.count('samples_drawn', num_samples)
 
         if variable_name in ['inter_arrival_time', 'shipping_delay_days']:
             samples[samples < 0] = 0
 
         return samples
 
+    def _transform_copula_scores(self, variables, scores):
+        """
+        Maps copula scores (normal or t variates) back to the marginal
+        scales, as a dict of sample arrays keyed by variable.
+        """
+        score_dist = None
+        dependent_samples = {}
+        with self.instrumentation.stage('ppf_transform'):
+            for i, var_name in enumerate(variables):
+                sampler = self.samplers.get(var_name)
+                if sampler is None:
+                    raise ValueError(f"Marginal parameters for '{var_name}' not found for copula.")
+                if var_name in self.ppf_tables:
+                    dependent_samples[var_name] = self.ppf_tables[var_name](scores[:, i])
+                else:
+                    score_dist = score_dist or self._get_copula_score_dist()
+                    dependent_samples[var_name] = sampler.ppf(score_dist.cdf(scores[:, i]))
+                if var_name in ['shipping_delay_days', 'order_profit_per_order']:
+                    dependent_samples[var_name][dependent_samples[var_name] < 0] = 0
+        self.instrumentation.count('samples_drawn', scores.shape[0] * len(variables))
+        return dependent_samples
+
     def _generate_dependent_samples_gaussian(self, num_samples):
         """
         Generates dependent samples using a Gaussian copula.
@@ -70,22 +760,67 @@ class SupplyChainSimulator:
         variables = copula_info['variables']
         corr_matrix = np.array(copula_info['parameters']['correlation_matrix'])
         mean = np.zeros(len(variables))
-        correlated_normals = self.rng.multivariate_normal(mean, corr_matrix, size=num_samples)
-        dependent_samples = {}
-
-        for i, var_name in enumerate(variables):
-            pseudo_obs = stats.norm.cdf(correlated_normals[:, i])
-            var_params = self.params.get(var_name)
-            if not var_params:
-                raise ValueError(f"Marginal parameters for '{var_name}' not found for copula.")
-            dist_func = self._get_dist_func(var_params['distribution'])
-            params = var_params['parameters']
-            dependent_samples[var_name] = dist_func.ppf(pseudo_obs, *params)
-            if var_name in ['shipping_delay_days', 'order_profit_per_order']:
-                dependent_samples[var_name][dependent_samples[var_name] < 0] = 0
-
-        return pd.DataFrame(dependent_samples)
+        with self.instrumentation.stage('copula_draws'):
+            correlated_normals = self.rng.multivariate_normal(mean, corr_matrix, size=num_samples)
+        return self._transform_copula_scores(variables, correlated_normals)
     
+    def _get_copula_cholesky(self):
+        """Returns the cached lower Cholesky factor of the copula correlation matrix."""
+        if self._copula_cholesky is None:
+            corr_matrix = np.array(self.params['copula']['parameters']['correlation_matrix'], dtype=float)
+            try:
+                self._copula_cholesky = np.linalg.cholesky(corr_matrix)
+            except np.linalg.LinAlgError:
+                raise ValueError("Copula correlation matrix is not positive definite.")
+        return self._copula_cholesky
+
+    def _sample_student_t_scores(self, num_samples, chunk_size=1_000_000):
+        """
+        Draws multivariate t variates with the copula correlation matrix.
+
+        Correlated normals are divided by the square root of a chi-square
+        mixing variable over its degrees of freedom. Rows are generated in
+        chunks to bound temporary memory.
+        """
+        df = self.params['copula']['parameters']['degrees_of_freedom']
+        chol = self._get_copula_cholesky()
+        dim = chol.shape[0]
+
+        scores = np.empty((num_samples, dim))
+        with self.instrumentation.stage('copula_draws'):
+            for start in range(0, num_samples, chunk_size):
+                stop = min(start + chunk_size, num_samples)
+                correlated_normals = self.rng.standard_normal((stop - start, dim)) @ chol.T
+                mixing = np.sqrt(self.rng.chisquare(df, size=stop - start) / df)
+                scores[start:stop] = correlated_normals / mixing[:, None]
+        return scores
+
+    def _sample_student_t_copula(self, num_samples):
+        """Draws pseudo-observations on [0,1] from a Student-t copula."""
+        df = self.params['copula']['parameters']['degrees_of_freedom']
+        return stats.t.cdf(self._sample_student_t_scores(num_samples), df)
+
+    def _event_uniform_dim(self):
+        """Number of uniforms consumed per disruption event by _generate_event_samples."""
+        copula_info = self.params.get('copula')
+        if copula_info and copula_info['type'] in ['gaussian', 'student_t']:
+            return len(copula_info['variables']) + (copula_info['type'] == 'student_t')
+        return 2
+
+    def _copula_scores_from_uniforms(self, uniforms):
+        """
+        Copula scores from given uniforms, one column per copula variable plus
+        a last column for the chi-square mixing variable of the t copula.
+        """
+        copula_info = self.params['copula']
+        dim = len(copula_info['variables'])
+        with self.instrumentation.stage('copula_draws'):
+            scores = special.ndtri(uniforms[:, :dim]) @ self._get_copula_cholesky().T
+            if copula_info['type'] == 'student_t':
+                df = copula_info['parameters']['degrees_of_freedom']
+                scores /= np.sqrt(stats.chi2.ppf(uniforms[:, dim], df) / df)[:, None]
+        return scores
+
     def _generate_dependent_samples_student_t(self, num_samples):
         """
         Generates dependent samples using a Student-t copula.
@@ -95,198 +830,812 @@ class SupplyChainSimulator:
             return None
 
         variables = copula_info['variables']
-        corr_matrix = np.array(copula_info['parameters']['correlation_matrix'])
-        df = copula_info['parameters']['degrees_of_freedom']
+        scores = self._sample_student_t_scores(num_samples)
+        return self._transform_copula_scores(variables, scores)
 
-        # Generate correlated t-distributed variates
-        # This requires a more complex method than scipy's basic tools.
-        # For a simplified, illustrative implementation:
-        try:
-            from rpy2.robjects.packages import importr
-            from rpy2.robjects import pandas2ri
-            pandas2ri.activate()
-            copula = importr('copula')
-            t_cop = copula.tCopula(param=pandas2ri.py2rpy(pd.DataFrame(corr_matrix)), dim=len(variables), df=df)
-            pseudo_obs = np.array(copula.rCopula(num_samples, t_cop))
-        except ImportError:
-            print("Warning: rpy2 is not installed. Student-t copula simulation will be skipped.")
-            print("Falling back to independent sampling for this prototype.")
-            return None
+    def _inter_arrival_buffer_size(self, simulation_period_days):
+        """
+        Number of inter-arrival draws per path expected to cover the period.
 
-        dependent_samples = {}
-        for i, var_name in enumerate(variables):
-            var_params = self.params.get(var_name)
-            if not var_params:
-                raise ValueError(f"Marginal parameters for '{var_name}' not found for copula.")
-            dist_func = self._get_dist_func(var_params['distribution'])
-            params = var_params['parameters']
-            dependent_samples[var_name] = dist_func.ppf(pseudo_obs[:, i], *params)
-            if var_name in ['shipping_delay_days', 'order_profit_per_order']:
-                dependent_samples[var_name][dependent_samples[var_name] < 0] = 0
-                
-        return pd.DataFrame(dependent_samples)
-
-    def run_simulation(self, num_simulations, simulation_period_days=365):
+        Sized from the period length and the fitted mean gap (the median for
+        heavy tails without a finite mean), plus a few standard deviations of
+        headroom. Paths that still run out are topped up afterwards.
         """
-        Runs the Monte Carlo simulation for supply chain disruptions.
+        sampler = self.samplers.get('inter_arrival_time')
+        if sampler is None:
+            raise ValueError("Parameters for 'inter_arrival_time' not found in JSON.")
+        mean_gap = sampler.mean()
+        if not np.isfinite(mean_gap) or mean_gap <= 0:
+            mean_gap = sampler.median()
+        if not np.isfinite(mean_gap) or mean_gap <= 0:
+            raise ValueError("'inter_arrival_time' distribution must have a positive typical gap.")
+
+        expected_events = simulation_period_days / mean_gap
+        buffer_size = np.ceil(expected_events + 4 * np.sqrt(expected_events) + 4)
+        return int(min(buffer_size, 4096))
+
+    def _simulate_disruption_counts(self, num_paths, simulation_period_days, frequency_tilt=None,
+                                    first_uniforms=None):
         """
-        all_simulated_total_costs = []
-        all_simulated_num_disruptions = []
-        all_simulated_average_delay = []
-
-        copula_defined = 'copula' in self.params and self.params['copula']['type'] in ['gaussian', 'student_t']
-
-        for _ in range(num_simulations):
-            inter_arrival_times = self._generate_marginal_samples('inter_arrival_time', num_simulations * 2)
-            cumulative_times = np.cumsum(inter_arrival_times)
-            num_disruptions_in_period = np.sum(cumulative_times < simulation_period_days)
-
-            if num_disruptions_in_period == 0:
-                all_simulated_total_costs.append(0)
-                all_simulated_num_disruptions.append(0)
-                all_simulated_average_delay.append(0)
-                continue
-
-            simulated_profit_per_order = []
-            simulated_shipping_delay_days = []
-
-            if copula_defined:
-                copula_type = self.params['copula']['type']
-                if copula_type == 'gaussian':
-                    dependent_samples_df = self._generate_dependent_samples_gaussian(num_disruptions_in_period)
-                elif copula_type == 'student_t':
-                    dependent_samples_df = self._generate_dependent_samples_student_t(num_disruptions_in_period)
-                
-                if dependent_samples_df is not None:
-                    simulated_profit_per_order = dependent_samples_df['order_profit_per_order'].values
-                    simulated_shipping_delay_days = dependent_samples_df['shipping_delay_days'].values
-                else:
-                    simulated_profit_per_order = self._generate_marginal_samples('order_profit_per_order', num_disruptions_in_period)
-                    simulated_shipping_delay_days = self._generate_marginal_samples('shipping_delay_days', num_disruptions_in_period)
+        Simulates the number of disruptions inside the period for every path.
+
+        ``first_uniforms`` optionally supplies the uniforms behind the first
+        buffer of inter-arrival times (for variance reduction); top-ups are
+        always pseudo-random. Also returns the sum of that first buffer.
+
+        With ``frequency_tilt`` the inter-arrival times are drawn from an
+        importance-sampling proposal whose scale is divided by the tilt (so
+        disruptions are ``frequency_tilt`` times as frequent). The returned
+        log likelihood ratios cover every gap that starts inside the period,
+        which makes them valid weights for any function of the path.
+        """
+        buffer_size = self._inter_arrival_buffer_size(simulation_period_days)
+        log_weights = np.zeros(num_paths)
+        sampler = self.samplers['inter_arrival_time']
+        proposal = sampler.rescaled(1.0 / frequency_tilt) if frequency_tilt else None
+
+        def draw_gaps(num_rows):
+            if proposal is None:
+                gaps = self._generate_marginal_samples('inter_arrival_time', num_rows * buffer_size)
             else:
-                simulated_profit_per_order = self._generate_marginal_samples('order_profit_per_order', num_disruptions_in_period)
-                simulated_shipping_delay_days = self._generate_marginal_samples('shipping_delay_days', num_disruptions_in_period)
+                gaps = proposal.rvs(num_rows * buffer_size, self.rng)
+                gaps[gaps < 0] = 0
+                self.instrumentation.count('samples_drawn', gaps.size)
+            return gaps.reshape(num_rows, buffer_size)
 
-            simulated_costs = np.where(simulated_profit_per_order < 0, -simulated_profit_per_order, 0)
-            total_simulated_cost = np.sum(simulated_costs)
-            average_simulated_delay = np.mean(simulated_shipping_delay_days) if num_disruptions_in_period > 0 else 0
+        def add_log_weights(rows, gaps, cumulative_times):
+            if proposal is not None:
+                started = (cumulative_times - gaps) < simulation_period_days
+                log_ratio = sampler.frozen.logpdf(gaps) - proposal.frozen.logpdf(gaps)
+                log_weights[rows] += np.sum(np.where(started, log_ratio, 0), axis=1)
 
-            all_simulated_total_costs.append(total_simulated_cost)
-            all_simulated_num_disruptions.append(num_disruptions_in_period)
-            all_simulated_average_delay.append(average_simulated_delay)
+        if first_uniforms is None:
+            gaps = draw_gaps(num_paths)
+        else:
+            # The uniforms stand in for the draws of whichever distribution
+            # the gaps come from, so the likelihood ratios still apply
+            gaps = (proposal or sampler).ppf(first_uniforms)
+            gaps[gaps < 0] = 0
+            self.instrumentation.count('samples_drawn', gaps.size)
+        first_block_sums = gaps.sum(axis=1)
+        cumulative_times = np.cumsum(gaps, axis=1)
+        counts = np.sum(cumulative_times < simulation_period_days, axis=1)
+        add_log_weights(slice(None), gaps, cumulative_times)
 
-        avg_total_cost = np.mean(all_simulated_total_costs)
-        avg_num_disruptions = np.mean(all_simulated_num_disruptions)
-        avg_average_delay = np.mean(all_simulated_average_delay)
+        # Paths whose buffer ended inside the period need more arrivals
+        elapsed = cumulative_times[:, -1]
+        open_paths = np.flatnonzero(elapsed < simulation_period_days)
+        while open_paths.size:
+            gaps = draw_gaps(open_paths.size)
+            cumulative_times = elapsed[open_paths, None] + np.cumsum(gaps, axis=1)
+            counts[open_paths] += np.sum(cumulative_times < simulation_period_days, axis=1)
+            add_log_weights(open_paths, gaps, cumulative_times)
+            elapsed[open_paths] = cumulative_times[:, -1]
+            open_paths = open_paths[cumulative_times[:, -1] < simulation_period_days]
 
-        scri = (avg_total_cost / 1000) + (avg_average_delay * 10) + (avg_num_disruptions * 5)
+        return counts, log_weights, first_block_sums
 
-        return {
-            'avg_total_cost_per_period': avg_total_cost,
-            'avg_num_disruptions_per_period': avg_num_disruptions,
-            'avg_average_delay_per_disruption': avg_average_delay,
-            'simulated_total_costs': all_simulated_total_costs,
-            'supply_chain_risk_index': scri
+    def _generate_event_samples(self, num_events, uniforms=None):
+        """
+        Generates profit and shipping delay for every disruption event,
+        using the configured copula when available.
+
+        If ``uniforms`` (num_events x _event_uniform_dim()) are given they
+        drive the draws instead of the simulator's generator.
+        """
+        copula_info = self.params.get('copula')
+        dependent_samples = None
+        if uniforms is not None and copula_info and copula_info['type'] in ['gaussian', 'student_t']:
+            scores = self._copula_scores_from_uniforms(uniforms)
+            dependent_samples = self._transform_copula_scores(copula_info['variables'], scores)
+        elif uniforms is not None:
+            for var_name in ['order_profit_per_order', 'shipping_delay_days']:
+                if var_name not in self.samplers:
+                    raise ValueError(f"Parameters for '{var_name}' not found in JSON.")
+            with self.instrumentation.stage('ppf_transform'):
+                profit = self.samplers['order_profit_per_order'].ppf(uniforms[:, 0])
+                delay = self.samplers['shipping_delay_days'].ppf(uniforms[:, 1])
+            delay[delay < 0] = 0
+            self.instrumentation.count('samples_drawn', 2 * num_events)
+            return profit, delay
+        elif copula_info and copula_info['type'] == 'gaussian':
+            dependent_samples = self._generate_dependent_samples_gaussian(num_events)
+        elif copula_info and copula_info['type'] == 'student_t':
+            dependent_samples = self._generate_dependent_samples_student_t(num_events)
+
+        if dependent_samples is not None:
+            return dependent_samples['order_profit_per_order'], dependent_samples['shipping_delay_days']
+
+        return (self._generate_marginal_samples('order_profit_per_order', num_events),
+                self._generate_marginal_samples('shipping_delay_days', num_events))
+
+    def _antithetic_event_uniforms(self, counts, dim):
+        """
+        Event uniforms for antithetic path pairs (path i, path i + n/2): the
+        j-th event of the second path mirrors the j-th event of the first
+        whenever the first path has one, and is fresh otherwise.
+        """
+        half = len(counts) // 2
+        first_counts, second_counts = counts[:half], counts[half:]
+        first = self.rng.random((int(first_counts.sum()), dim))
+        second = self.rng.random((int(second_counts.sum()), dim))
+
+        first_offsets = np.cumsum(first_counts) - first_counts
+        pair = np.repeat(np.arange(half), second_counts)
+        event_number = np.arange(len(second)) - np.repeat(np.cumsum(second_counts) - second_counts, second_counts)
+        mirrored = event_number < first_counts[pair]
+        second[mirrored] = 1.0 - first[first_offsets[pair[mirrored]] + event_number[mirrored]]
+        return np.vstack([first, second])
+
+    def _control_variate_means(self):
+        """
+        Known means of the event profit, event delay and inter-arrival time
+        as sampled (after clipping), for the control variates.
+        """
+        copula_info = self.params.get('copula')
+        copula_vars = copula_info['variables'] if copula_info and copula_info['type'] in ['gaussian', 'student_t'] else []
+        profit = self.samplers['order_profit_per_order']
+        return (
+            profit.clamped_mean() if 'order_profit_per_order' in copula_vars else profit.mean(),
+            self.samplers['shipping_delay_days'].clamped_mean(),
+            self.samplers['inter_arrival_time'].clamped_mean(),
+        )
+
+    def _simulate_paths(self, num_paths, simulation_period_days, frequency_tilt=None,
+                        variance_reduction=None, qmc_replicates=8, control_variates=False):
+        """
+        Simulates a batch of paths as arrays.
+
+        Events of all paths are drawn as one ragged array and reduced back to
+        their owning path, so the work is linear in the number of events.
+        Returns a dict of per-path arrays: disruption counts, total costs,
+        average delays, importance-sampling log weights (zero without
+        ``frequency_tilt``), standard-error group labels and, with
+        ``control_variates``, the centred control variates.
+        """
+        _check_variance_reduction(variance_reduction, num_paths)
+        buffer_size = self._inter_arrival_buffer_size(simulation_period_days)
+        first_uniforms = None
+        if variance_reduction is not None:
+            first_uniforms = _draw_uniforms(self.rng, num_paths, buffer_size, variance_reduction, qmc_replicates)
+
+        with self.instrumentation.stage('inter_arrival_sampling'):
+            counts, log_weights, first_block_sums = self._simulate_disruption_counts(
+                num_paths, simulation_period_days, frequency_tilt, first_uniforms
+            )
+        paths = {
+            'num_disruptions': counts,
+            'total_cost': np.zeros(num_paths),
+            'average_delay': np.zeros(num_paths),
+            'log_weight': log_weights,
+            'group': _variance_reduction_groups(num_paths, variance_reduction, qmc_replicates),
+        }
+
+        num_events = int(counts.sum())
+        event_uniforms = None
+        if variance_reduction == 'antithetic':
+            event_uniforms = self._antithetic_event_uniforms(counts, self._event_uniform_dim())
+        elif variance_reduction is not None:
+            event_offsets = np.concatenate([[0], np.cumsum(counts)])
+            event_uniforms = np.vstack([
+                _draw_uniforms(self.rng, event_offsets[stop] - event_offsets[start], self._event_uniform_dim(),
+                               variance_reduction, qmc_replicates=1)
+                for start, stop in _qmc_slices(num_paths, qmc_replicates)
+            ])
+
+        if num_events:
+            with self.instrumentation.stage('event_sampling'):
+                profit, delay = self._generate_event_samples(num_events, event_uniforms)
+        else:
+            profit, delay = np.zeros(0), np.zeros(0)
+
+        with self.instrumentation.stage('path_reduction'):
+            path_index = np.repeat(np.arange(num_paths), counts)
+            costs = np.where(profit < 0, -profit, 0)
+            paths['total_cost'] = np.bincount(path_index, weights=costs, minlength=num_paths)
+            delay_sums = np.bincount(path_index, weights=delay, minlength=num_paths)
+
+            has_events = counts > 0
+            paths['average_delay'][has_events] = delay_sums[has_events] / counts[has_events]
+        self.instrumentation.count('paths', num_paths)
+        self.instrumentation.count('disruption_events', num_events)
+        self.instrumentation.count('zero_disruption_paths', num_paths - np.count_nonzero(has_events))
+
+        if control_variates:
+            profit_mean, delay_mean, gap_mean = self._control_variate_means()
+            controls = [
+                np.bincount(path_index, weights=profit, minlength=num_paths) - counts * profit_mean,
+                delay_sums - counts * delay_mean,
+                first_block_sums - buffer_size * gap_mean,
+            ]
+            means = (profit_mean, delay_mean, gap_mean)
+            paths['controls'] = np.column_stack([c for c, m in zip(controls, means) if np.isfinite(m)])
+        return paths
+
+    def _simulate_path_chunks(self, num_paths, simulation_period_days, chunk_size, frequency_tilt=None,
+                              variance_reduction=None, qmc_replicates=8, control_variates=False):
+        """
+        Simulates ``num_paths`` paths in batches of ``chunk_size`` to bound memory.
+
+        Returns the per-path arrays of _simulate_paths concatenated over the
+        chunks, with group labels offset to stay unique.
+        """
+        if variance_reduction == 'antithetic':
+            chunk_size = max(2, chunk_size - chunk_size % 2)
+
+        chunks = []
+        for start in range(0, num_paths, chunk_size):
+            stop = min(start + chunk_size, num_paths)
+            paths = self._simulate_paths(
+                stop - start, simulation_period_days, frequency_tilt,
+                variance_reduction, qmc_replicates, control_variates
+            )
+            paths['group'] = paths['group'] + start
+            chunks.append(paths)
+        return _concatenate_paths(chunks)
+
+    def run_simulation(self, num_simulations, simulation_period_days=365, chunk_size=100_000,
+                       workers=None, shard_size=None, frequency_tilt=None,
+                       variance_reduction=None, control_variates=False, qmc_replicates=8):
+        """
+        Runs the Monte Carlo simulation for supply chain disruptions.
+
+        With ``workers`` > 1 the paths are split into shards of ``shard_size``
+        (by default four shards per worker) and run on a process pool, each
+        shard on its own child seed stream. Results are identical for a given
+        seed and shard layout, so with a fixed ``shard_size`` they do not
+        depend on the number of workers (one worker runs the same shards in
+        this process).
+
+        With ``frequency_tilt`` disruptions are oversampled by that factor and
+        every path carries an importance weight (returned as
+        ``importance_weights``); the averages are then weighted estimates.
+
+        ``variance_reduction`` selects 'antithetic' path pairs or scrambled
+        'sobol'/'halton' points (in ``qmc_replicates`` independent
+        randomizations) for the inter-arrival buffer and the copula draws.
+        ``control_variates`` adjusts the averages with the analytic means of
+        the fitted marginals. The achieved standard errors are returned under
+        ``standard_errors``.
+
+        With instrumentation enabled (``enable_instrumentation``) the stage
+        timers and counters of the run are returned under ``instrumentation``.
+        """
+        _check_variance_reduction(variance_reduction, num_simulations)
+        if frequency_tilt and control_variates:
+            raise ValueError("Control variates cannot be combined with frequency_tilt.")
+        options = (frequency_tilt, variance_reduction, qmc_replicates, control_variates)
+        self.instrumentation.reset()
+
+        with self.instrumentation.stage('simulation'):
+            if shard_size is None and (workers is None or workers <= 1):
+                paths = self._simulate_path_chunks(num_simulations, simulation_period_days, chunk_size, *options)
+            else:
+                shard_sizes = _split_into_shards(num_simulations, workers, shard_size, even=variance_reduction == 'antithetic')
+                tasks = [
+                    ('_simulate_path_chunks', seed, (num_paths, simulation_period_days, chunk_size, *options))
+                    for seed, num_paths in zip(self.seed_sequence.spawn(len(shard_sizes)), shard_sizes)
+                ]
+                shards = _run_shards(self, tasks, workers)
+                for shard, offset in zip(shards, np.cumsum([0] + shard_sizes[:-1])):
+                    shard['group'] = shard['group'] + offset
+                paths = _concatenate_paths(shards)
+
+        results = self._summarize_paths(paths, frequency_tilt)
+        if self.instrumentation.enabled:
+            results['instrumentation'] = self.instrumentation.report()
+        return results
+
+    def _summarize_paths(self, paths, frequency_tilt=None):
+        """
+        The run_simulation result for per-path arrays: the averages with
+        their standard errors and the arrays themselves.
+        """
+        counts, total_costs, average_delays = paths['num_disruptions'], paths['total_cost'], paths['average_delay']
+        weights = np.exp(paths['log_weight']) if frequency_tilt else 1.0
+        scri_contributions = (total_costs / 1000) + (average_delays * 10) + (counts * 5)
+
+        estimates, standard_errors = {}, {}
+        with self.instrumentation.stage('estimators'):
+            for name, values in [('avg_total_cost_per_period', total_costs),
+                                 ('avg_num_disruptions_per_period', counts),
+                                 ('avg_average_delay_per_disruption', average_delays),
+                                 ('supply_chain_risk_index', scri_contributions)]:
+                estimates[name], standard_errors[name] = _mean_and_standard_error(
+                    weights * values, paths['group'], paths.get('controls')
+                )
+
+        results = {
+            'avg_total_cost_per_period': estimates['avg_total_cost_per_period'],
+            'avg_num_disruptions_per_period': estimates['avg_num_disruptions_per_period'],
+            'avg_average_delay_per_disruption': estimates['avg_average_delay_per_disruption'],
+            'simulated_total_costs': total_costs,
+            'simulated_num_disruptions': counts,
+            'simulated_average_delays': average_delays,
+            'supply_chain_risk_index': estimates['supply_chain_risk_index'],
+            'standard_errors': standard_errors
         }
+        if frequency_tilt:
+            results['importance_weights'] = weights
+        return results
+
+    def _accumulate_path_chunks(self, num_paths, simulation_period_days, chunk_size,
+                                relative_accuracy, spill_files=None, spill_offset=0):
+        """
+        Simulates paths chunk by chunk into a PathAccumulator, optionally
+        writing the raw per-path arrays into the ``.npy`` files of ``spill_files``.
+        """
+        accumulator = PathAccumulator(relative_accuracy)
+        spill = {}
+        if spill_files:
+            spill = {name: np.load(path, mmap_mode='r+') for name, path in spill_files.items()}
+
+        for start in range(0, num_paths, chunk_size):
+            stop = min(start + chunk_size, num_paths)
+            paths = self._simulate_paths(stop - start, simulation_period_days)
+            counts, total_costs, average_delays = paths['num_disruptions'], paths['total_cost'], paths['average_delay']
+            with self.instrumentation.stage('accumulate'):
+                accumulator.update(counts, total_costs, average_delays)
+            if spill:
+                rows = slice(spill_offset + start, spill_offset + stop)
+                spill['num_disruptions'][rows] = counts
+                spill['total_cost'][rows] = total_costs
+                spill['average_delay'][rows] = average_delays
+
+        for array in spill.values():
+            array.flush()
+        return accumulator
+
+    def run_simulation_streaming(self, num_simulations, simulation_period_days=365, chunk_size=100_000,
+                                 var_levels=(0.95, 0.99), relative_accuracy=0.01, spill_dir=None,
+                                 workers=None, shard_size=None):
+        """
+        Runs the simulation in bounded memory and returns a compact summary.
+
+        Paths are folded chunk by chunk into online accumulators (moments,
+        a quantile sketch of total cost for VaR/CVaR, histograms) instead of
+        being kept in memory. With ``spill_dir`` the raw per-path arrays are
+        also written there as ``.npy`` files.
+        """
+        self.instrumentation.reset()
+        spill_files = None
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+            spill_files = {}
+            for name, dtype in [('num_disruptions', np.int64), ('total_cost', np.float64), ('average_delay', np.float64)]:
+                path = os.path.join(spill_dir, f"{name}.npy")
+                np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(num_simulations,)).flush()
+                spill_files[name] = path
+
+        if shard_size is None and (workers is None or workers <= 1):
+            accumulator = self._accumulate_path_chunks(
+                num_simulations, simulation_period_days, chunk_size, relative_accuracy, spill_files
+            )
+        else:
+            shard_sizes = _split_into_shards(num_simulations, workers, shard_size)
+            offsets = np.concatenate([[0], np.cumsum(shard_sizes)[:-1]])
+            tasks = [
+                ('_accumulate_path_chunks', seed,
+                 (num_paths, simulation_period_days, chunk_size, relative_accuracy, spill_files, int(offset)))
+                for seed, num_paths, offset in zip(self.seed_sequence.spawn(len(shard_sizes)), shard_sizes, offsets)
+            ]
+            accumulator = PathAccumulator(relative_accuracy)
+            for shard in _run_shards(self, tasks, workers):
+                accumulator.merge(shard)
+
+        summary = accumulator.summary(var_levels)
+        if spill_files:
+            summary['spill_files'] = spill_files
+        if self.instrumentation.enabled:
+            summary['instrumentation'] = self.instrumentation.report()
+        return summary
 
 # =============================================================================
 # New Code for Inventory Policies and Experimentation
 # =============================================================================
 class InventorySimulator:
-    def __init__(self, demand_dist, lead_time_dist, holding_cost=1.0, shortage_cost=10.0, order_cost=50.0):
+    instrumentation = NULL_INSTRUMENTATION
+
+    def __init__(self, demand_dist, lead_time_dist, holding_cost=1.0, shortage_cost=10.0, order_cost=50.0,
+                 seed=None):
         self.demand_dist = demand_dist
         self.lead_time_dist = lead_time_dist
         self.holding_cost = holding_cost
         self.shortage_cost = shortage_cost
         self.order_cost = order_cost
-        self.rng = np.random.default_rng()
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.seed_sequence)
 
-    def _run_single_simulation(self, policy, policy_params, sim_period_days, initial_inventory=100):
+    def enable_instrumentation(self, track_memory=False):
         """
-        Runs a single inventory simulation run for a given policy and parameters.
+        Turns on per-stage timers and counters (and peak-allocation tracking
+        with ``track_memory``). Experiments and sweeps then attach the report
+        of their run to the result as ``attrs['instrumentation']``.
         """
-        inventory_level = initial_inventory
-        inventory_position = initial_inventory
-        total_holding_cost = 0
-        total_shortage_cost = 0
-        total_ordering_cost = 0
-        
-        # Track pending orders
-        pending_orders = {}
-
-        for day in range(sim_period_days):
-            # 1. Process incoming orders
-            if day in pending_orders:
-                inventory_level += pending_orders[day]
-                del pending_orders[day]
-
-            # 2. Update inventory costs
-            if inventory_level > 0:
-                total_holding_cost += inventory_level * self.holding_cost
-            else:
-                total_shortage_cost += abs(inventory_level) * self.shortage_cost
-
-            # 3. Simulate demand
-            daily_demand = max(0, int(self.demand_dist.rvs())) # Ensure non-negative and integer demand
-            
-            # 4. Fulfill demand
-            inventory_level -= daily_demand
-            inventory_position = inventory_level + sum(pending_orders.values())
-
-            # 5. Make a decision based on the policy
-            order_qty = 0
-            if policy == 'sS':
-                s, S = policy_params['s'], policy_params['S']
-                if inventory_position <= s:
-                    order_qty = S - inventory_position
-            elif policy == 'myopic':
-                # Myopic: order up to average demand of a period (e.g., 30 days)
-                # This is a simplified model. A more complex one would track historical demand.
-                # For this prototype, we'll assume a fixed average demand target.
-                avg_daily_demand = self.demand_dist.mean()
-                if inventory_position < avg_daily_demand:
-                    order_qty = avg_daily_demand * 30 # Order up to 30 days of average demand
-            
-            if order_qty > 0:
-                total_ordering_cost += self.order_cost
-                # Simulate lead time using the distribution
-                lead_time = max(1, int(self.lead_time_dist.rvs()))
-                arrival_day = day + lead_time
-                pending_orders[arrival_day] = pending_orders.get(arrival_day, 0) + order_qty
-        
+        self.instrumentation = Instrumentation(track_memory)
+        return self.instrumentation
+
+    def disable_instrumentation(self):
+        """Turns instrumentation back off."""
+        self.instrumentation.close()
+        self.instrumentation = NULL_INSTRUMENTATION
+
+    def _order_quantities(self, policy, policy_params, inventory_position):
+        """
+        Returns the order quantity of every replication for the given policy.
+        """
+        if policy == 'sS':
+            s, S = policy_params['s'], policy_params['S']
+            return np.where(inventory_position <= s, S - inventory_position, 0.0)
+        if policy == 'myopic':
+            # Myopic: order ``target_days`` (30 by default) days of average demand
+            # once the position drops below one day of average demand.
+            avg_daily_demand = self.demand_dist.mean()
+            target_days = policy_params.get('target_days', 30)
+            return np.where(inventory_position < avg_daily_demand, avg_daily_demand * target_days, 0.0)
+        raise ValueError(f"Unsupported policy: {policy}")
+
+    def _simulate_replications(self, policy, policy_params, num_replications, sim_period_days,
+                               initial_inventory=100, block_days=30, variance_reduction=None,
+                               qmc_replicates=8, return_demand_totals=False, streams=None):
+        """
+        Advances all replications together, one day at a time.
+
+        Demand and lead times are pre-drawn in blocks of ``block_days`` and
+        pending orders live in a ring buffer indexed by arrival day, wide
+        enough for the longest lead time drawn so far. Returns per-replication
+        arrays of total, holding, shortage and ordering cost.
+
+        With ``variance_reduction`` the draws come from the inverse CDFs of
+        antithetic or scrambled Sobol/Halton uniforms. ``return_demand_totals``
+        also returns each replication's sum of raw demand draws, whose mean is
+        known and serves as a control variate.
+
+        ``streams`` (from draw_common_streams) replays pre-drawn demand and
+        lead times instead of drawing new ones; replication i uses stream row
+        i modulo the number of rows, so several policies can be stacked into
+        one call. Policy parameters may then be per-replication arrays.
+        """
+        _check_variance_reduction(variance_reduction, num_replications)
+        if streams is not None and streams['demand'].shape[1] < sim_period_days:
+            raise ValueError("Common random number streams are shorter than the simulation period.")
+        demand_totals = np.zeros(num_replications)
+        inventory_level = np.full(num_replications, float(initial_inventory))
+        pipeline_total = np.zeros(num_replications)
+        pipeline = np.zeros((num_replications, 1))
+        total_holding_cost = np.zeros(num_replications)
+        total_shortage_cost = np.zeros(num_replications)
+        total_ordering_cost = np.zeros(num_replications)
+        orders_placed = 0
+
+        for block_start in range(0, sim_period_days, block_days):
+            block_len = min(block_days, sim_period_days - block_start)
+            size = (num_replications, block_len)
+            with self.instrumentation.stage('demand_lead_time_draws'):
+                if streams is not None:
+                    rows = np.arange(num_replications) % streams['demand'].shape[0]
+                    raw_demands = streams['demand'][rows, block_start:block_start + block_len]
+                    raw_lead_times = streams['lead_time'][rows, block_start:block_start + block_len]
+                elif variance_reduction is None:
+                    raw_demands = self.demand_dist.rvs(size=size, random_state=self.rng)
+                    raw_lead_times = self.lead_time_dist.rvs(size=size, random_state=self.rng)
+                else:
+                    raw_demands = self.demand_dist.ppf(
+                        _draw_uniforms(self.rng, num_replications, block_len, variance_reduction, qmc_replicates)
+                    )
+                    raw_lead_times = self.lead_time_dist.ppf(
+                        _draw_uniforms(self.rng, num_replications, block_len, variance_reduction, qmc_replicates)
+                    )
+            if streams is None:
+                self.instrumentation.count('samples_drawn', 2 * num_replications * block_len)
+            demand_totals += raw_demands.sum(axis=1)
+            demands = np.maximum(0, np.trunc(raw_demands))
+            lead_times = np.maximum(1, np.trunc(raw_lead_times))
+            # Orders due on or after the last day never arrive, so they need no slot
+            lead_times = np.minimum(lead_times, sim_period_days).astype(np.int64)
+
+            ring_size = pipeline.shape[1]
+            needed = int(lead_times.max()) + 1
+            if needed > ring_size:
+                new_size = 1 << (needed - 1).bit_length()
+                arrival_days = block_start + (np.arange(ring_size) - block_start) % ring_size
+                grown = np.zeros((num_replications, new_size))
+                grown[:, arrival_days % new_size] = pipeline
+                pipeline, ring_size = grown, new_size
+
+            with self.instrumentation.stage('inventory_day_loop'):
+                for offset in range(block_len):
+                    day = block_start + offset
+
+                    # 1. Process incoming orders
+                    slot = day % ring_size
+                    arrivals = pipeline[:, slot]
+                    inventory_level += arrivals
+                    pipeline_total -= arrivals
+                    pipeline[:, slot] = 0
+
+                    # 2. Update inventory costs
+                    total_holding_cost += np.where(inventory_level > 0, inventory_level * self.holding_cost, 0)
+                    total_shortage_cost += np.where(inventory_level > 0, 0, -inventory_level * self.shortage_cost)
+
+                    # 3-4. Simulate and fulfill demand
+                    inventory_level -= demands[:, offset]
+                    inventory_position = inventory_level + pipeline_total
+
+                    # 5. Make a decision based on the policy
+                    order_qty = self._order_quantities(policy, policy_params, inventory_position)
+                    ordering = np.flatnonzero(order_qty > 0)
+                    if ordering.size == 0:
+                        continue
+                    orders_placed += ordering.size
+                    total_ordering_cost[ordering] += self.order_cost
+                    pipeline_total[ordering] += order_qty[ordering]
+
+                    arrival_day = day + lead_times[ordering, offset]
+                    arrives = arrival_day < sim_period_days
+                    ordering, arrival_day = ordering[arrives], arrival_day[arrives]
+                    pipeline[ordering, arrival_day % ring_size] += order_qty[ordering]
+
+        self.instrumentation.count('replications', num_replications)
+        self.instrumentation.count('orders_placed', orders_placed)
         total_cost = total_holding_cost + total_shortage_cost + total_ordering_cost
+        if return_demand_totals:
+            return total_cost, total_holding_cost, total_shortage_cost, total_ordering_cost, demand_totals
         return total_cost, total_holding_cost, total_shortage_cost, total_ordering_cost
 
-    def run_experiment(self, policy_name, parameter_grid, num_simulations, sim_period_days=365):
+    def _run_single_simulation(self, policy, policy_params, sim_period_days, initial_inventory=100):
+        """
+        Runs a single inventory simulation run for a given policy and parameters.
+        """
+        costs = self._simulate_replications(policy, policy_params, 1, sim_period_days, initial_inventory)
+        return tuple(float(cost[0]) for cost in costs)
+
+    def run_experiment(self, policy_name, parameter_grid, num_simulations, sim_period_days=365,
+                       workers=None, shard_size=None, variance_reduction=None, control_variates=False,
+                       qmc_replicates=8):
         """
         Runs a series of simulations across a parameter grid for a given policy.
+
+        With ``workers`` > 1 every grid point is split into shards that run on
+        a process pool, each on its own child seed stream. With a fixed
+        ``shard_size`` the results do not depend on the number of workers.
+
+        ``variance_reduction`` ('antithetic', 'sobol' or 'halton') and
+        ``control_variates`` (on total demand, whose mean is known) reduce the
+        noise of the average cost; its achieved standard error is reported as
+        ``std_error_cost``.
+        """
+        _check_variance_reduction(variance_reduction, num_simulations)
+        options = (100, 30, variance_reduction, qmc_replicates, True)
+        self.instrumentation.reset()
+
+        if shard_size is None and (workers is None or workers <= 1):
+            shard_sizes = [num_simulations]
+            shards = [
+                self._simulate_replications(policy_name, params, num_simulations, sim_period_days, *options)
+                for params in parameter_grid
+            ]
+        else:
+            shard_sizes = _split_into_shards(num_simulations, workers, shard_size, even=variance_reduction == 'antithetic')
+            seeds = iter(self.seed_sequence.spawn(len(parameter_grid) * len(shard_sizes)))
+            tasks = [
+                ('_simulate_replications', next(seeds),
+                 (policy_name, params, num_replications, sim_period_days, *options))
+                for params in parameter_grid for num_replications in shard_sizes
+            ]
+            shards = _run_shards(self, tasks, workers)
+
+        offsets = np.cumsum([0] + shard_sizes[:-1])
+        groups = np.concatenate([
+            _variance_reduction_groups(size, variance_reduction, qmc_replicates) + offset
+            for size, offset in zip(shard_sizes, offsets)
+        ])
+
+        results = [
+            self._summarize_point(
+                policy_name, params, shards[i * len(shard_sizes):(i + 1) * len(shard_sizes)], groups,
+                sim_period_days, control_variates
+            )
+            for i, params in enumerate(parameter_grid)
+        ]
+
+        # pandas is only needed for the result tables, so it is imported here
+        import pandas as pd
+        results = pd.DataFrame(results)
+        if self.instrumentation.enabled:
+            results.attrs['instrumentation'] = self.instrumentation.report()
+        return results
+
+    def _summarize_point(self, policy_name, params, point_shards, groups, sim_period_days, control_variates):
+        """
+        The run_experiment row of one grid point from its replication shards
+        (each as returned by _simulate_replications with demand totals).
+        """
+        costs = np.concatenate([shard[0] for shard in point_shards])
+        controls = None
+        if control_variates:
+            demand_totals = np.concatenate([shard[4] for shard in point_shards])
+            controls = (demand_totals - sim_period_days * self.demand_dist.mean())[:, None]
+
+        avg_cost, std_error = _mean_and_standard_error(costs, groups, controls)
+        std_dev = np.std(costs)
+        return {
+            'policy': policy_name,
+            'parameters': params,
+            'avg_total_cost': avg_cost,
+            'std_dev_cost': std_dev,
+            'std_error_cost': std_error
+        }
+
+    def draw_common_streams(self, num_replications, sim_period_days=365, variance_reduction=None,
+                            qmc_replicates=8):
+        """
+        Draws the demand and lead-time streams of every replication once, so
+        they can be replayed across policies (common random numbers).
+        """
+        _check_variance_reduction(variance_reduction, num_replications)
+        size = (num_replications, sim_period_days)
+        with self.instrumentation.stage('demand_lead_time_draws'):
+            if variance_reduction is None:
+                demand = self.demand_dist.rvs(size=size, random_state=self.rng)
+                lead_time = self.lead_time_dist.rvs(size=size, random_state=self.rng)
+            else:
+                demand = self.demand_dist.ppf(
+                    _draw_uniforms(self.rng, num_replications, sim_period_days, variance_reduction, qmc_replicates)
+                )
+                lead_time = self.lead_time_dist.ppf(
+                    _draw_uniforms(self.rng, num_replications, sim_period_days, variance_reduction, qmc_replicates)
+                )
+        self.instrumentation.count('samples_drawn', 2 * demand.size)
+        return {
+            'demand': demand,
+            'lead_time': lead_time,
+            'variance_reduction': variance_reduction,
+            'qmc_replicates': qmc_replicates,
+        }
+
+    def run_sweep(self, scenarios, num_simulations, sim_period_days=365, streams=None, baseline=0,
+                  points_per_batch=64, variance_reduction=None, qmc_replicates=8):
+        """
+        Evaluates every policy and parameter combination on the same demand
+        and lead-time streams (common random numbers).
+
+        ``scenarios`` maps policy names to parameter grids. The streams are
+        drawn once (or taken from ``streams``) and up to ``points_per_batch``
+        grid points are simulated together as one stacked batch. Returns a
+        tidy DataFrame with one row per combination, including the paired
+        difference in average cost against the ``baseline`` row.
+        """
+        self.instrumentation.reset()
+        if streams is None:
+            streams = self.draw_common_streams(num_simulations, sim_period_days, variance_reduction, qmc_replicates)
+        combinations = [(policy, params) for policy, grid in scenarios.items() for params in grid]
+        all_costs = self._sweep_costs(combinations, streams, sim_period_days, points_per_batch)
+        groups = _variance_reduction_groups(all_costs.shape[1], streams['variance_reduction'], streams['qmc_replicates'])
+
+        results = self._summarize_sweep(combinations, all_costs, groups, baseline)
+        if self.instrumentation.enabled:
+            results.attrs['instrumentation'] = self.instrumentation.report()
+        return results
+
+    def _sweep_costs(self, combinations, streams, sim_period_days, points_per_batch=64):
+        """
+        Total cost of every replication of every (policy, parameters)
+        combination on the given streams, as a (combinations, replications)
+        array. Grid points of a policy are simulated together in stacked
+        batches of up to ``points_per_batch``.
         """
+        num_replications = streams['demand'].shape[0]
+        all_costs = np.empty((len(combinations), num_replications))
+        for policy in dict.fromkeys(name for name, _ in combinations):
+            indices = [i for i, (name, _) in enumerate(combinations) if name == policy]
+            for start in range(0, len(indices), points_per_batch):
+                batch = indices[start:start + points_per_batch]
+                row_params = {
+                    key: np.repeat([combinations[i][1][key] for i in batch], num_replications)
+                    for key in combinations[batch[0]][1]
+                }
+                costs = self._simulate_replications(
+                    policy, row_params, len(batch) * num_replications, sim_period_days, streams=streams
+                )[0]
+                all_costs[batch] = costs.reshape(len(batch), num_replications)
+        return all_costs
+
+    def _summarize_sweep(self, combinations, all_costs, groups, baseline=0):
+        """The run_sweep table for a (combinations, replications) cost array."""
         results = []
-        for params in parameter_grid:
-            costs = []
-            for _ in range(num_sims):
-                cost, _, _, _ = self._run_single_simulation(policy_name, params, sim_period_days)
-                costs.append(cost)
-            
-            avg_cost = np.mean(costs)
-            std_dev = np.std(costs)
-            results.append({
-                'policy': policy_name,
+        for i, (policy, params) in enumerate(combinations):
+            avg_cost, std_error = _mean_and_standard_error(all_costs[i], groups)
+            row = {
+                'policy': policy,
                 'parameters': params,
+                **params,
                 'avg_total_cost': avg_cost,
-                'std_dev_cost': std_dev
-            })
-        
+                'std_dev_cost': np.std(all_costs[i]),
+                'std_error_cost': std_error
+            }
+            if baseline is not None:
+                row['diff_vs_baseline'], row['diff_std_error'] = _mean_and_standard_error(
+                    all_costs[i] - all_costs[baseline], groups
+                )
+            results.append(row)
+        import pandas as pd
         return pd.DataFrame(results)
 
+# =============================================================================
+# Parallel Execution
+# =============================================================================
+_worker_simulator = None
+
+def _split_into_shards(num_items, workers, shard_size=None, even=False):
+    """
+    Splits ``num_items`` replications into shard sizes, four shards per
+    worker by default. With ``even`` every shard size is even (for
+    antithetic pairs).
+    """
+    if shard_size is None:
+        shard_size = max(1, -(-num_items // (workers * 4)))
+    if even:
+        shard_size += shard_size % 2
+    return [min(shard_size, num_items - start) for start in range(0, num_items, shard_size)]
+
+def _concatenate_paths(parts):
+    """Concatenates dicts of per-path arrays key by key."""
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+def _init_worker(simulator):
+    """Pool initializer: ships the simulator to each worker process once."""
+    global _worker_simulator
+    _worker_simulator = simulator
+
+def _run_shard(task):
+    """
+    Runs one shard on the worker's simulator with the shard's own seed
+    stream. Returns the result and, when instrumentation is on, the shard's
+    own Instrumentation.
+    """
+    method_name, seed, args = task
+    _worker_simulator.rng = np.random.default_rng(seed)
+    if not _worker_simulator.instrumentation.enabled:
+        return getattr(_worker_simulator, method_name)(*args), None
+    _worker_simulator.instrumentation = Instrumentation(_worker_simulator.instrumentation.track_memory)
+    return getattr(_worker_simulator, method_name)(*args), _worker_simulator.instrumentation
+
+def _run_shards(simulator, tasks, workers):
+    """
+    Runs shard tasks on a process pool and returns their results in task
+    order, merging the shards' instrumentation into the simulator's. With
+    at most one worker the shards run one after another in this process;
+    the simulator's own stream is left untouched either way.
+    """
+    if workers is None or workers <= 1:
+        rng = simulator.rng
+        try:
+            results = []
+            for method_name, seed, args in tasks:
+                simulator.rng = np.random.default_rng(seed)
+                results.append(getattr(simulator, method_name)(*args))
+            return results
+        finally:
+            simulator.rng = rng
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(simulator,)) as executor:
+        outputs = list(executor.map(_run_shard, tasks))
+    for _, instrumentation in outputs:
+        if instrumentation is not None:
+            simulator.instrumentation.merge(instrumentation)
+    return [result for result, _ in outputs]
+
 # =============================================================================
 # Example Usage: Connecting the two simulators
 # =============================================================================
 if __name__ == '__main__':
     # we've already done the distribution fitting and saved the parameters.
-    # update the path to **updated_fitted_parameters.json** JSON file.
-    params_path = "/kaggle/input/fitted-parameter/fitted_parameters_updated.json"
-    
+    # pass the path to the fitted-parameter JSON file, or use the bundled one.
+    # Batch runs and sweeps should use the CLI instead (src/cli.py).
+    params_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '..', 'Output', 'fitted_parameters.json'
+    )
+
     # 1. Initialize the Supply Chain Simulator to get fitted distributions
     supply_chain_sim = SupplyChainSimulator(params_path)
 
@@ -322,13 +1671,11 @@ if __name__ == '__main__':
     num_sims = 1000
     sim_period = 365
 
-    # 5. Run the experiments
-    print("\n--- Running (s,S) Policy Experiments ---")
-    sS_results = inv_sim.run_experiment('sS', sS_parameter_grid, num_sims, sim_period)
-    print(sS_results)
-
-    print("\n--- Running Myopic Heuristic Experiments ---")
-    myopic_results = inv_sim.run_experiment('myopic', myopic_parameter_grid, num_sims, sim_period)
-    print(myopic_results)
+    # 5. Run the experiments on common random numbers so the policies are compared on the same demand
+    print("\n--- Running (s,S) and Myopic Policy Sweep ---")
+    sweep_results = inv_sim.run_sweep(
+        {'sS': sS_parameter_grid, 'myopic': myopic_parameter_grid}, num_sims, sim_period
+    )
+    print(sweep_results)
     
     # Note: The myopic policy in this prototype is simplified. A full implementation need to be more sophisticated to show its true performance.
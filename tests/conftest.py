@@ -0,0 +1,36 @@
+# tests/conftest.py
+
+import copy
+
+import pytest
+from scipy import stats
+
+from src.updated_simulation_model import InventorySimulator
+
+# Small fitted-parameter sets: without a copula (so disruptions can cost
+# something) and with a Gaussian copula on profit and delay
+PARAMS = {
+    'inter_arrival_time': {'distribution': 'weibull_min', 'parameters': [1.1, 0.0, 60.0]},
+    'order_profit_per_order': {'distribution': 'norm', 'parameters': [20.0, 60.0]},
+    'shipping_delay_days': {'distribution': 'expon', 'parameters': [0.0, 5.0]},
+}
+COPULA = {
+    'type': 'gaussian',
+    'variables': ['order_profit_per_order', 'shipping_delay_days'],
+    'parameters': {'correlation_matrix': [[1.0, -0.4], [-0.4, 1.0]]},
+}
+
+
+@pytest.fixture
+def params():
+    return copy.deepcopy(PARAMS)
+
+
+@pytest.fixture
+def copula_params():
+    return {**copy.deepcopy(PARAMS), 'copula': copy.deepcopy(COPULA)}
+
+
+@pytest.fixture
+def inventory_simulator():
+    return InventorySimulator(stats.norm(5, 2), stats.expon(0, 5.0), seed=0)
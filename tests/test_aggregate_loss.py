@@ -0,0 +1,20 @@
+# tests/test_aggregate_loss.py
+
+import numpy as np
+import pytest
+
+from src.aggregate_loss import AggregateLossModel
+
+
+@pytest.mark.parametrize('with_copula', [False, True])
+def test_aggregate_loss_matches_monte_carlo(params, copula_params, with_copula):
+    model = AggregateLossModel(copula_params if with_copula else params)
+    comparison = model.check_against_simulation(20_000, seed=3)
+    assert np.all(np.abs(comparison['z_score']) < 4), comparison
+
+
+def test_count_pmf_is_a_distribution(params):
+    results = AggregateLossModel(params).run()
+    assert results['count_pmf'].sum() == pytest.approx(1.0, abs=1e-9)
+    assert results['cost_pmf'].sum() == pytest.approx(1.0, abs=1e-6)
+    assert results['truncated_mass'] < 1e-6
@@ -0,0 +1,36 @@
+# tests/test_benchmarks.py
+
+import pytest
+
+from src.benchmarks import Benchmark, append_history, compare_runs, load_history, run_benchmarks
+
+
+def _record(throughputs):
+    return {'results': {name: {'throughput': throughput} for name, throughput in throughputs.items()}}
+
+
+def test_compare_runs_flags_drops_beyond_the_threshold():
+    baseline = _record({'fast': 100.0, 'slow': 100.0, 'steady': 100.0, 'removed': 100.0})
+    current = _record({'fast': 150.0, 'slow': 85.0, 'steady': 95.0, 'added': 10.0})
+    rows = {row['benchmark']: row for row in compare_runs(baseline, current, threshold=0.10)}
+
+    assert sorted(rows) == ['fast', 'slow', 'steady']
+    assert rows['slow']['regression'] and rows['slow']['change'] == pytest.approx(-0.15)
+    assert not rows['steady']['regression']
+    assert not rows['fast']['regression'] and rows['fast']['change'] == pytest.approx(0.5)
+
+
+def test_run_records_round_trip_through_the_history(tmp_path):
+    benchmark = Benchmark('sum', lambda: list(range(1_000)), sum, 1_000, 'items')
+    history_path = tmp_path / 'history.json'
+    for _ in range(2):
+        append_history(history_path, run_benchmarks([benchmark], repeats=2))
+
+    history = load_history(history_path)
+    assert len(history) == 2
+    assert history[-1]['results']['sum']['throughput'] > 0
+    assert [row['benchmark'] for row in compare_runs(history[0], history[1])] == ['sum']
+
+
+def test_missing_history_is_empty(tmp_path):
+    assert load_history(tmp_path / 'missing.json') == []
@@ -0,0 +1,44 @@
+# tests/test_copula_fitting.py
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from src.copula_fitting import compare_copulas, fit_copula
+
+VARIABLES = ['order_profit_per_order', 'shipping_delay_days', 'inter_arrival_time']
+CORRELATION = np.array([[1.0, -0.4, 0.2], [-0.4, 1.0, 0.3], [0.2, 0.3, 1.0]])
+
+
+def _sample(num_rows, df=None, seed=0):
+    """Rows from a Gaussian (``df`` None) or Student-t copula, put through skewed marginals."""
+    rng = np.random.default_rng(seed)
+    scores = rng.standard_normal((num_rows, 3)) @ np.linalg.cholesky(CORRELATION).T
+    if df is None:
+        u = stats.norm.cdf(scores)
+    else:
+        u = stats.t.cdf(scores / np.sqrt(rng.chisquare(df, (num_rows, 1)) / df), df)
+    return np.column_stack([stats.norm(20, 60).ppf(u[:, 0]), stats.expon(0, 5).ppf(u[:, 1]),
+                            stats.weibull_min(1.1, 0, 60).ppf(u[:, 2])])
+
+
+@pytest.mark.parametrize('search_rows', [500_000, 2_000])
+def test_student_t_recovers_df_and_correlation(search_rows):
+    fit = fit_copula(_sample(5_000, df=5.0), VARIABLES, 'student_t', search_rows=search_rows, seed=1)
+    assert fit['parameters']['degrees_of_freedom'] == pytest.approx(5.0, abs=1.5)
+    np.testing.assert_allclose(fit['parameters']['correlation_matrix'], CORRELATION, atol=0.05)
+
+
+def test_gaussian_recovers_correlation():
+    fit = fit_copula(_sample(5_000), VARIABLES, 'gaussian')
+    np.testing.assert_allclose(fit['parameters']['correlation_matrix'], CORRELATION, atol=0.05)
+
+
+def test_comparison_prefers_the_true_copula():
+    _, summary = compare_copulas(_sample(5_000, df=4.0), VARIABLES, seed=2)
+    assert summary['Copula'].iloc[0] == 'student_t'
+
+
+def test_gaussian_data_gives_a_large_df():
+    fit = fit_copula(_sample(5_000, seed=3), VARIABLES, 'student_t', seed=2)
+    assert fit['parameters']['degrees_of_freedom'] > 50
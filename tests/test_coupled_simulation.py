@@ -0,0 +1,43 @@
+# tests/test_coupled_simulation.py
+
+import numpy as np
+import pytest
+
+from src.coupled_simulation import CoupledSimulator
+from src.updated_simulation_model import SupplyChainSimulator
+
+POLICIES = [('sS', {'s': 20, 'S': 100}), ('myopic', {'target_days': 30})]
+
+
+@pytest.mark.parametrize('policy, policy_params', POLICIES)
+def test_coupling_off_matches_inventory_simulator(params, inventory_simulator, policy, policy_params):
+    supply_chain_sim = SupplyChainSimulator.from_params(params, seed=2)
+    coupled = CoupledSimulator(supply_chain_sim, inventory_simulator, lead_time_inflation=False,
+                               delay_in_transit=False, demand_surge=0.0)
+    streams = inventory_simulator.draw_common_streams(100, 180)
+
+    results = coupled.run(policy, policy_params, 100, 180, streams=streams)
+    expected = inventory_simulator._simulate_replications(policy, policy_params, 100, 180, streams=streams)
+    for name, costs in zip(('inventory', 'holding', 'shortage', 'ordering'), expected):
+        np.testing.assert_allclose(results[f'simulated_{name}_costs'], costs, rtol=1e-9)
+
+
+def test_disruption_counts_match_supply_chain_simulator(params, inventory_simulator):
+    coupled = CoupledSimulator(SupplyChainSimulator.from_params(params, seed=3), inventory_simulator)
+    results = coupled.run('sS', {'s': 20, 'S': 100}, 1_000, 365)
+    reference = SupplyChainSimulator.from_params(params, seed=4).run_simulation(20_000)
+    standard_error = np.hypot(results['standard_errors']['avg_num_disruptions'],
+                              reference['standard_errors']['avg_num_disruptions_per_period'])
+    assert abs(results['avg_num_disruptions'] - reference['avg_num_disruptions_per_period']) < 4 * standard_error
+
+
+@pytest.mark.parametrize('option', ['lead_time_inflation', 'delay_in_transit', 'demand_surge'])
+def test_coupling_does_not_lower_shortage_cost(params, inventory_simulator, option):
+    streams = inventory_simulator.draw_common_streams(200, 180)
+    settings = {'lead_time_inflation': False, 'delay_in_transit': False, 'demand_surge': 0.0}
+    costs = []
+    for value in (settings[option], 0.5 if option == 'demand_surge' else True):
+        coupled = CoupledSimulator(SupplyChainSimulator.from_params(params, seed=5), inventory_simulator,
+                                   **{**settings, option: value})
+        costs.append(coupled.run('sS', {'s': 20, 'S': 100}, 200, 180, streams=streams)['simulated_shortage_costs'].mean())
+    assert costs[1] >= costs[0]
@@ -0,0 +1,72 @@
+# tests/test_data_pipeline.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_pipeline import CUSTOMER_ID, ORDER_DATE, build_cache, load_cache
+
+BLOCK_SIZE = 1 << 14
+
+
+def _orders(num_rows, seed=0):
+    """Synthetic DataCo rows over 2017-01 to 2017-04 with the columns the pipeline reads."""
+    rng = np.random.default_rng(seed)
+    order_dates = (pd.Timestamp('2017-01-01') + pd.to_timedelta(rng.integers(0, 120, num_rows), 'D')
+                   + pd.to_timedelta(rng.integers(0, 1440, num_rows), 'min'))
+    shipping_dates = order_dates + pd.to_timedelta(rng.integers(0, 6, num_rows), 'D')
+    zipcodes = rng.choice([111.0, 222.0, 222.0, 333.0], num_rows)
+    zipcodes[rng.random(num_rows) < 0.1] = np.nan
+    return pd.DataFrame({
+        ORDER_DATE: [date.strftime('%-m/%-d/%Y %-H:%M') for date in order_dates],
+        'shipping date (DateOrders)': [date.strftime('%-m/%-d/%Y %-H:%M') for date in shipping_dates],
+        'Days for shipment (scheduled)': rng.integers(1, 5, num_rows),
+        'Customer Lname': np.where(rng.random(num_rows) < 0.05, None, 'Smith'),
+        'Customer Zipcode': zipcodes,
+        'Order Zipcode': np.where(rng.random(num_rows) < 0.5, np.nan, 1.0),
+        'Product Description': np.nan,
+        CUSTOMER_ID: rng.integers(0, 100, num_rows),
+        'Order Profit Per Order': rng.normal(20, 60, num_rows),
+    }), order_dates
+
+
+def _sorted_cache(cache_dir):
+    key = [CUSTOMER_ID, ORDER_DATE, 'order_profit_per_order']
+    return load_cache(cache_dir).sort_values(key).reset_index(drop=True)
+
+
+@pytest.fixture
+def order_history(tmp_path):
+    orders, order_dates = _orders(3_000)
+    full_csv = tmp_path / 'full.csv'
+    orders.to_csv(full_csv, index=False)
+    build_cache(full_csv, tmp_path / 'full_cache', BLOCK_SIZE)
+    return orders, order_dates, full_csv, _sorted_cache(tmp_path / 'full_cache')
+
+
+def test_incremental_build_after_mid_month_cut_matches_full_rebuild(tmp_path, order_history):
+    orders, order_dates, full_csv, expected = order_history
+    partial_csv = tmp_path / 'partial.csv'
+    orders[order_dates < pd.Timestamp('2017-04-15')].to_csv(partial_csv, index=False)
+
+    build_cache(partial_csv, tmp_path / 'cache', BLOCK_SIZE)
+    assert build_cache(full_csv, tmp_path / 'cache', BLOCK_SIZE) == ['2017-04']
+    pd.testing.assert_frame_equal(_sorted_cache(tmp_path / 'cache'), expected)
+
+
+def test_orders_added_to_an_earlier_month_restage_it(tmp_path, order_history):
+    orders, order_dates, full_csv, expected = order_history
+    partial_csv = tmp_path / 'partial.csv'
+    february = (order_dates >= pd.Timestamp('2017-02-10')) & (order_dates < pd.Timestamp('2017-02-20'))
+    orders[~february].to_csv(partial_csv, index=False)
+
+    build_cache(partial_csv, tmp_path / 'cache', BLOCK_SIZE)
+    assert build_cache(full_csv, tmp_path / 'cache', BLOCK_SIZE) == ['2017-02', '2017-03', '2017-04']
+    pd.testing.assert_frame_equal(_sorted_cache(tmp_path / 'cache'), expected)
+
+
+def test_rerun_on_the_same_csv_changes_nothing(tmp_path, order_history):
+    _, _, full_csv, expected = order_history
+    build_cache(full_csv, tmp_path / 'cache', BLOCK_SIZE)
+    assert build_cache(full_csv, tmp_path / 'cache', BLOCK_SIZE) == ['2017-04']
+    pd.testing.assert_frame_equal(_sorted_cache(tmp_path / 'cache'), expected)
@@ -0,0 +1,45 @@
+# tests/test_distribution_fitting.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from src.distribution_fitting import fit_all, fit_distribution
+
+# Families with a location offset, and the parameters the fits should recover
+TRUE_PARAMETERS = {
+    'weibull_min': (1.5, 10.0, 20.0),
+    'lognorm': (0.5, 5.0, 10.0),
+    'pareto': (3.0, -2.0, 4.0),
+    'expon': (3.0, 7.0),
+}
+
+
+def _sample(dist_name, size=4_000, seed=0):
+    dist = getattr(stats, dist_name)(*TRUE_PARAMETERS[dist_name])
+    return np.sort(dist.rvs(size=size, random_state=np.random.default_rng(seed)))
+
+
+@pytest.mark.parametrize('dist_name', sorted(TRUE_PARAMETERS))
+def test_fit_recovers_known_parameters(dist_name):
+    data = _sample(dist_name)
+    fit = fit_distribution(dist_name, data, subsample_size=1_000, rng=np.random.default_rng(1))
+    np.testing.assert_allclose(fit['Parameters'], TRUE_PARAMETERS[dist_name], rtol=0.1, atol=0.3)
+    assert np.isfinite(fit['AIC'])
+
+
+@pytest.mark.parametrize('dist_name', sorted(TRUE_PARAMETERS))
+def test_fit_matches_scipy_log_likelihood(dist_name):
+    data = _sample(dist_name, seed=2)
+    fit = fit_distribution(dist_name, data)
+    scipy_params = getattr(stats, dist_name).fit(data)
+    scipy_loglik = np.sum(getattr(stats, dist_name).logpdf(data, *scipy_params))
+    assert fit['Log-likelihood'] >= scipy_loglik - 1e-2
+
+
+def test_parallel_fits_match_serial_fits():
+    datasets = {'a': _sample('weibull_min'), 'b': _sample('lognorm')}
+    serial = fit_all(datasets, subsample_size=1_000, seed=0)
+    parallel = fit_all(datasets, workers=2, subsample_size=1_000, seed=0)
+    pd.testing.assert_frame_equal(serial, parallel)
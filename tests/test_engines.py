@@ -0,0 +1,100 @@
+# tests/test_engines.py
+#
+# The vectorized engines against straightforward scalar loops in the style
+# of the original implementation: one path or one replication at a time,
+# one event or one day at a time. They draw different random numbers, so
+# the averages are compared in standard errors.
+
+import numpy as np
+import pytest
+
+from src.updated_simulation_model import DIST_MAP, SupplyChainSimulator
+
+
+def _frozen(var_params):
+    return DIST_MAP[var_params['distribution']](*var_params['parameters'])
+
+
+def scalar_paths(params, num_paths, simulation_period_days, rng):
+    """Disruption paths one at a time: gaps until the period ends, then one draw per event."""
+    gaps, profits, delays = (_frozen(params[name]) for name in
+                             ('inter_arrival_time', 'order_profit_per_order', 'shipping_delay_days'))
+    total_costs, counts, average_delays = np.zeros(num_paths), np.zeros(num_paths), np.zeros(num_paths)
+    for i in range(num_paths):
+        elapsed, num_events = max(gaps.rvs(random_state=rng), 0.0), 0
+        while elapsed < simulation_period_days:
+            num_events += 1
+            elapsed += max(gaps.rvs(random_state=rng), 0.0)
+        if num_events == 0:
+            continue
+        profit = profits.rvs(size=num_events, random_state=rng)
+        delay = np.maximum(delays.rvs(size=num_events, random_state=rng), 0.0)
+        total_costs[i] = np.sum(np.where(profit < 0, -profit, 0))
+        counts[i] = num_events
+        average_delays[i] = np.mean(delay)
+    return total_costs, counts, average_delays
+
+
+def scalar_inventory_costs(simulator, policy, policy_params, num_replications, sim_period_days, rng=None,
+                           streams=None, initial_inventory=100):
+    """
+    Total cost of each replication from the day-by-day loop with a dict of
+    pending orders, on fresh draws or on the rows of ``streams``.
+    """
+    costs = np.zeros(num_replications)
+    avg_daily_demand = simulator.demand_dist.mean()
+    for i in range(num_replications):
+        if streams is not None:
+            demands, lead_times = streams['demand'][i], streams['lead_time'][i]
+        else:
+            demands = simulator.demand_dist.rvs(size=sim_period_days, random_state=rng)
+            lead_times = simulator.lead_time_dist.rvs(size=sim_period_days, random_state=rng)
+        inventory_level, pending_orders, cost = initial_inventory, {}, 0.0
+        for day in range(sim_period_days):
+            inventory_level += pending_orders.pop(day, 0)
+            if inventory_level > 0:
+                cost += inventory_level * simulator.holding_cost
+            else:
+                cost += -inventory_level * simulator.shortage_cost
+            inventory_level -= max(0, int(demands[day]))
+            inventory_position = inventory_level + sum(pending_orders.values())
+
+            order_qty = 0
+            if policy == 'sS' and inventory_position <= policy_params['s']:
+                order_qty = policy_params['S'] - inventory_position
+            elif policy == 'myopic' and inventory_position < avg_daily_demand:
+                order_qty = avg_daily_demand * policy_params.get('target_days', 30)
+            if order_qty > 0:
+                cost += simulator.order_cost
+                arrival_day = day + max(1, int(lead_times[day]))
+                pending_orders[arrival_day] = pending_orders.get(arrival_day, 0) + order_qty
+        costs[i] = cost
+    return costs
+
+
+def _z_score(a, b):
+    standard_error = np.hypot(np.std(a) / np.sqrt(a.size), np.std(b) / np.sqrt(b.size))
+    return (np.mean(a) - np.mean(b)) / standard_error
+
+
+def test_path_engine_matches_scalar_loop(params):
+    vectorized = SupplyChainSimulator.from_params(params, seed=11).run_simulation(20_000, 365)
+    scalar = scalar_paths(params, 2_000, 365, np.random.default_rng(12))
+    for name, values in zip(('simulated_total_costs', 'simulated_num_disruptions', 'simulated_average_delays'), scalar):
+        assert abs(_z_score(vectorized[name], values)) < 4, name
+
+
+@pytest.mark.parametrize('policy, policy_params', [('sS', {'s': 20, 'S': 100}), ('myopic', {'target_days': 30})])
+def test_inventory_engine_matches_scalar_loop(inventory_simulator, policy, policy_params):
+    vectorized = inventory_simulator._simulate_replications(policy, policy_params, 4_000, 180)[0]
+    scalar = scalar_inventory_costs(inventory_simulator, policy, policy_params, 1_000, 180,
+                                    np.random.default_rng(13))
+    assert abs(_z_score(vectorized, scalar)) < 4
+
+
+def test_inventory_engine_matches_scalar_loop_on_shared_draws(inventory_simulator):
+    # With the same demand and lead-time draws the two loops agree path by path
+    streams = inventory_simulator.draw_common_streams(50, 120)
+    vectorized = inventory_simulator._simulate_replications('sS', {'s': 20, 'S': 100}, 50, 120, streams=streams)[0]
+    scalar = scalar_inventory_costs(inventory_simulator, 'sS', {'s': 20, 'S': 100}, 50, 120, streams=streams)
+    np.testing.assert_allclose(vectorized, scalar, rtol=1e-9)
@@ -0,0 +1,52 @@
+# tests/test_parallel.py
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from src.updated_simulation_model import InventorySimulator, SupplyChainSimulator
+
+PATH_ARRAYS = ('simulated_total_costs', 'simulated_num_disruptions', 'simulated_average_delays')
+
+
+def test_same_seed_reproduces_a_sharded_run(params):
+    first = SupplyChainSimulator.from_params(params, seed=3).run_simulation(4_000, workers=2)
+    second = SupplyChainSimulator.from_params(params, seed=3).run_simulation(4_000, workers=2)
+    for name in PATH_ARRAYS:
+        np.testing.assert_array_equal(first[name], second[name])
+
+
+@pytest.mark.parametrize('variance_reduction', [None, 'antithetic'])
+def test_fixed_shard_size_does_not_depend_on_workers(params, variance_reduction):
+    runs = [
+        SupplyChainSimulator.from_params(params, seed=3).run_simulation(
+            4_000, workers=workers, shard_size=1_000, variance_reduction=variance_reduction
+        )
+        for workers in (1, 2, 3)
+    ]
+    for run in runs[1:]:
+        for name in PATH_ARRAYS:
+            np.testing.assert_array_equal(run[name], runs[0][name])
+        assert run['standard_errors'] == runs[0]['standard_errors']
+
+
+def test_streaming_shards_do_not_depend_on_workers(params):
+    runs = [
+        SupplyChainSimulator.from_params(params, seed=4).run_simulation_streaming(4_000, workers=workers, shard_size=1_000)
+        for workers in (1, 2)
+    ]
+    for name in ('avg_total_cost_per_period', 'std_total_cost_per_period', 'supply_chain_risk_index'):
+        assert runs[0][name] == runs[1][name]
+    assert runs[0]['total_cost_var'] == runs[1]['total_cost_var']
+
+
+def test_experiment_shards_do_not_depend_on_workers():
+    grid = [{'s': 20, 'S': 100}, {'s': 40, 'S': 150}]
+    runs = [
+        InventorySimulator(stats.norm(5, 2), stats.expon(0, 5.0), seed=0).run_experiment(
+            'sS', grid, 400, 90, workers=workers, shard_size=100
+        )
+        for workers in (1, 2)
+    ]
+    np.testing.assert_array_equal(runs[0]['avg_total_cost'], runs[1]['avg_total_cost'])
+    np.testing.assert_array_equal(runs[0]['std_error_cost'], runs[1]['std_error_cost'])
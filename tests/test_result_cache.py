@@ -0,0 +1,68 @@
+# tests/test_result_cache.py
+
+import os
+
+import numpy as np
+
+from src import result_cache
+from src.result_cache import ResultCache
+from src.updated_simulation_model import SupplyChainSimulator
+
+AVERAGES = ('avg_total_cost_per_period', 'avg_num_disruptions_per_period',
+            'avg_average_delay_per_disruption', 'supply_chain_risk_index')
+
+
+def test_top_up_matches_an_uncached_run(params, tmp_path):
+    cache = ResultCache(tmp_path)
+    cache.run_simulation(SupplyChainSimulator.from_params(params, seed=7), 20_000, block_size=10_000)
+    topped_up = cache.run_simulation(SupplyChainSimulator.from_params(params, seed=7), 50_000, block_size=10_000,
+                                     return_paths=True)
+    assert topped_up['cache']['blocks_reused'] == 2 and topped_up['cache']['blocks_computed'] == 3
+
+    # Block k is drawn from child seed k, as shard k of a run with the same shard size
+    uncached = SupplyChainSimulator.from_params(params, seed=7).run_simulation(50_000, shard_size=10_000)
+    np.testing.assert_array_equal(topped_up['simulated_total_costs'], uncached['simulated_total_costs'])
+    for name in AVERAGES:
+        assert topped_up[name] == uncached[name]
+        assert topped_up['standard_errors'][name] == uncached['standard_errors'][name]
+
+
+def test_summary_hit_returns_the_stored_result(params, tmp_path):
+    cache = ResultCache(tmp_path)
+    first = cache.run_simulation(SupplyChainSimulator.from_params(params, seed=7), 20_000, block_size=10_000)
+    second = cache.run_simulation(SupplyChainSimulator.from_params(params, seed=7), 20_000, block_size=10_000)
+    assert second['cache']['hit'] and not first['cache']['hit']
+    for name in AVERAGES:
+        assert second[name] == first[name]
+
+
+def test_experiment_top_up_matches_a_fresh_cache(inventory_simulator, tmp_path):
+    grid = [{'s': 20, 'S': 100}, {'s': 40, 'S': 150}]
+    cache = ResultCache(tmp_path / 'warm')
+    cache.run_experiment(inventory_simulator, 'sS', grid[:1], 400, 90, block_size=100)
+    topped_up = cache.run_experiment(inventory_simulator, 'sS', grid, 800, 90, block_size=100)
+    fresh = ResultCache(tmp_path / 'cold').run_experiment(inventory_simulator, 'sS', grid, 800, 90, block_size=100,
+                                                          store_paths=False)
+    np.testing.assert_array_equal(topped_up['avg_total_cost'], fresh['avg_total_cost'])
+    np.testing.assert_array_equal(topped_up['std_error_cost'], fresh['std_error_cost'])
+
+
+def test_code_version_covers_every_cached_module(tmp_path, monkeypatch):
+    version = result_cache.code_version()
+    for name in result_cache.CACHED_MODULES:
+        source = tmp_path / f"{name}.py"
+        source.write_text(f"# {name}\n")
+    monkeypatch.setattr(result_cache, '__file__', str(tmp_path / 'result_cache.py'))
+    monkeypatch.setattr(result_cache, '_code_version', None)
+    versions = {result_cache.code_version()}
+    for name in result_cache.CACHED_MODULES:
+        (tmp_path / f"{name}.py").write_text(f"# {name}, changed\n")
+        monkeypatch.setattr(result_cache, '_code_version', None)
+        versions.add(result_cache.code_version())
+    assert len(versions) == len(result_cache.CACHED_MODULES) + 1
+    assert version not in versions
+
+
+def test_default_cache_dir_is_outside_the_repository():
+    repository = os.path.dirname(os.path.dirname(os.path.abspath(result_cache.__file__)))
+    assert not os.path.abspath(result_cache.DEFAULT_CACHE_DIR).startswith(repository + os.sep)
@@ -0,0 +1,67 @@
+# tests/test_simulation_service.py
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.simulation_service import CANCELLED, DONE, SimulationService, simulation_request
+from src.updated_simulation_model import SupplyChainSimulator
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_job_joined_without_a_channel_survives_its_channel_moving_on(params):
+    async def scenario():
+        async with SimulationService(batch_size=1_000) as service:
+            job = service.submit(simulation_request(params, 20_000, seed=1), channel='session')
+            assert service.submit(simulation_request(params, 20_000, seed=1)) is job
+            service.submit(simulation_request(params, 20_000, seed=2), channel='session')
+            result = await job.result()
+            return job, result
+
+    job, result = _run(scenario())
+    assert job.status == DONE
+    assert result['final'] and result['completed'] == 20_000
+
+
+def test_superseded_job_is_cancelled_once_released(params):
+    async def scenario():
+        async with SimulationService(batch_size=1_000) as service:
+            job = service.submit(simulation_request(params, 20_000, seed=1), channel='session')
+            service.submit(simulation_request(params, 20_000, seed=1))
+            service.submit(simulation_request(params, 20_000, seed=2), channel='session')
+            assert not job.done
+            service.release(job)
+            with pytest.raises(asyncio.CancelledError):
+                await job.result()
+            return job
+
+    assert _run(scenario()).status == CANCELLED
+
+
+def test_resubmitting_on_the_same_channel_keeps_one_reference(params):
+    async def scenario():
+        async with SimulationService(batch_size=1_000) as service:
+            request = simulation_request(params, 20_000, seed=1)
+            job = service.submit(request, channel='session')
+            assert service.submit(request, channel='session') is job
+            assert job.references == 1
+            service.submit(simulation_request(params, 20_000, seed=2), channel='session')
+            with pytest.raises(asyncio.CancelledError):
+                await job.result()
+
+    _run(scenario())
+
+
+def test_batched_job_matches_a_sharded_run(params):
+    async def scenario():
+        async with SimulationService(batch_size=1_000) as service:
+            return await service.submit(simulation_request(params, 5_000, seed=3)).result()
+
+    result = _run(scenario())['results']
+    # Batch k runs on child seed k of the job's seed, as shard k of run_simulation
+    expected = SupplyChainSimulator.from_params(params, seed=3).run_simulation(5_000, shard_size=1_000)
+    np.testing.assert_array_equal(result['simulated_total_costs'], expected['simulated_total_costs'])
@@ -0,0 +1,32 @@
+# tests/test_streaming.py
+
+import numpy as np
+import pytest
+
+from src.updated_simulation_model import SupplyChainSimulator
+
+AVERAGES = ('avg_total_cost_per_period', 'avg_num_disruptions_per_period',
+            'avg_average_delay_per_disruption', 'supply_chain_risk_index')
+
+
+@pytest.mark.parametrize('with_copula', [False, True])
+def test_streaming_matches_batch(params, copula_params, with_copula):
+    fitted = copula_params if with_copula else params
+    batch = SupplyChainSimulator.from_params(fitted, seed=1).run_simulation(20_000, chunk_size=5_000)
+    streaming = SupplyChainSimulator.from_params(fitted, seed=1).run_simulation_streaming(20_000, chunk_size=5_000)
+
+    assert streaming['num_paths'] == 20_000
+    for name in AVERAGES:
+        assert streaming[name] == pytest.approx(batch[name], rel=1e-12)
+    assert streaming['std_total_cost_per_period'] == pytest.approx(np.std(batch['simulated_total_costs']), rel=1e-9)
+    # The quantile sketch is accurate to its relative accuracy (1% by default)
+    expected = np.quantile(batch['simulated_total_costs'], 0.95)
+    assert streaming['total_cost_var'][0.95] == pytest.approx(expected, rel=0.02)
+
+
+def test_spilled_paths_match_batch(params, tmp_path):
+    batch = SupplyChainSimulator.from_params(params, seed=2).run_simulation(3_000, chunk_size=1_000)
+    streaming = SupplyChainSimulator.from_params(params, seed=2).run_simulation_streaming(
+        3_000, chunk_size=1_000, spill_dir=tmp_path
+    )
+    np.testing.assert_array_equal(np.load(streaming['spill_files']['total_cost']), batch['simulated_total_costs'])
@@ -0,0 +1,33 @@
+# tests/test_sweep.py
+
+import numpy as np
+
+SCENARIOS = {
+    'sS': [{'s': 20, 'S': 100}, {'s': 40, 'S': 150}],
+    'myopic': [{'target_days': 10}, {'target_days': 30}],
+}
+
+
+def test_sweep_matches_individual_runs(inventory_simulator):
+    streams = inventory_simulator.draw_common_streams(200, 120)
+    sweep = inventory_simulator.run_sweep(SCENARIOS, 200, 120, streams=streams)
+
+    expected = [
+        inventory_simulator._simulate_replications(policy, params, 200, 120, streams=streams)[0].mean()
+        for policy, grid in SCENARIOS.items() for params in grid
+    ]
+    np.testing.assert_allclose(sweep['avg_total_cost'], expected, rtol=1e-12)
+    assert sweep['diff_vs_baseline'].iloc[0] == 0.0
+
+
+def test_sweep_batching_does_not_change_costs(inventory_simulator):
+    streams = inventory_simulator.draw_common_streams(100, 90)
+    stacked = inventory_simulator.run_sweep(SCENARIOS, 100, 90, streams=streams)
+    one_by_one = inventory_simulator.run_sweep(SCENARIOS, 100, 90, streams=streams, points_per_batch=1)
+    np.testing.assert_allclose(stacked['avg_total_cost'], one_by_one['avg_total_cost'], rtol=1e-12)
+
+
+def test_paired_differences_match_the_cost_gap(inventory_simulator):
+    sweep = inventory_simulator.run_sweep(SCENARIOS, 200, 120)
+    gaps = sweep['avg_total_cost'] - sweep['avg_total_cost'].iloc[0]
+    np.testing.assert_allclose(sweep['diff_vs_baseline'], gaps, rtol=1e-9, atol=1e-9)
@@ -0,0 +1,66 @@
+# tests/test_validation.py
+
+import numpy as np
+import pytest
+
+from src.updated_simulation_model import SupplyChainSimulator, validate_parameters
+
+
+def test_valid_parameters_pass(params, copula_params):
+    validate_parameters(params)
+    validate_parameters(copula_params)
+
+
+def test_missing_marginal_is_rejected(params):
+    del params['shipping_delay_days']
+    with pytest.raises(ValueError, match="shipping_delay_days"):
+        validate_parameters(params)
+
+
+@pytest.mark.parametrize('value', [True, float('nan'), float('inf'), '5.0'])
+def test_non_numeric_parameters_are_rejected(params, value):
+    params['shipping_delay_days']['parameters'] = [0.0, value]
+    with pytest.raises(ValueError, match="finite numbers"):
+        validate_parameters(params)
+
+
+def test_invalid_distribution_parameters_are_rejected(params):
+    params['shipping_delay_days']['parameters'] = [0.0, -5.0]
+    with pytest.raises(ValueError, match="Invalid expon parameters"):
+        validate_parameters(params)
+
+
+@pytest.mark.parametrize('variable', ['order_profit_per_order', 'shipping_delay_days'])
+def test_copula_must_drive_profit_and_delay(params, variable):
+    other = 'inter_arrival_time'
+    variables = [name for name in ('order_profit_per_order', 'shipping_delay_days') if name != variable] + [other]
+    params['copula'] = {
+        'type': 'gaussian',
+        'variables': variables,
+        'parameters': {'correlation_matrix': np.eye(2).tolist()},
+    }
+    with pytest.raises(ValueError, match=f"Copula must include '{variable}'"):
+        validate_parameters(params)
+
+
+def test_copula_correlation_must_be_positive_definite(copula_params):
+    copula_params['copula']['parameters']['correlation_matrix'] = [[1.0, 1.5], [1.5, 1.0]]
+    with pytest.raises(ValueError, match="positive definite"):
+        validate_parameters(copula_params)
+
+
+@pytest.mark.parametrize('degrees_of_freedom', [None, 0, -3.0, True])
+def test_student_t_copula_needs_positive_degrees_of_freedom(copula_params, degrees_of_freedom):
+    copula_params['copula']['type'] = 'student_t'
+    copula_params['copula']['parameters']['degrees_of_freedom'] = degrees_of_freedom
+    with pytest.raises(ValueError, match="degrees_of_freedom"):
+        validate_parameters(copula_params)
+
+
+@pytest.mark.parametrize('ppf_table_tol', [None, 1e-6])
+def test_compiled_model_reproduces_the_json_model(copula_params, tmp_path, ppf_table_tol):
+    SupplyChainSimulator.from_params(copula_params, ppf_table_tol).save_compiled(tmp_path / 'model')
+    compiled = SupplyChainSimulator.from_compiled(tmp_path / 'model', seed=4).run_simulation(2_000)
+    direct = SupplyChainSimulator.from_params(copula_params, ppf_table_tol, seed=4).run_simulation(2_000)
+    np.testing.assert_array_equal(compiled['simulated_total_costs'], direct['simulated_total_costs'])
+    np.testing.assert_array_equal(compiled['simulated_average_delays'], direct['simulated_average_delays'])
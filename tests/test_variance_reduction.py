@@ -0,0 +1,54 @@
+# tests/test_variance_reduction.py
+
+import numpy as np
+import pytest
+
+from src.updated_simulation_model import SupplyChainSimulator
+
+ESTIMATES = ('avg_num_disruptions_per_period', 'avg_total_cost_per_period')
+
+
+@pytest.fixture
+def reference(params):
+    return SupplyChainSimulator.from_params(params, seed=0).run_simulation(50_000)
+
+
+def _assert_consistent(result, reference, bound=4):
+    # Randomized QMC errors come from 8 replicates, hence the wide bound
+    for name in ESTIMATES:
+        standard_error = np.hypot(result['standard_errors'][name], reference['standard_errors'][name])
+        assert abs(result[name] - reference[name]) < bound * standard_error, name
+
+
+@pytest.mark.parametrize('variance_reduction', ['antithetic', 'sobol', 'halton'])
+def test_variance_reduction_is_unbiased(params, reference, variance_reduction):
+    result = SupplyChainSimulator.from_params(params, seed=5).run_simulation(8_192, variance_reduction=variance_reduction)
+    _assert_consistent(result, reference)
+
+
+@pytest.mark.parametrize('variance_reduction', [None, 'antithetic', 'sobol', 'halton'])
+def test_frequency_tilt_is_unbiased(params, reference, variance_reduction):
+    tilted = SupplyChainSimulator.from_params(params, seed=5).run_simulation(
+        8_192, frequency_tilt=1.5, variance_reduction=variance_reduction
+    )
+    _assert_consistent(tilted, reference)
+
+
+def test_control_variates_reduce_the_standard_error(params, reference):
+    plain = SupplyChainSimulator.from_params(params, seed=6).run_simulation(8_192)
+    controlled = SupplyChainSimulator.from_params(params, seed=6).run_simulation(8_192, control_variates=True)
+    _assert_consistent(controlled, reference)
+    name = 'supply_chain_risk_index'
+    assert controlled['standard_errors'][name] < plain['standard_errors'][name]
+
+
+def test_frequency_tilt_rejects_control_variates(params):
+    simulator = SupplyChainSimulator.from_params(params, seed=0)
+    with pytest.raises(ValueError, match="Control variates"):
+        simulator.run_simulation(1_000, frequency_tilt=1.5, control_variates=True)
+
+
+def test_antithetic_needs_an_even_number_of_paths(params):
+    simulator = SupplyChainSimulator.from_params(params, seed=0)
+    with pytest.raises(ValueError):
+        simulator.run_simulation(1_001, variance_reduction='antithetic')